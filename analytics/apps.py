@@ -0,0 +1,7 @@
+from django.apps import AppConfig
+
+class AnalyticsConfig(AppConfig):
+    name = 'analytics'
+
+    def ready(self):
+        from . import signals  # noqa: F401
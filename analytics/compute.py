@@ -0,0 +1,222 @@
+from array import array
+from bisect import bisect_right
+from collections import Counter
+from functools import partial
+from django.conf import settings
+from django.db import transaction
+from ehs_backend.db_router import use_replica
+from patients.models import Patient
+from appointments.models import Appointment
+from billing.models import Invoice
+from .models import AnalyticsSnapshot
+
+AGE_EDGES = list(range(0, 131))
+
+# Invoice totals in paise; finer bins at the low end where most invoices fall
+REVENUE_EDGES = [
+    0, 100_00, 250_00, 500_00, 1_000_00, 2_500_00, 5_000_00, 10_000_00,
+    25_000_00, 50_000_00, 1_00_000_00, 5_00_000_00, 100_00_000_00
+]
+
+QUANTILES = (0.25, 0.5, 0.75, 0.9, 0.95, 0.99)
+
+STATUS_CODES = {value: code for code, value in enumerate(Appointment.Status.values)}
+
+class Column:
+    """A queryset field materialised into a typed array buffer"""
+    def __init__(self, field, typecode, convert=int):
+        self.field = field
+        self.typecode = typecode
+        self.convert = convert
+
+def iter_column_chunks(queryset, columns, chunk_size=None):
+    """Stream columns from the database in fixed-size array batches.
+
+    Rows come from ``values_list().iterator()`` (a server-side cursor on
+    PostgreSQL) and are packed into ``array`` buffers that are discarded
+    after each batch, so memory is bounded by ``chunk_size`` regardless
+    of table size.
+    """
+    chunk_size = chunk_size or settings.ANALYTICS_COMPUTE_CHUNK_SIZE
+    fields = [column.field for column in columns]
+    buffers = [array(column.typecode) for column in columns]
+
+    for row in queryset.values_list(*fields).iterator(chunk_size=chunk_size):
+        for buffer, column, value in zip(buffers, columns, row):
+            buffer.append(column.convert(value))
+        if len(buffers[0]) >= chunk_size:
+            yield buffers
+            buffers = [array(column.typecode) for column in columns]
+
+    if buffers[0]:
+        yield buffers
+
+class Histogram:
+    """Streaming fixed-bin histogram over integer values.
+
+    Values below the first edge land in the first bin and values at or
+    above the last edge in the last bin. Quantiles are interpolated
+    linearly inside a bin, which is exact for one-unit bins such as ages.
+    """
+    def __init__(self, edges):
+        self.edges = array('q', edges)
+        self.counts = array('q', [0]) * len(edges)
+        self.total = 0
+        self.sum = 0
+        self.min = None
+        self.max = None
+
+    def add(self, values):
+        if not values:
+            return
+        locate = partial(bisect_right, self.edges)
+        last = len(self.edges) - 1
+        for index, count in Counter(map(locate, values)).items():
+            self.counts[min(max(index - 1, 0), last)] += count
+
+        self.total += len(values)
+        self.sum += sum(values)
+        low, high = min(values), max(values)
+        self.min = low if self.min is None else min(self.min, low)
+        self.max = high if self.max is None else max(self.max, high)
+
+    def quantile(self, q):
+        if not self.total:
+            return None
+        target = q * self.total
+        cumulative = 0
+        for index, count in enumerate(self.counts):
+            if count and cumulative + count >= target:
+                lower = self.edges[index]
+                upper = self.edges[index + 1] if index + 1 < len(self.edges) else self.max + 1
+                lower, upper = max(lower, self.min), min(upper, self.max + 1)
+                return lower + (upper - lower) * (target - cumulative) / count
+            cumulative += count
+        return self.max
+
+    def as_dict(self, scale=1):
+        return {
+            'count': self.total,
+            'mean': self.sum / self.total / scale if self.total else None,
+            'min': self.min / scale if self.min is not None else None,
+            'max': self.max / scale if self.max is not None else None,
+            'quantiles': {
+                f'p{round(q * 100)}': (
+                    round(self.quantile(q) / scale, 2) if self.total else None
+                )
+                for q in QUANTILES
+            },
+            'bins': [
+                {'lower': self.edges[index] / scale, 'count': count}
+                for index, count in enumerate(self.counts) if count
+            ]
+        }
+
+class DoctorUtilisation:
+    """Per-doctor appointment outcomes and booked share of available slots"""
+    def __init__(self, slots_per_day):
+        self.slots_per_day = slots_per_day
+        self.status_counts = Counter()
+        self.active_days = {}
+
+    def add(self, doctor_ids, days, statuses):
+        self.status_counts.update(zip(doctor_ids, statuses))
+        for doctor_id, day in set(zip(doctor_ids, days)):
+            self.active_days.setdefault(doctor_id, set()).add(day)
+
+    def as_list(self):
+        cancelled = STATUS_CODES[Appointment.Status.CANCELLED]
+        completed = STATUS_CODES[Appointment.Status.COMPLETED]
+        results = []
+        for doctor_id in sorted(self.active_days):
+            counts = {
+                code: self.status_counts[(doctor_id, code)]
+                for code in STATUS_CODES.values()
+            }
+            total = sum(counts.values())
+            booked = total - counts[cancelled]
+            capacity = len(self.active_days[doctor_id]) * self.slots_per_day
+            results.append({
+                'doctor_id': doctor_id,
+                'appointments': total,
+                'completed': counts[completed],
+                'cancelled': counts[cancelled],
+                'active_days': len(self.active_days[doctor_id]),
+                'utilisation': round(booked / capacity, 4) if capacity else None,
+                'completion_rate': round(counts[completed] / booked, 4) if booked else None,
+                'cancellation_rate': round(counts[cancelled] / total, 4) if total else None
+            })
+        return results
+
+def _date_code(value):
+    """Encode a date as YYYYMMDD so whole-year differences give exact ages"""
+    return value.year * 10000 + value.month * 100 + value.day
+
+def _paise(value):
+    return int(value * 100)
+
+class CohortAnalytics:
+    @staticmethod
+    def age_distribution(today, queryset=None, chunk_size=None):
+        queryset = Patient.objects.all() if queryset is None else queryset
+        today_code = _date_code(today)
+        histogram = Histogram(AGE_EDGES)
+        for (birth_codes,) in iter_column_chunks(
+            queryset, [Column('date_of_birth', 'l', _date_code)], chunk_size
+        ):
+            histogram.add(array('l', [(today_code - code) // 10000 for code in birth_codes]))
+        return histogram.as_dict()
+
+    @staticmethod
+    def revenue_distribution(queryset=None, chunk_size=None):
+        queryset = Invoice.objects.all() if queryset is None else queryset
+        histogram = Histogram(REVENUE_EDGES)
+        for (amounts,) in iter_column_chunks(
+            queryset, [Column('total_amount', 'q', _paise)], chunk_size
+        ):
+            histogram.add(amounts)
+        return histogram.as_dict(scale=100)
+
+    @staticmethod
+    def doctor_utilisation(queryset=None, chunk_size=None):
+        queryset = Appointment.objects.all() if queryset is None else queryset
+        utilisation = DoctorUtilisation(settings.ANALYTICS_DOCTOR_SLOTS_PER_DAY)
+        columns = [
+            Column('doctor_id', 'q'),
+            Column('date', 'l', lambda value: value.toordinal()),
+            Column('status', 'b', STATUS_CODES.__getitem__)
+        ]
+        for doctor_ids, days, statuses in iter_column_chunks(queryset, columns, chunk_size):
+            utilisation.add(doctor_ids, days, statuses)
+        return utilisation.as_list()
+
+    @staticmethod
+    def compute(start_date, end_date, chunk_size=None):
+        """Compute every cohort metric for the period and store the snapshots"""
+        # Only reads; the snapshots below are written to the primary
+        with use_replica():
+            metrics = {
+                'patient_age': CohortAnalytics.age_distribution(
+                    end_date,
+                    Patient.objects.filter(created_at__date__range=(start_date, end_date)),
+                    chunk_size
+                ),
+                'invoice_revenue': CohortAnalytics.revenue_distribution(
+                    Invoice.objects.filter(created_at__date__range=(start_date, end_date)),
+                    chunk_size
+                ),
+                'doctor_utilisation': CohortAnalytics.doctor_utilisation(
+                    Appointment.objects.filter(date__range=(start_date, end_date)),
+                    chunk_size
+                )
+            }
+
+        with transaction.atomic():
+            for metric, payload in metrics.items():
+                AnalyticsSnapshot.objects.update_or_create(
+                    metric=metric,
+                    period_start=start_date,
+                    period_end=end_date,
+                    defaults={'payload': payload}
+                )
+        return metrics
@@ -0,0 +1,115 @@
+from django.db.models import Count, Q, Sum
+from patients.models import Patient
+from appointments.models import Appointment
+from billing.models import Invoice
+from .models import DailyPatientRollup, DailyAppointmentRollup, DailyInvoiceRollup
+from .query import Dashboard, BucketSet, Measure
+
+AGE_RANGES = {
+    '0-18': (0, 18),
+    '19-30': (19, 30),
+    '31-50': (31, 50),
+    '51+': (51, None)
+}
+
+BLOOD_GROUPS = ['A+', 'A-', 'B+', 'B-', 'AB+', 'AB-', 'O+', 'O-']
+
+def years_before(day, years):
+    """Same calendar day `years` earlier; 29 February falls back to the 28th"""
+    try:
+        return day.replace(year=day.year - years)
+    except ValueError:
+        return day.replace(year=day.year - years, day=28)
+
+def age_bucket(min_age, max_age, today):
+    """Condition matching patients whose age on `today` is within the range"""
+    condition = Q(date_of_birth__lte=years_before(today, min_age))
+    if max_age is not None:
+        condition &= Q(date_of_birth__gt=years_before(today, max_age + 1))
+    return condition
+
+def patient_demographics(today, filters=None):
+    return Dashboard(
+        Patient,
+        filters=filters,
+        measures={'total_patients': Measure(Count)},
+        buckets=[
+            BucketSet('age_distribution', {
+                label: age_bucket(min_age, max_age, today)
+                for label, (min_age, max_age) in AGE_RANGES.items()
+            }),
+            BucketSet('blood_groups', {
+                group: Q(blood_group=group) for group in BLOOD_GROUPS
+            })
+        ]
+    )
+
+def financial_summary(start_date, end_date):
+    return Dashboard(
+        DailyInvoiceRollup,
+        filters={'date__range': (start_date, end_date)},
+        measures={
+            'total_revenue': Measure(Sum, 'total_amount'),
+            'paid_amount': Measure(Sum, 'total_amount', filter=Q(status=Invoice.Status.PAID)),
+            'pending_amount': Measure(Sum, 'total_amount', filter=Q(status=Invoice.Status.PENDING)),
+            'invoice_count': Measure(Sum, 'invoice_count')
+        }
+    )
+
+def appointment_breakdown(start_date, end_date):
+    """Per day/doctor/status counts; small enough to summarise in Python"""
+    return Dashboard(
+        DailyAppointmentRollup,
+        filters={'date__range': (start_date, end_date)},
+        group_by=('date', 'doctor_id', 'doctor__first_name', 'doctor__last_name', 'status'),
+        measures={'count': Measure(Sum, 'count')}
+    )
+
+def daily_activity(day):
+    """Headline numbers for a single day, one statement per rollup table"""
+    return {
+        'new_patients': Dashboard(
+            DailyPatientRollup,
+            filters={'date': day},
+            measures={'new_patients': Measure(Sum, 'new_patients')}
+        ),
+        'appointments': Dashboard(
+            DailyAppointmentRollup,
+            filters={'date': day},
+            measures={'appointments': Measure(Sum, 'count')}
+        ),
+        'revenue': Dashboard(
+            DailyInvoiceRollup,
+            filters={'date': day, 'status': Invoice.Status.PAID},
+            measures={'revenue': Measure(Sum, 'total_amount')}
+        )
+    }
+
+def summarize_appointments(rows):
+    """Fold appointment_breakdown rows into the statistics response shape"""
+    status_counts = {}
+    daily_counts = {}
+    doctor_counts = {}
+    for row in rows:
+        status_counts[row['status']] = status_counts.get(row['status'], 0) + row['count']
+        daily_counts[row['date']] = daily_counts.get(row['date'], 0) + row['count']
+        doctor = (row['doctor_id'], row['doctor__first_name'], row['doctor__last_name'])
+        doctor_counts[doctor] = doctor_counts.get(doctor, 0) + row['count']
+
+    return {
+        'total_appointments': sum(status_counts.values()),
+        'status_distribution': [
+            {'status': value, 'count': status_counts[value]}
+            for value in Appointment.Status.values if value in status_counts
+        ],
+        'daily_distribution': [
+            {'date': day, 'count': count}
+            for day, count in sorted(daily_counts.items())
+        ],
+        'doctor_distribution': [
+            {'doctor__first_name': first_name, 'doctor__last_name': last_name, 'count': count}
+            for (doctor_id, first_name, last_name), count in sorted(
+                doctor_counts.items(), key=lambda item: (item[0][2], item[0][1], item[0][0])
+            )
+        ]
+    }
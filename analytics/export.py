@@ -0,0 +1,159 @@
+import json
+import tempfile
+from datetime import datetime, timedelta
+from django.conf import settings
+from django.core.files import File
+from django.core.files.storage import default_storage
+from django.db import models
+from django.utils import timezone
+from ehs_backend.db_router import use_replica
+from patients.models import Patient
+from appointments.models import Appointment
+from billing.models import Invoice, Payment
+from .models import ExportWatermark
+
+# Table name -> (model, watermark field). Payments are immutable once
+# recorded, so their creation time doubles as the change watermark.
+EXPORT_TABLES = {
+    'patients': (Patient, 'updated_at'),
+    'appointments': (Appointment, 'updated_at'),
+    'invoices': (Invoice, 'updated_at'),
+    'payments': (Payment, 'payment_date'),
+}
+
+def _arrow_type(pa, field):
+    if isinstance(field, (models.IntegerField, models.ForeignKey)):
+        return pa.int64()
+    if isinstance(field, models.BooleanField):
+        return pa.bool_()
+    if isinstance(field, models.DecimalField):
+        return pa.decimal128(field.max_digits, field.decimal_places)
+    if isinstance(field, models.DateTimeField):
+        return pa.timestamp('us', tz='UTC')
+    if isinstance(field, models.DateField):
+        return pa.date32()
+    if isinstance(field, models.TimeField):
+        return pa.time64('us')
+    return pa.string()
+
+def _columns(model):
+    return [field for field in model._meta.concrete_fields]
+
+def _partition_date(value):
+    return value.date() if isinstance(value, datetime) else value
+
+class SnapshotExporter:
+    """Stream changed rows into date-partitioned Parquet files.
+
+    Rows are read in watermark order through ``iterator()`` (a server-side
+    cursor on PostgreSQL) and written one row group at a time, so neither
+    the database nor the worker ever holds a full table. Each run only
+    moves rows whose watermark is newer than the previous run's.
+
+    ``updated_at`` is stamped when the saving transaction starts, not when
+    it commits, so each run stops ANALYTICS_EXPORT_SAFETY_LAG seconds
+    before it started: a row committed late with an older timestamp is
+    still ahead of the watermark when the next run reads it.
+    """
+    def __init__(self, storage=None, chunk_size=None, compression=None, prefix=None):
+        import pyarrow
+        import pyarrow.parquet
+
+        self.pa = pyarrow
+        self.pq = pyarrow.parquet
+        self.storage = storage or default_storage
+        self.chunk_size = chunk_size or settings.ANALYTICS_EXPORT_CHUNK_SIZE
+        self.compression = compression or settings.ANALYTICS_EXPORT_COMPRESSION
+        self.prefix = prefix or settings.ANALYTICS_EXPORT_PREFIX
+
+    def schema(self, model):
+        return self.pa.schema([
+            (field.attname, _arrow_type(self.pa, field))
+            for field in _columns(model)
+        ])
+
+    def export_table(self, name, run_started, full=False):
+        model, watermark_field = EXPORT_TABLES[name]
+        watermark, _ = ExportWatermark.objects.get_or_create(table=name)
+
+        upper = run_started - timedelta(seconds=settings.ANALYTICS_EXPORT_SAFETY_LAG)
+        queryset = model.objects.filter(**{f'{watermark_field}__lte': upper})
+        if watermark.value and not full:
+            queryset = queryset.filter(**{f'{watermark_field}__gt': watermark.value})
+
+        fields = _columns(model)
+        json_columns = {
+            index for index, field in enumerate(fields)
+            if isinstance(field, models.JSONField)
+        }
+        watermark_index = [field.attname for field in fields].index(watermark_field)
+        schema = self.schema(model)
+        run_id = run_started.strftime('%Y%m%dT%H%M%S')
+
+        files = []
+        rows = []
+        partition = writer = spool = None
+        high_water = None
+        # Rows are read from a healthy replica (lag under REPLICA_MAX_LAG_SECONDS,
+        # well inside the safety lag); the watermark stays on the primary
+        with use_replica():
+            for row in queryset.order_by(watermark_field, 'pk').values_list(
+                *[field.attname for field in fields]
+            ).iterator(chunk_size=self.chunk_size):
+                row_partition = _partition_date(row[watermark_index])
+                if row_partition != partition:
+                    if writer is not None:
+                        self._write_rows(writer, schema, rows)
+                        files.append(self._finish(name, partition, run_id, writer, spool))
+                    partition, rows = row_partition, []
+                    spool = tempfile.TemporaryFile()
+                    writer = self.pq.ParquetWriter(spool, schema, compression=self.compression)
+
+                if json_columns:
+                    row = [
+                        json.dumps(value) if index in json_columns and value is not None else value
+                        for index, value in enumerate(row)
+                    ]
+                rows.append(row)
+                high_water = row[watermark_index]
+                if len(rows) >= self.chunk_size:
+                    self._write_rows(writer, schema, rows)
+                    rows = []
+
+        if writer is not None:
+            self._write_rows(writer, schema, rows)
+            files.append(self._finish(name, partition, run_id, writer, spool))
+
+        if high_water is not None:
+            watermark.value = high_water
+            watermark.save()
+
+        return {
+            'table': name,
+            'files': files,
+            'watermark': high_water.isoformat() if high_water else None
+        }
+
+    def _write_rows(self, writer, schema, rows):
+        if not rows:
+            return
+        columns = list(zip(*rows))
+        writer.write_table(self.pa.Table.from_arrays(
+            [self.pa.array(column, type=field.type) for column, field in zip(columns, schema)],
+            schema=schema
+        ))
+
+    def _finish(self, name, partition, run_id, writer, spool):
+        writer.close()
+        spool.seek(0)
+        path = f'{self.prefix}/{name}/dt={partition.isoformat()}/part-{run_id}.parquet'
+        saved = self.storage.save(path, File(spool, name=path))
+        spool.close()
+        return saved
+
+    def export(self, tables=None, full=False):
+        run_started = timezone.now()
+        return [
+            self.export_table(name, run_started, full=full)
+            for name in (tables or EXPORT_TABLES)
+        ]
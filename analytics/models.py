@@ -0,0 +1,63 @@
+from django.db import models
+from users.models import User
+from appointments.models import Appointment
+from billing.models import Invoice
+
+class DailyPatientRollup(models.Model):
+    """New patient registrations per day"""
+    date = models.DateField(unique=True)
+    new_patients = models.PositiveIntegerField(default=0)
+    updated_at = models.DateTimeField(auto_now=True)
+
+class DailyAppointmentRollup(models.Model):
+    """Appointment counts per day, doctor and status"""
+    date = models.DateField()
+    doctor = models.ForeignKey(User, on_delete=models.CASCADE)
+    status = models.CharField(
+        max_length=20,
+        choices=Appointment.Status.choices
+    )
+    count = models.PositiveIntegerField(default=0)
+    updated_at = models.DateTimeField(auto_now=True)
+
+    class Meta:
+        unique_together = ['date', 'doctor', 'status']
+        indexes = [
+            models.Index(fields=['date', 'status'])
+        ]
+
+class DailyInvoiceRollup(models.Model):
+    """Invoice counts and amounts per day and payment status"""
+    date = models.DateField()
+    status = models.CharField(
+        max_length=20,
+        choices=Invoice.Status.choices
+    )
+    invoice_count = models.PositiveIntegerField(default=0)
+    total_amount = models.DecimalField(max_digits=14, decimal_places=2, default=0)
+    updated_at = models.DateTimeField(auto_now=True)
+
+    class Meta:
+        unique_together = ['date', 'status']
+
+class StaleRollupDate(models.Model):
+    """Rollup day left stale by a rescheduled or deleted source row"""
+    date = models.DateField()
+    recorded_at = models.DateTimeField(auto_now_add=True)
+
+class AnalyticsSnapshot(models.Model):
+    """Precomputed distribution metrics (quantiles, histograms) for a period"""
+    metric = models.CharField(max_length=50)
+    period_start = models.DateField()
+    period_end = models.DateField()
+    payload = models.JSONField(default=dict)
+    computed_at = models.DateTimeField(auto_now=True)
+
+    class Meta:
+        unique_together = ['metric', 'period_start', 'period_end']
+
+class ExportWatermark(models.Model):
+    """Highest change timestamp already exported per warehouse table"""
+    table = models.CharField(max_length=50, unique=True)
+    value = models.DateTimeField(null=True)
+    updated_at = models.DateTimeField(auto_now=True)
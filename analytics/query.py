@@ -0,0 +1,97 @@
+from django.db.models import Count, Model, Q
+
+class Measure:
+    """An aggregate function applied to a field, optionally pre-filtered"""
+    def __init__(self, function, field='pk', filter=None, default=0):
+        self.function = function
+        self.field = field
+        self.filter = filter
+        self.default = default
+
+    def build(self, condition=None):
+        """Return the aggregate expression, narrowed by an extra condition"""
+        if self.filter is not None and condition is not None:
+            condition = self.filter & condition
+        elif condition is None:
+            condition = self.filter
+        if self.function.empty_result_set_value is not None:
+            # Count already returns 0 for empty input and rejects default=
+            return self.function(self.field, filter=condition)
+        return self.function(self.field, filter=condition, default=self.default)
+
+class BucketSet:
+    """Named buckets, each an arbitrary condition evaluated by one measure"""
+    def __init__(self, name, buckets, measure=None):
+        self.name = name
+        self.buckets = buckets
+        self.measure = measure or Measure(Count)
+
+    def aliases(self):
+        return {
+            f'{self.name}_{index}': label
+            for index, label in enumerate(self.buckets)
+        }
+
+    def compile(self):
+        return {
+            alias: self.measure.build(self.buckets[label])
+            for alias, label in self.aliases().items()
+        }
+
+class Dashboard:
+    """Compile a dashboard definition into a single SQL statement.
+
+    Bucket conditions become filtered aggregates, which PostgreSQL runs as
+    FILTER (WHERE ...) and other backends as CASE WHEN, so measures and
+    buckets are all computed in one pass over the source table.
+    """
+    def __init__(self, source, measures=None, buckets=(), filters=None, group_by=()):
+        self.source = source
+        self.measures = measures or {}
+        self.buckets = buckets
+        self.filters = filters
+        self.group_by = group_by
+
+    def queryset(self):
+        if isinstance(self.source, type) and issubclass(self.source, Model):
+            queryset = self.source._default_manager.all()
+        else:
+            queryset = self.source.all()
+
+        if isinstance(self.filters, Q):
+            queryset = queryset.filter(self.filters)
+        elif self.filters:
+            queryset = queryset.filter(**self.filters)
+        return queryset
+
+    def compile(self):
+        """Return every aggregate expression keyed by its SQL alias"""
+        aggregates = {
+            name: measure.build()
+            for name, measure in self.measures.items()
+        }
+        for bucket_set in self.buckets:
+            aggregates.update(bucket_set.compile())
+        return aggregates
+
+    def run(self):
+        """Execute the dashboard; grouped dashboards return one dict per group"""
+        aggregates = self.compile()
+        queryset = self.queryset()
+
+        if self.group_by:
+            rows = queryset.values(*self.group_by).annotate(
+                **aggregates
+            ).order_by(*self.group_by)
+            return [self._unpack(row) for row in rows]
+        return self._unpack(queryset.aggregate(**aggregates))
+
+    def _unpack(self, row):
+        result = {field: row[field] for field in self.group_by}
+        result.update({name: row[name] for name in self.measures})
+        for bucket_set in self.buckets:
+            result[bucket_set.name] = {
+                label: row[alias]
+                for alias, label in bucket_set.aliases().items()
+            }
+        return result
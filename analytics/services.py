@@ -0,0 +1,133 @@
+from datetime import date, datetime, timedelta
+from django.db import transaction
+from django.db.models import Count, Sum
+from django.db.models.functions import TruncDate
+from ehs_backend.db_router import use_replica
+from patients.models import Patient
+from appointments.models import Appointment
+from billing.models import Invoice
+from .models import DailyPatientRollup, DailyAppointmentRollup, DailyInvoiceRollup, StaleRollupDate
+
+def period_range(period, today=None):
+    """Return the (start_date, end_date) covered by a dashboard period"""
+    today = today or date.today()
+    if period == 'month':
+        return today - timedelta(days=30), today
+    if period == 'year':
+        return today - timedelta(days=365), today
+    return today - timedelta(days=7), today
+
+class RollupBuilder:
+    @staticmethod
+    def rebuild(start_date, end_date):
+        """Recompute all daily rollups between two dates (inclusive).
+
+        Source rows are aggregated on a read replica when one is healthy;
+        the rollups in the range are then replaced inside a single
+        transaction on the primary, so the operation is idempotent and safe
+        to re-run for any window.
+        """
+        with use_replica():
+            rollups = [
+                (DailyPatientRollup, RollupBuilder._patient_rollups(start_date, end_date)),
+                (DailyAppointmentRollup, RollupBuilder._appointment_rollups(start_date, end_date)),
+                (DailyInvoiceRollup, RollupBuilder._invoice_rollups(start_date, end_date)),
+            ]
+        with transaction.atomic():
+            for model, rows in rollups:
+                model.objects.filter(date__range=(start_date, end_date)).delete()
+                model.objects.bulk_create(rows)
+
+    @staticmethod
+    def _patient_rollups(start_date, end_date):
+        rows = Patient.objects.filter(
+            created_at__date__range=(start_date, end_date)
+        ).annotate(
+            day=TruncDate('created_at')
+        ).values('day').annotate(count=Count('id')).order_by()
+
+        return [
+            DailyPatientRollup(date=row['day'], new_patients=row['count'])
+            for row in rows
+        ]
+
+    @staticmethod
+    def _appointment_rollups(start_date, end_date):
+        rows = Appointment.objects.filter(
+            date__range=(start_date, end_date)
+        ).values('date', 'doctor_id', 'status').annotate(count=Count('id')).order_by()
+
+        return [
+            DailyAppointmentRollup(
+                date=row['date'],
+                doctor_id=row['doctor_id'],
+                status=row['status'],
+                count=row['count']
+            )
+            for row in rows
+        ]
+
+    @staticmethod
+    def _invoice_rollups(start_date, end_date):
+        rows = Invoice.objects.filter(
+            created_at__date__range=(start_date, end_date)
+        ).annotate(
+            day=TruncDate('created_at')
+        ).values('day', 'status').annotate(
+            count=Count('id'),
+            total=Sum('total_amount')
+        ).order_by()
+
+        return [
+            DailyInvoiceRollup(
+                date=row['day'],
+                status=row['status'],
+                invoice_count=row['count'],
+                total_amount=row['total'] or 0
+            )
+            for row in rows
+        ]
+
+    @staticmethod
+    def changed_dates(since):
+        """Rollup dates of invoices and appointments modified since `since`.
+
+        Rows are rolled up by creation (invoices) or appointment date, so a
+        late status change, such as an old invoice being paid, lands on a
+        day outside any trailing refresh window.
+        """
+        with use_replica():
+            dates = set(
+                Invoice.objects.filter(updated_at__gte=since).annotate(
+                    day=TruncDate('created_at')
+                ).values_list('day', flat=True).distinct()
+            )
+            dates.update(
+                Appointment.objects.filter(updated_at__gte=since).values_list('date', flat=True).distinct()
+            )
+        return dates
+
+    @staticmethod
+    def stale_dates(recorded_before):
+        """Queued (id, date) pairs of days left stale by reschedules and deletes.
+
+        Only entries recorded before `recorded_before` are returned, so the
+        change behind each one has reached any replica the rebuild reads.
+        """
+        return list(
+            StaleRollupDate.objects.filter(recorded_at__lte=recorded_before).values_list('pk', 'date')
+        )
+
+    @staticmethod
+    def earliest_date():
+        """Oldest date that has source data, or None for an empty database"""
+        candidates = [
+            Patient.objects.order_by('created_at').values_list('created_at', flat=True).first(),
+            Appointment.objects.order_by('date').values_list('date', flat=True).first(),
+            Invoice.objects.order_by('created_at').values_list('created_at', flat=True).first(),
+        ]
+        dates = [
+            value.date() if isinstance(value, datetime) else value
+            for value in candidates if value is not None
+        ]
+        return min(dates) if dates else None
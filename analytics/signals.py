@@ -0,0 +1,33 @@
+from django.db.models.signals import post_delete, post_init, post_save
+from django.dispatch import receiver
+from django.utils import timezone
+from appointments.models import Appointment
+from billing.models import Invoice
+from patients.models import Patient
+from .models import StaleRollupDate
+
+def mark_stale(day):
+    """Queue a rollup day for refresh_analytics_rollups to rebuild"""
+    StaleRollupDate.objects.create(date=day)
+
+@receiver(post_init, sender=Appointment)
+def appointment_loaded(sender, instance, **kwargs):
+    # __dict__ avoids loading a deferred date just to remember it
+    instance._rollup_date = instance.__dict__.get('date')
+
+@receiver(post_save, sender=Appointment)
+def appointment_saved(sender, instance, created, **kwargs):
+    """A rescheduled appointment leaves its old day's rollup behind"""
+    if not created and instance._rollup_date not in (None, instance.date):
+        mark_stale(instance._rollup_date)
+    instance._rollup_date = instance.date
+
+@receiver(post_delete, sender=Appointment)
+def appointment_deleted(sender, instance, **kwargs):
+    mark_stale(instance.date)
+
+@receiver(post_delete, sender=Invoice)
+@receiver(post_delete, sender=Patient)
+def rollup_source_deleted(sender, instance, **kwargs):
+    """Invoices and patients are rolled up on their creation day"""
+    mark_stale(timezone.localdate(instance.created_at))
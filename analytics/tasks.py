@@ -1,51 +1,101 @@
-from celery import shared_task
-from django.db.models import Count, Avg
+from ehs_backend.celery import app
+from django.conf import settings
 from django.utils import timezone
-from datetime import timedelta
-from patients.models import Patient
-from appointments.models import Appointment
-from billing.models import Invoice
+from datetime import date, timedelta
+from . import dashboards
+from .compute import CohortAnalytics
+from .export import SnapshotExporter
+from .models import StaleRollupDate
+from .services import RollupBuilder
 
-@shared_task
+def _as_date(value):
+    """Celery serializes dates as ISO strings; accept either form"""
+    if value is None or isinstance(value, date):
+        return value
+    return date.fromisoformat(value)
+
+@app.task
+def refresh_analytics_rollups(days=None):
+    """Recompute the trailing window and older days changed or vacated since the last run"""
+    days = days or settings.ANALYTICS_ROLLUP_REFRESH_DAYS
+    now = timezone.now()
+    end_date = now.date()
+    start_date = end_date - timedelta(days=days)
+    stale = RollupBuilder.stale_dates(now - timedelta(seconds=settings.REPLICA_MAX_LAG_SECONDS))
+    RollupBuilder.rebuild(start_date, end_date)
+    changed = RollupBuilder.changed_dates(now - timedelta(days=days))
+    changed = sorted(day for day in changed.union(day for _, day in stale) if day < start_date)
+    for day in changed:
+        RollupBuilder.rebuild(day, day)
+    StaleRollupDate.objects.filter(pk__in=[pk for pk, _ in stale]).delete()
+    return {
+        'start_date': start_date.isoformat(),
+        'end_date': end_date.isoformat(),
+        'changed_dates': [day.isoformat() for day in changed],
+    }
+
+@app.task
+def backfill_analytics_rollups(start_date=None, end_date=None, chunk_days=31):
+    """Rebuild rollups for a historical range, one chunk per transaction"""
+    start_date = _as_date(start_date) or RollupBuilder.earliest_date()
+    end_date = _as_date(end_date) or timezone.now().date()
+    if start_date is None:
+        return {'chunks': 0}
+
+    chunks = 0
+    chunk_start = start_date
+    while chunk_start <= end_date:
+        chunk_end = min(chunk_start + timedelta(days=chunk_days - 1), end_date)
+        RollupBuilder.rebuild(chunk_start, chunk_end)
+        chunk_start = chunk_end + timedelta(days=1)
+        chunks += 1
+
+    return {
+        'start_date': start_date.isoformat(),
+        'end_date': end_date.isoformat(),
+        'chunks': chunks
+    }
+
+@app.task
+def compute_cohort_analytics(days=30, end_date=None):
+    """Compute age, revenue and doctor utilisation distributions for a period"""
+    end_date = _as_date(end_date) or timezone.now().date()
+    start_date = end_date - timedelta(days=days)
+    return CohortAnalytics.compute(start_date, end_date)
+
+@app.task
 def generate_daily_analytics():
     """Generate daily analytics report"""
     today = timezone.now().date()
     yesterday = today - timedelta(days=1)
-    
-    analytics = {
-        'new_patients': Patient.objects.filter(created_at__date=yesterday).count(),
-        'appointments': Appointment.objects.filter(date=yesterday).count(),
-        'revenue': Invoice.objects.filter(
-            created_at__date=yesterday,
-            status=Invoice.Status.PAID
-        ).aggregate(total=Sum('total_amount'))['total'] or 0,
-    }
-    
+    RollupBuilder.rebuild(yesterday, today)
+
+    analytics = {}
+    for dashboard in dashboards.daily_activity(yesterday).values():
+        analytics.update(dashboard.run())
+
     return analytics
 
-@shared_task
+@app.task
 def generate_monthly_report():
     """Generate comprehensive monthly analytics report"""
     end_date = timezone.now().date()
     start_date = end_date - timedelta(days=30)
-    
+
+    rows = dashboards.appointment_breakdown(start_date, end_date).run()
     report = {
-        'patient_demographics': Patient.objects.filter(
-            created_at__range=[start_date, end_date]
-        ).aggregate(
-            total=Count('id'),
-            avg_age=Avg('date_of_birth')
-        ),
-        'appointment_stats': Appointment.objects.filter(
-            date__range=[start_date, end_date]
-        ).values('status').annotate(count=Count('id')),
-        'financial_summary': Invoice.objects.filter(
-            created_at__range=[start_date, end_date]
-        ).aggregate(
-            total_revenue=Sum('total_amount'),
-            paid_amount=Sum('total_amount', filter=Q(status=Invoice.Status.PAID)),
-            pending_amount=Sum('total_amount', filter=Q(status=Invoice.Status.PENDING))
-        )
+        'patient_demographics': dashboards.patient_demographics(
+            end_date,
+            filters={'created_at__date__range': (start_date, end_date)}
+        ).run(),
+        'appointment_stats': dashboards.summarize_appointments(rows)['status_distribution'],
+        'financial_summary': dashboards.financial_summary(start_date, end_date).run(),
+        'cohort': CohortAnalytics.compute(start_date, end_date)
     }
-    
-    return report
\ No newline at end of file
+
+    return report
+
+@app.task
+def export_warehouse_snapshot(tables=None, full=False):
+    """Export rows changed since the last run as date-partitioned Parquet"""
+    return SnapshotExporter().export(tables=tables, full=full)
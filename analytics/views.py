@@ -1,100 +1,50 @@
-from rest_framework import viewsets
+from rest_framework import viewsets, permissions
 from rest_framework.decorators import action
 from rest_framework.response import Response
-from django.db.models import Count, Sum, Avg
-from django.db.models.functions import TruncMonth
-from patients.models import Patient
-from appointments.models import Appointment
-from billing.models import Invoice
-from datetime import datetime, timedelta
+from django.utils import timezone
+from ehs_backend.cache import bucketed_cache_response, response_cache_stats
+from ehs_backend.db_router import ReplicaReadMixin
+from . import dashboards
+from .services import period_range
+
+CACHED_ACTIONS = ['patient_demographics', 'financial_summary', 'appointment_statistics']
+
+class AnalyticsViewSet(ReplicaReadMixin, viewsets.ViewSet):
+    replica_actions = CACHED_ACTIONS
 
-class AnalyticsViewSet(viewsets.ViewSet):
     @action(detail=False, methods=['get'])
+    @bucketed_cache_response(bucket_seconds=900)
     def patient_demographics(self, request):
-        # Age distribution
-        current_year = datetime.now().year
-        age_ranges = {
-            '0-18': (0, 18),
-            '19-30': (19, 30),
-            '31-50': (31, 50),
-            '51+': (51, 150)
-        }
-        
-        demographics = {
-            'age_distribution': {},
-            'gender_distribution': {},
-            'blood_groups': {},
-            'total_patients': Patient.objects.count()
-        }
-        
-        for range_name, (min_age, max_age) in age_ranges.items():
-            min_date = datetime(current_year - max_age, 1, 1)
-            max_date = datetime(current_year - min_age, 12, 31)
-            count = Patient.objects.filter(
-                date_of_birth__range=(min_date, max_date)
-            ).count()
-            demographics['age_distribution'][range_name] = count
-            
+        demographics = dashboards.patient_demographics(timezone.now().date()).run()
+        demographics['gender_distribution'] = {}
         return Response(demographics)
 
     @action(detail=False, methods=['get'])
+    @bucketed_cache_response(bucket_seconds=300)
     def financial_summary(self, request):
         period = request.query_params.get('period', 'month')
-        end_date = datetime.now()
-        
-        if period == 'month':
-            start_date = end_date - timedelta(days=30)
-        elif period == 'year':
-            start_date = end_date - timedelta(days=365)
-        else:
-            start_date = end_date - timedelta(days=7)
-            
-        invoices = Invoice.objects.filter(
-            created_at__range=(start_date, end_date)
+        start_date, end_date = period_range(period)
+
+        summary = dashboards.financial_summary(start_date, end_date).run()
+        invoice_count = summary['invoice_count']
+        summary['average_invoice_amount'] = (
+            summary['total_revenue'] / invoice_count if invoice_count else 0
         )
-        
-        summary = {
-            'total_revenue': invoices.aggregate(Sum('total_amount'))['total_amount__sum'] or 0,
-            'paid_amount': invoices.filter(status=Invoice.Status.PAID).aggregate(
-                Sum('total_amount')
-            )['total_amount__sum'] or 0,
-            'pending_amount': invoices.filter(status=Invoice.Status.PENDING).aggregate(
-                Sum('total_amount')
-            )['total_amount__sum'] or 0,
-            'invoice_count': invoices.count(),
-            'average_invoice_amount': invoices.aggregate(
-                Avg('total_amount')
-            )['total_amount__avg'] or 0
-        }
-        
+
         return Response(summary)
 
     @action(detail=False, methods=['get'])
+    @bucketed_cache_response(bucket_seconds=300)
     def appointment_statistics(self, request):
         period = request.query_params.get('period', 'month')
-        end_date = datetime.now()
-        
-        if period == 'month':
-            start_date = end_date - timedelta(days=30)
-        else:
-            start_date = end_date - timedelta(days=7)
-            
-        appointments = Appointment.objects.filter(
-            date__range=(start_date, end_date)
-        )
-        
-        stats = {
-            'total_appointments': appointments.count(),
-            'status_distribution': appointments.values('status').annotate(
-                count=Count('id')
-            ),
-            'daily_distribution': appointments.values('date').annotate(
-                count=Count('id')
-            ),
-            'doctor_distribution': appointments.values(
-                'doctor__first_name',
-                'doctor__last_name'
-            ).annotate(count=Count('id'))
-        }
-        
-        return Response(stats)
\ No newline at end of file
+        if period != 'month':
+            period = 'week'
+        start_date, end_date = period_range(period)
+
+        rows = dashboards.appointment_breakdown(start_date, end_date).run()
+        return Response(dashboards.summarize_appointments(rows))
+
+    @action(detail=False, methods=['get'], permission_classes=[permissions.IsAdminUser])
+    def cache_stats(self, request):
+        """Response cache hit/miss counters for the analytics endpoints"""
+        return Response(response_cache_stats(CACHED_ACTIONS))
@@ -0,0 +1,12 @@
+from ehs_backend.cache import track_cache_tags
+from .models import Appointment
+
+def appointment_tags(pk, values):
+    tags = [f"appointment:{pk}"]
+    if values['doctor_id'] is not None:
+        tags.append(f"doctor:{values['doctor_id']}:schedule")
+    if values['patient_id'] is not None:
+        tags.append(f"patient:{values['patient_id']}:appointments")
+    return tags
+
+track_cache_tags(Appointment, ('doctor_id', 'patient_id'), appointment_tags)
@@ -1,11 +1,11 @@
-from celery import shared_task
+from ehs_backend.celery import app
 from django.utils import timezone
 from datetime import timedelta
 from django.core.mail import send_mail
 from django.conf import settings
 from .models import Appointment
 
-@shared_task
+@app.task
 def send_appointment_reminders():
     """Send reminder emails for upcoming appointments"""
     tomorrow = timezone.now().date() + timedelta(days=1)
@@ -23,7 +23,7 @@ def send_appointment_reminders():
             fail_silently=True
         )
 
-@shared_task
+@app.task
 def cleanup_cancelled_appointments():
     """Archive or clean up old cancelled appointments"""
     thirty_days_ago = timezone.now().date() - timedelta(days=30)
@@ -2,13 +2,18 @@ from rest_framework import viewsets, status
 from rest_framework.decorators import action
 from rest_framework.response import Response
 from django.db.models import Q
+from django.conf import settings
 from datetime import datetime, timedelta
+from ehs_backend.cache import cache_key_generator, get_or_set_tagged
+from ehs_backend.db_router import ReplicaReadMixin
+from ehs_backend.fastjson import json_safe
 from .models import Appointment
 from .serializers import AppointmentSerializer, ScheduleSerializer
 
-class AppointmentViewSet(viewsets.ModelViewSet):
+class AppointmentViewSet(ReplicaReadMixin, viewsets.ModelViewSet):
     queryset = Appointment.objects.all()
     serializer_class = AppointmentSerializer
+    replica_actions = ('list', 'date_range', 'doctor_schedule')
 
     def create(self, request, *args, **kwargs):
         serializer = self.get_serializer(data=request.data)
@@ -57,13 +62,24 @@ class AppointmentViewSet(viewsets.ModelViewSet):
             datetime.now().date() + timedelta(days=7)
         )
         
-        appointments = Appointment.objects.filter(
-            doctor_id=doctor_id,
-            date__range=[start_date, end_date]
+
+        def schedule():
+            appointments = Appointment.objects.filter(
+                doctor_id=doctor_id,
+                date__range=[start_date, end_date]
+            )
+            return ScheduleSerializer(appointments, many=True).data
+
+        if not doctor_id:
+            return Response(schedule())
+        # Invalidated by appointment signals whenever this doctor's bookings change
+        data = get_or_set_tagged(
+            f"schedule:{cache_key_generator(doctor_id, start_date, end_date)}",
+            [f"doctor:{doctor_id}:schedule"],
+            lambda: json_safe(schedule()),
+            timeout=settings.SCHEDULE_CACHE_TIMEOUT
         )
-        
-        serializer = ScheduleSerializer(appointments, many=True)
-        return Response(serializer.data)
+        return Response(data)
 
     @action(detail=False, methods=['get'])
     def date_range(self, request):
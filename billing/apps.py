@@ -0,0 +1,7 @@
+from django.apps import AppConfig
+
+class BillingConfig(AppConfig):
+    name = 'billing'
+
+    def ready(self):
+        from . import signals  # noqa: F401
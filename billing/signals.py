@@ -0,0 +1,10 @@
+from ehs_backend.cache import track_cache_tags
+from .models import Invoice
+
+def invoice_tags(pk, values):
+    tags = [f"invoice:{pk}"]
+    if values['patient_id'] is not None:
+        tags.append(f"patient:{values['patient_id']}:invoices")
+    return tags
+
+track_cache_tags(Invoice, ('patient_id',), invoice_tags)
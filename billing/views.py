@@ -3,8 +3,9 @@ from rest_framework.decorators import action
 from rest_framework.response import Response
 from .models import Invoice, Payment
 from .serializers import InvoiceSerializer, PaymentSerializer
+from ehs_backend.db_router import ReplicaReadMixin
 
-class InvoiceViewSet(viewsets.ModelViewSet):
+class InvoiceViewSet(ReplicaReadMixin, viewsets.ModelViewSet):
     queryset = Invoice.objects.all()
     serializer_class = InvoiceSerializer
 
@@ -30,7 +31,7 @@ class InvoiceViewSet(viewsets.ModelViewSet):
         serializer = PaymentSerializer(payments, many=True)
         return Response(serializer.data)
 
-class PaymentViewSet(viewsets.ModelViewSet):
+class PaymentViewSet(ReplicaReadMixin, viewsets.ModelViewSet):
     queryset = Payment.objects.all()
     serializer_class = PaymentSerializer
 
@@ -2,6 +2,8 @@ import pytest
 from rest_framework.test import APIClient
 from django.contrib.auth import get_user_model
 
+pytest_plugins = ['ehs_backend.query_budget']
+
 @pytest.fixture
 def api_client():
     return APIClient()
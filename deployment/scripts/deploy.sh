@@ -24,13 +24,10 @@ aws ecs update-service \
     --service ehs-api-${ENVIRONMENT} \
     --force-new-deployment
 
-# Update Celery workers
-aws ecs update-service \
-    --cluster ehs-cluster-${ENVIRONMENT} \
-    --service ehs-celery-high-${ENVIRONMENT} \
-    --force-new-deployment
-
-aws ecs update-service \
-    --cluster ehs-cluster-${ENVIRONMENT} \
-    --service ehs-celery-default-${ENVIRONMENT} \
-    --force-new-deployment
\ No newline at end of file
+# Update Celery workers, one service per worker profile
+for PROFILE in images notifications analytics default; do
+    aws ecs update-service \
+        --cluster ehs-cluster-${ENVIRONMENT} \
+        --service ehs-celery-${PROFILE}-${ENVIRONMENT} \
+        --force-new-deployment
+done
@@ -0,0 +1,152 @@
+#!/usr/bin/env python
+"""Compare API throughput of the gunicorn serving modes on the same endpoints.
+
+Starts gunicorn once per mode (see gunicorn.conf.py), drives the given
+endpoints with concurrent keep-alive clients for a fixed duration and
+prints requests/sec and latency percentiles per mode.
+
+    python deployment/scripts/loadtest.py --token "$ACCESS_TOKEN" \\
+        --endpoint /api/patients/ --endpoint /api/appointments/ --json
+"""
+import argparse
+import http.client
+import json
+import os
+import signal
+import subprocess
+import sys
+import threading
+import time
+
+ROOT = os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+# Mode name -> environment applied on top of the current one
+MODES = {
+    'sync': {'SERVER_MODE': 'wsgi', 'GUNICORN_WORKER_CLASS': 'sync'},
+    'gthread': {'SERVER_MODE': 'wsgi', 'GUNICORN_WORKER_CLASS': 'gthread'},
+    'asgi': {'SERVER_MODE': 'asgi'},
+}
+
+def percentile(values, q):
+    ordered = sorted(values)
+    if not ordered:
+        return None
+    index = min(len(ordered) - 1, max(0, round(q * (len(ordered) - 1))))
+    return ordered[index]
+
+def start_server(mode, port, workers):
+    env = dict(os.environ, **MODES[mode])
+    env.update({
+        'GUNICORN_BIND': f'127.0.0.1:{port}',
+        'GUNICORN_ACCESS_LOG': '',
+    })
+    if workers:
+        env['GUNICORN_WORKERS'] = str(workers)
+    process = subprocess.Popen(
+        [sys.executable, '-m', 'gunicorn', '-c', 'gunicorn.conf.py'],
+        cwd=ROOT, env=env, stdout=subprocess.DEVNULL, stderr=subprocess.PIPE
+    )
+    deadline = time.time() + 60
+    while time.time() < deadline:
+        if process.poll() is not None:
+            raise RuntimeError(f'{mode} server exited: {process.stderr.read().decode()[-2000:]}')
+        try:
+            connection = http.client.HTTPConnection('127.0.0.1', port, timeout=1)
+            connection.request('GET', '/admin/login/')
+            connection.getresponse().read()
+            return process
+        except OSError:
+            time.sleep(0.2)
+    process.kill()
+    raise RuntimeError(f'{mode} server did not start within 60s')
+
+def stop_server(process):
+    process.send_signal(signal.SIGTERM)
+    try:
+        process.wait(timeout=30)
+    except subprocess.TimeoutExpired:
+        process.kill()
+
+def client(port, endpoints, headers, stop_at, results):
+    connection = http.client.HTTPConnection('127.0.0.1', port, timeout=30)
+    index = 0
+    while time.time() < stop_at:
+        path = endpoints[index % len(endpoints)]
+        index += 1
+        started = time.perf_counter()
+        try:
+            connection.request('GET', path, headers=headers)
+            response = connection.getresponse()
+            response.read()
+            ok = response.status < 500
+        except (OSError, http.client.HTTPException):
+            connection.close()
+            connection = http.client.HTTPConnection('127.0.0.1', port, timeout=30)
+            ok = False
+        results.append(((time.perf_counter() - started) * 1000, ok))
+
+def run_mode(mode, options):
+    process = start_server(mode, options.port, options.workers)
+    headers = {'Accept': 'application/json'}
+    if options.token:
+        headers['Authorization'] = f'Bearer {options.token}'
+    try:
+        # Warm up imports, connections and caches in every worker
+        warmup_until = time.time() + options.warmup
+        client(options.port, options.endpoint, headers, warmup_until, [])
+
+        results = []
+        stop_at = time.time() + options.duration
+        threads = [
+            threading.Thread(
+                target=client,
+                args=(options.port, options.endpoint, headers, stop_at, results)
+            )
+            for _ in range(options.concurrency)
+        ]
+        started = time.perf_counter()
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        elapsed = time.perf_counter() - started
+    finally:
+        stop_server(process)
+
+    latencies = [latency for latency, ok in results if ok]
+    return {
+        'mode': mode,
+        'requests': len(results),
+        'errors': len(results) - len(latencies),
+        'requests_per_sec': round(len(latencies) / elapsed, 1),
+        'p50_ms': round(percentile(latencies, 0.5) or 0, 2),
+        'p95_ms': round(percentile(latencies, 0.95) or 0, 2),
+        'p99_ms': round(percentile(latencies, 0.99) or 0, 2),
+    }
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--mode', action='append', choices=sorted(MODES),
+                        help='Modes to compare (default: all)')
+    parser.add_argument('--endpoint', action='append',
+                        help='Paths to request round-robin (default: /admin/login/)')
+    parser.add_argument('--token', default=os.getenv('LOADTEST_TOKEN'),
+                        help='JWT access token sent as a Bearer header')
+    parser.add_argument('--concurrency', type=int, default=32)
+    parser.add_argument('--duration', type=float, default=20.0, help='Seconds per mode')
+    parser.add_argument('--warmup', type=float, default=3.0)
+    parser.add_argument('--workers', type=int, help='Override the derived worker count')
+    parser.add_argument('--port', type=int, default=8765)
+    parser.add_argument('--json', action='store_true', help='Machine-readable output')
+    options = parser.parse_args()
+    options.endpoint = options.endpoint or ['/admin/login/']
+
+    results = [run_mode(mode, options) for mode in options.mode or MODES]
+    if options.json:
+        print(json.dumps(results, indent=2))
+        return
+    for result in results:
+        print(', '.join(f'{key}={value}' for key, value in result.items()))
+
+if __name__ == '__main__':
+    main()
@@ -12,11 +12,11 @@ resource "aws_ecs_cluster" "ehs_cluster" {
   }
 }
 
-# Celery Worker Service - High Priority
-resource "aws_ecs_service" "celery_worker_high" {
-  name            = "ehs-celery-high-${var.environment}"
+# Celery Worker Service - Images (prefork, CPU-bound)
+resource "aws_ecs_service" "celery_worker_images" {
+  name            = "ehs-celery-images-${var.environment}"
   cluster         = aws_ecs_cluster.ehs_cluster.id
-  task_definition = aws_ecs_task_definition.celery_worker_high.arn
+  task_definition = aws_ecs_task_definition.celery_worker_images.arn
   desired_count   = 2
   launch_type     = "FARGATE"
 
@@ -28,11 +28,51 @@ resource "aws_ecs_service" "celery_worker_high" {
   tags = {
     Environment = var.environment
     Project     = "EHS"
-    Component   = "celery-high"
+    Component   = "celery-images"
   }
 }
 
-# Celery Worker Service - Default Priority
+# Celery Worker Service - Notifications (threads, I/O-bound)
+resource "aws_ecs_service" "celery_worker_notifications" {
+  name            = "ehs-celery-notifications-${var.environment}"
+  cluster         = aws_ecs_cluster.ehs_cluster.id
+  task_definition = aws_ecs_task_definition.celery_worker_notifications.arn
+  desired_count   = 1
+  launch_type     = "FARGATE"
+
+  network_configuration {
+    subnets         = var.private_subnet_ids
+    security_groups = [aws_security_group.celery_sg.id]
+  }
+
+  tags = {
+    Environment = var.environment
+    Project     = "EHS"
+    Component   = "celery-notifications"
+  }
+}
+
+# Celery Worker Service - Analytics (one task at a time)
+resource "aws_ecs_service" "celery_worker_analytics" {
+  name            = "ehs-celery-analytics-${var.environment}"
+  cluster         = aws_ecs_cluster.ehs_cluster.id
+  task_definition = aws_ecs_task_definition.celery_worker_analytics.arn
+  desired_count   = 1
+  launch_type     = "FARGATE"
+
+  network_configuration {
+    subnets         = var.private_subnet_ids
+    security_groups = [aws_security_group.celery_sg.id]
+  }
+
+  tags = {
+    Environment = var.environment
+    Project     = "EHS"
+    Component   = "celery-analytics"
+  }
+}
+
+# Celery Worker Service - Default
 resource "aws_ecs_service" "celery_worker_default" {
   name            = "ehs-celery-default-${var.environment}"
   cluster         = aws_ecs_cluster.ehs_cluster.id
@@ -4,6 +4,12 @@ output "rds_endpoint" {
   sensitive   = true
 }
 
+output "rds_replica_hosts" {
+  description = "Comma-separated replica addresses for DB_REPLICA_HOSTS"
+  value       = join(",", aws_db_instance.ehs_db_replica[*].address)
+  sensitive   = true
+}
+
 output "s3_bucket_name" {
   description = "Name of the S3 bucket"
   value       = aws_s3_bucket.ehs_storage.id
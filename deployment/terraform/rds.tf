@@ -29,6 +29,27 @@ resource "aws_db_instance" "ehs_db" {
   }
 }
 
+# Read replicas for analytics, exports and listings (DB_REPLICA_HOSTS)
+resource "aws_db_instance" "ehs_db_replica" {
+  count               = var.db_replica_count
+  identifier          = "ehs-db-${var.environment}-replica-${count.index + 1}"
+  replicate_source_db = aws_db_instance.ehs_db.identifier
+  instance_class      = var.db_replica_instance_class
+
+  vpc_security_group_ids = [aws_security_group.rds_sg.id]
+
+  backup_retention_period = 0
+  skip_final_snapshot     = true
+
+  performance_insights_enabled = true
+
+  tags = {
+    Environment = var.environment
+    Project     = "EHS"
+    Role        = "replica"
+  }
+}
+
 resource "aws_db_subnet_group" "rds_subnet_group" {
   name       = "ehs-db-subnet-group-${var.environment}"
   subnet_ids = var.private_subnet_ids
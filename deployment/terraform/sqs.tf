@@ -1,44 +1,63 @@
-resource "aws_sqs_queue" "celery_queue_high_priority" {
-  name                      = "ehs-high-priority-${var.environment}"
+# One queue per workload (ehs_backend.celery_topology). Celery reads them
+# with SQS_QUEUE_PREFIX="${environment}-". The visibility timeout must
+# outlast the queue's task time_limit, or acks_late tasks still running
+# are delivered again
+resource "aws_sqs_queue" "celery_queue_images" {
+  name                      = "${var.environment}-ehs-images"
   delay_seconds             = 0
   max_message_size         = 262144
   message_retention_seconds = 345600
   receive_wait_time_seconds = 20
-  visibility_timeout_seconds = 3600
+  visibility_timeout_seconds = 600
 
   tags = {
     Environment = var.environment
     Project     = "EHS"
-    Priority    = "high"
+    Workload    = "images"
   }
 }
 
-resource "aws_sqs_queue" "celery_queue_default" {
-  name                      = "ehs-default-${var.environment}"
+resource "aws_sqs_queue" "celery_queue_notifications" {
+  name                      = "${var.environment}-ehs-notifications"
   delay_seconds             = 0
   max_message_size         = 262144
   message_retention_seconds = 345600
   receive_wait_time_seconds = 20
-  visibility_timeout_seconds = 3600
+  visibility_timeout_seconds = 360
 
   tags = {
     Environment = var.environment
     Project     = "EHS"
-    Priority    = "default"
+    Workload    = "notifications"
   }
 }
 
-resource "aws_sqs_queue" "celery_queue_low_priority" {
-  name                      = "ehs-low-priority-${var.environment}"
+resource "aws_sqs_queue" "celery_queue_analytics" {
+  name                      = "${var.environment}-ehs-analytics"
+  delay_seconds             = 0
+  max_message_size         = 262144
+  message_retention_seconds = 345600
+  receive_wait_time_seconds = 20
+  visibility_timeout_seconds = 11100
+
+  tags = {
+    Environment = var.environment
+    Project     = "EHS"
+    Workload    = "analytics"
+  }
+}
+
+resource "aws_sqs_queue" "celery_queue_default" {
+  name                      = "${var.environment}-ehs-default"
   delay_seconds             = 0
   max_message_size         = 262144
   message_retention_seconds = 345600
   receive_wait_time_seconds = 20
-  visibility_timeout_seconds = 3600
+  visibility_timeout_seconds = 3900
 
   tags = {
     Environment = var.environment
     Project     = "EHS"
-    Priority    = "low"
+    Workload    = "default"
   }
 }
\ No newline at end of file
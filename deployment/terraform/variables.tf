@@ -33,4 +33,16 @@ variable "db_password" {
 variable "allowed_cidr_blocks" {
   description = "List of CIDR blocks allowed to access the resources"
   type        = list(string)
+}
+
+variable "db_replica_count" {
+  description = "Number of RDS read replicas"
+  type        = number
+  default     = 1
+}
+
+variable "db_replica_instance_class" {
+  description = "Instance class of the RDS read replicas"
+  type        = string
+  default     = "db.t3.micro"
 }
\ No newline at end of file
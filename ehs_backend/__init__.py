@@ -1,3 +1,11 @@
-from .celery import app as celery_app
+# The Celery app is loaded on first use rather than with the package: it
+# pulls in kombu and the broker transports (~150ms), which manage.py
+# commands such as migrate never need. Task modules import it themselves.
 
-__all__ = ('celery_app',)
\ No newline at end of file
+def __getattr__(name):
+    if name == 'celery_app':
+        from .celery import app
+        return app
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+
+__all__ = ('celery_app',)
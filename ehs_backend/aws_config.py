@@ -1,69 +1,45 @@
 from typing import Dict, Any
+from celery.schedules import crontab
 import os
+from .cache_topology import build_caches
+from .celery_topology import build_celery_config
 
 class AWSConfig:
     @staticmethod
     def get_elasticache_config() -> Dict[str, Any]:
         """ElastiCache configuration for Redis"""
         return {
-            'CACHES': {
-                'default': {
-                    'BACKEND': 'django_redis.cache.RedisCache',
-                    'LOCATION': os.getenv('ELASTICACHE_URL'),
-                    'OPTIONS': {
-                        'CLIENT_CLASS': 'django_redis.client.DefaultClient',
-                        'CONNECTION_POOL_CLASS': 'redis.connection.ConnectionPool',
-                        'CONNECTION_POOL_CLASS_KWARGS': {
-                            'max_connections': 50,
-                            'timeout': 20,
-                            'retry_on_timeout': True,
-                            'socket_keepalive': True,
-                            'socket_connect_timeout': 30,
-                        },
-                        'SERIALIZER_CLASS': 'django_redis.serializers.JSONSerializer',
-                        'COMPRESSOR_CLASS': 'django_redis.compressors.zlib.ZlibCompressor',
-                        'MASTER_CACHE': os.getenv('ELASTICACHE_URL'),
-                    },
-                    'KEY_PREFIX': 'ehs',
-                    'TIMEOUT': 300,  # 5 minutes default
-                }
-            },
+            # Per-alias Redis databases and pools, see ehs_backend.cache_topology
+            'CACHES': build_caches(os.getenv('ELASTICACHE_URL')),
             'SESSION_ENGINE': 'django.contrib.sessions.backends.cache',
-            'SESSION_CACHE_ALIAS': 'default',
+            'SESSION_CACHE_ALIAS': 'sessions',
         }
 
     @staticmethod
     def get_celery_config() -> Dict[str, Any]:
         """Celery configuration for AWS"""
-        return {
-            'CELERY_BROKER_URL': os.getenv('SQS_URL'),
-            'CELERY_BROKER_TRANSPORT': 'sqs',
-            'CELERY_BROKER_TRANSPORT_OPTIONS': {
-                'region': os.getenv('AWS_REGION', 'ap-south-1'),
-                'visibility_timeout': 3600,
-                'polling_interval': 1,
-                'queue_name_prefix': 'ehs-',
-                'wait_time_seconds': 20,
-            },
-            'CELERY_RESULT_BACKEND': os.getenv('ELASTICACHE_URL'),
-            'CELERY_TASK_DEFAULT_QUEUE': 'ehs-default',
-            'CELERY_TASK_QUEUES': {
-                'ehs-high-priority': {
-                    'exchange': 'ehs-high-priority',
-                    'routing_key': 'high',
+        # Broker, per-workload queues and routes, see ehs_backend.celery_topology
+        return dict(build_celery_config(), **{
+            'beat_schedule': {
+                'refresh-analytics-rollups': {
+                    'task': 'analytics.tasks.refresh_analytics_rollups',
+                    'schedule': 15 * 60,
                 },
-                'ehs-default': {
-                    'exchange': 'ehs-default',
-                    'routing_key': 'default',
+                'generate-daily-analytics': {
+                    'task': 'analytics.tasks.generate_daily_analytics',
+                    'schedule': crontab(hour=0, minute=30),
                 },
-                'ehs-low-priority': {
-                    'exchange': 'ehs-low-priority',
-                    'routing_key': 'low',
+                'compute-cohort-analytics': {
+                    'task': 'analytics.tasks.compute_cohort_analytics',
+                    'schedule': crontab(hour=1, minute=0),
+                },
+                'export-warehouse-snapshot': {
+                    'task': 'analytics.tasks.export_warehouse_snapshot',
+                    'schedule': crontab(hour=2, minute=0),
+                },
+                'rollover-audit-log-partitions': {
+                    'task': 'users.tasks.rollover_audit_log_partitions',
+                    'schedule': crontab(hour=3, minute=0),
                 },
             },
-            'CELERY_TASK_ROUTES': {
-                'patients.tasks.process_medical_image': {'queue': 'ehs-high-priority'},
-                'appointments.tasks.send_appointment_reminders': {'queue': 'ehs-default'},
-                'analytics.tasks.*': {'queue': 'ehs-low-priority'},
-            },
-        }
\ No newline at end of file
+        })
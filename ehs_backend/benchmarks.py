@@ -0,0 +1,492 @@
+import fnmatch
+import platform
+import resource
+import subprocess
+import time
+import tracemalloc
+from contextlib import ExitStack, contextmanager
+from datetime import timedelta
+import django
+from django.conf import settings
+from django.core import mail
+from django.core.cache import caches
+from django.db import connection, transaction
+from django.test.utils import override_settings
+from django.utils import timezone
+from .profiling import install_serializer_timing, profile_queries
+
+# Benchmark name -> Benchmark, in registration order
+BENCHMARKS = {}
+KINDS = ('micro', 'macro', 'task')
+
+def percentile(values, q):
+    ordered = sorted(values)
+    if not ordered:
+        return None
+    index = min(len(ordered) - 1, max(0, round(q * (len(ordered) - 1))))
+    return ordered[index]
+
+class Benchmark:
+    """One repeatable case: `func(context)` timed, with optional per-run setup.
+
+    `rollback` runs every iteration in a transaction that is rolled back, so
+    writes leave the dataset unchanged. `max_iterations` caps slow cases.
+    """
+    def __init__(self, name, kind, func, setup=None, rollback=False, max_iterations=None):
+        self.name = name
+        self.kind = kind
+        self.func = func
+        self.setup = setup
+        self.rollback = rollback
+        self.max_iterations = max_iterations
+
+def benchmark(name, kind='macro', **options):
+    def register(func):
+        BENCHMARKS[name] = Benchmark(name, kind, func, **options)
+        return func
+    return register
+
+def select(patterns=None, kinds=None, exclude=None):
+    """Benchmarks matching any of the glob `patterns`, in registration order"""
+    selected = []
+    for name, bench in BENCHMARKS.items():
+        if patterns and not any(fnmatch.fnmatch(name, pattern) for pattern in patterns):
+            continue
+        if exclude and any(fnmatch.fnmatch(name, pattern) for pattern in exclude):
+            continue
+        if kinds and bench.kind not in kinds:
+            continue
+        selected.append(bench)
+    return selected
+
+class BenchmarkContext:
+    """Users, sample rows and an API client shared by every case of a run"""
+    def __init__(self):
+        from rest_framework.test import APIClient
+        from appointments.models import Appointment
+        from billing.models import Invoice
+        from patients.models import HL7Message, Patient
+        from users.models import User
+        from . import synthetic
+
+        self.admin = User.objects.get(username=synthetic.ADMIN_USERNAME)
+        # The busiest doctor and the patient with the longest history are the
+        # worst cases for their endpoints
+        appointment = Appointment.objects.filter(
+            doctor__username__startswith=synthetic.USER_PREFIX
+        ).order_by('doctor_id').first()
+        self.doctor = appointment.doctor
+        self.patient = Patient.objects.filter(
+            patient_id__startswith=synthetic.PATIENT_PREFIX, medicalhistory__isnull=False
+        ).order_by('id').first()
+        self.appointment = Appointment.objects.filter(
+            patient__patient_id__startswith=synthetic.PATIENT_PREFIX,
+            date__gte=timezone.now().date()
+        ).order_by('id').first() or appointment
+        self.invoice = Invoice.objects.filter(
+            invoice_number__startswith=synthetic.INVOICE_PREFIX, payment__isnull=False
+        ).order_by('id').first()
+        self.hl7_sample = list(HL7Message.objects.filter(
+            patient__patient_id__startswith=synthetic.PATIENT_PREFIX
+        ).order_by('id').values_list('id', flat=True)[:100])
+        self.today = timezone.now().date()
+        # Response payloads of the json.* cases, built once per run
+        self.payloads = {}
+
+        self.client = APIClient()
+        self.client.force_authenticate(self.admin)
+
+    def get(self, path, **params):
+        return self.client.get(path, params, HTTP_ACCEPT='application/json')
+
+    def post(self, path, data):
+        return self.client.post(path, data, format='json')
+
+    def put(self, path, data):
+        return self.client.put(path, data, format='json')
+
+def _error(outcome):
+    """An HTTP error response or a failed eager Celery result, else None"""
+    status_code = getattr(outcome, 'status_code', None)
+    if status_code is not None and status_code >= 400:
+        return f'HTTP {status_code}'
+    if hasattr(outcome, 'failed') and outcome.failed():
+        return repr(outcome.result)
+    return None
+
+@contextmanager
+def _rolled_back():
+    with transaction.atomic():
+        try:
+            yield
+        finally:
+            transaction.set_rollback(True)
+
+def clear_caches():
+    for alias in settings.CACHES:
+        caches[alias].clear()
+
+def _max_rss_kb():
+    # ru_maxrss is KB on Linux, bytes on macOS
+    rss = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    return rss // 1024 if platform.system() == 'Darwin' else rss
+
+def _call(bench, context, cold):
+    if bench.setup:
+        bench.setup(context)
+    if cold:
+        clear_caches()
+    with ExitStack() as stack:
+        if bench.rollback:
+            stack.enter_context(_rolled_back())
+        with profile_queries() as profile:
+            started = time.perf_counter()
+            try:
+                error = _error(bench.func(context))
+            except Exception as e:
+                error = f'{type(e).__name__}: {e}'
+            elapsed_ms = (time.perf_counter() - started) * 1000
+    return elapsed_ms, profile, error
+
+def run_benchmark(bench, context, iterations=20, warmup=2, cold=False):
+    """Latency percentiles, queries and memory of one benchmark.
+
+    Warmup runs are discarded. With `cold`, every cache is cleared before
+    each run, outside the timed region. Peak Python allocation is taken
+    from one extra run under tracemalloc, which would distort the timings.
+    """
+    iterations = min(iterations, bench.max_iterations or iterations)
+    rss_before = _max_rss_kb()
+    latencies, queries, db_ms, errors = [], [], [], []
+    for index in range(warmup + iterations):
+        elapsed_ms, profile, error = _call(bench, context, cold)
+        if index < warmup:
+            continue
+        latencies.append(elapsed_ms)
+        queries.append(profile.count)
+        db_ms.append(profile.db_ms)
+        if error:
+            errors.append(error)
+
+    tracemalloc.start()
+    try:
+        _call(bench, context, cold)
+        peak_bytes = tracemalloc.get_traced_memory()[1]
+    finally:
+        tracemalloc.stop()
+
+    return {
+        'name': bench.name,
+        'kind': bench.kind,
+        'iterations': iterations,
+        'p50_ms': round(percentile(latencies, 0.5), 3),
+        'p95_ms': round(percentile(latencies, 0.95), 3),
+        'p99_ms': round(percentile(latencies, 0.99), 3),
+        'mean_ms': round(sum(latencies) / len(latencies), 3),
+        'db_ms_p50': round(percentile(db_ms, 0.5), 3),
+        'queries': max(queries),
+        'peak_alloc_kb': round(peak_bytes / 1024, 1),
+        'max_rss_growth_kb': _max_rss_kb() - rss_before,
+        'errors': len(errors),
+        'error': errors[0] if errors else None,
+    }
+
+def git_revision():
+    try:
+        commit = subprocess.run(
+            ['git', 'rev-parse', 'HEAD'], cwd=settings.BASE_DIR,
+            capture_output=True, text=True, check=True
+        ).stdout.strip()
+        dirty = bool(subprocess.run(
+            ['git', 'status', '--porcelain', '--untracked-files=no'], cwd=settings.BASE_DIR,
+            capture_output=True, text=True, check=True
+        ).stdout.strip())
+    except (OSError, subprocess.CalledProcessError):
+        return {'commit': None, 'dirty': None}
+    return {'commit': commit, 'dirty': dirty}
+
+def environment():
+    """What a result depends on besides the code: versions, database and data size"""
+    from .synthetic import dataset_counts
+
+    return dict(
+        git_revision(),
+        timestamp=timezone.now().isoformat(),
+        python=platform.python_version(),
+        django=django.get_version(),
+        database=connection.vendor,
+        dataset=dataset_counts(),
+    )
+
+def run_suite(benchmarks, iterations=20, warmup=2, cold=False, progress=None):
+    install_serializer_timing()
+    context = BenchmarkContext()
+    results = []
+    for bench in benchmarks:
+        result = run_benchmark(bench, context, iterations, warmup, cold)
+        results.append(result)
+        if progress:
+            progress(result)
+    return {
+        'environment': environment(),
+        'options': {'iterations': iterations, 'warmup': warmup, 'cold': cold},
+        'results': results,
+    }
+
+def compare(baseline, current, tolerance=0.1):
+    """Per-benchmark change between two run_suite reports.
+
+    A case regresses when its p95 grows by more than `tolerance` (a
+    fraction) or it runs more queries than before.
+    """
+    previous = {result['name']: result for result in baseline['results']}
+    rows = []
+    for result in current['results']:
+        before = previous.get(result['name'])
+        if before is None:
+            continue
+        change = (result['p95_ms'] - before['p95_ms']) / before['p95_ms'] if before['p95_ms'] else 0.0
+        rows.append({
+            'name': result['name'],
+            'p95_ms_before': before['p95_ms'],
+            'p95_ms': result['p95_ms'],
+            'p95_change': round(change, 3),
+            'queries_before': before['queries'],
+            'queries': result['queries'],
+            'regressed': change > tolerance or result['queries'] > before['queries'],
+        })
+    return rows
+
+# Micro benchmarks: serializers and services without the request cycle
+
+def _first(model, prefix_field, prefix, count=100):
+    return list(model.objects.filter(**{f'{prefix_field}__startswith': prefix}).order_by('id')[:count])
+
+@benchmark('serializers.patient_list', kind='micro')
+def _patient_serializer(context):
+    from patients.models import Patient
+    from patients.serializers import PatientSerializer
+    from .synthetic import PATIENT_PREFIX
+    return PatientSerializer(_first(Patient, 'patient_id', PATIENT_PREFIX), many=True).data
+
+@benchmark('serializers.appointment_list', kind='micro')
+def _appointment_serializer(context):
+    from appointments.models import Appointment
+    from appointments.serializers import AppointmentSerializer
+    appointments = Appointment.objects.filter(doctor=context.doctor).order_by('id')[:100]
+    return AppointmentSerializer(appointments, many=True).data
+
+@benchmark('serializers.invoice_list', kind='micro')
+def _invoice_serializer(context):
+    from billing.models import Invoice
+    from billing.serializers import InvoiceSerializer
+    from .synthetic import INVOICE_PREFIX
+    return InvoiceSerializer(_first(Invoice, 'invoice_number', INVOICE_PREFIX), many=True).data
+
+@benchmark('fhir.patient', kind='micro')
+def _fhir_patient(context):
+    return context.patient.to_fhir()
+
+@benchmark('hl7.parse', kind='micro')
+def _hl7_parse(context):
+    from patients.models import HL7Message
+    from patients.services import HL7Processor
+    message = HL7Message.objects.get(id=context.hl7_sample[0])
+    return HL7Processor.parse_message(message.message_content)
+
+# JSON rendering and parsing: DRF's stdlib renderer and parser against
+# ehs_backend.fastjson on real response payloads
+
+def _fhir_export_payload(context):
+    from patients.services import FHIRExporter
+    return FHIRExporter.export_patient_data(context.patient)
+
+def _schedule_payload(context):
+    from appointments.models import Appointment
+    from appointments.serializers import ScheduleSerializer
+    return ScheduleSerializer(Appointment.objects.filter(doctor=context.doctor).order_by('id'), many=True).data
+
+def _invoices_payload(context):
+    from billing.models import Invoice
+    from billing.serializers import InvoiceSerializer
+    from .synthetic import INVOICE_PREFIX
+    return InvoiceSerializer(_first(Invoice, 'invoice_number', INVOICE_PREFIX, 500), many=True).data
+
+def _analytics_payload(context):
+    from analytics import dashboards
+    start_date = context.today - timedelta(days=365)
+    return {
+        'demographics': dashboards.patient_demographics(context.today).run(),
+        # Raw Decimal aggregates, as the view returns them
+        'financial_summary': dashboards.financial_summary(start_date, context.today).run(),
+        'appointments': dashboards.summarize_appointments(
+            dashboards.appointment_breakdown(start_date, context.today).run()
+        ),
+    }
+
+JSON_PAYLOADS = {
+    'fhir_export': _fhir_export_payload,
+    'doctor_schedule': _schedule_payload,
+    'invoice_list': _invoices_payload,
+    'analytics': _analytics_payload,
+}
+
+def _json_payload(name):
+    def setup(context):
+        if name not in context.payloads:
+            from rest_framework.renderers import JSONRenderer
+            data = JSON_PAYLOADS[name](context)
+            context.payloads[name] = (data, JSONRenderer().render(data))
+    return setup
+
+def _register_json_benchmarks():
+    from io import BytesIO
+    from rest_framework.parsers import JSONParser
+    from rest_framework.renderers import JSONRenderer
+    from .fastjson import FastJSONParser, FastJSONRenderer
+
+    implementations = {'stdlib': (JSONRenderer(), JSONParser()), 'orjson': (FastJSONRenderer(), FastJSONParser())}
+    for name in JSON_PAYLOADS:
+        for implementation, (renderer, parser) in implementations.items():
+            benchmark(f'json.render.{name}.{implementation}', kind='micro', setup=_json_payload(name))(
+                lambda context, name=name, renderer=renderer: renderer.render(context.payloads[name][0])
+            )
+            benchmark(f'json.parse.{name}.{implementation}', kind='micro', setup=_json_payload(name))(
+                lambda context, name=name, parser=parser: parser.parse(BytesIO(context.payloads[name][1]))
+            )
+
+_register_json_benchmarks()
+
+# Macro benchmarks: API actions through the full middleware stack
+
+@benchmark('api.patients.list')
+def _patients_list(context):
+    return context.get('/api/patients/')
+
+@benchmark('api.patients.search')
+def _patients_search(context):
+    return context.get('/api/patients/', search=context.patient.user.last_name)
+
+@benchmark('api.patients.retrieve')
+def _patients_retrieve(context):
+    return context.get(f'/api/patients/{context.patient.pk}/')
+
+@benchmark('api.patients.medical_history')
+def _patients_medical_history(context):
+    return context.get(f'/api/patients/{context.patient.pk}/medical_history/')
+
+@benchmark('api.patients.fhir')
+def _patients_fhir(context):
+    return context.get(f'/api/patients/{context.patient.pk}/fhir/')
+
+@benchmark('api.appointments.list')
+def _appointments_list(context):
+    return context.get('/api/appointments/')
+
+@benchmark('api.appointments.retrieve')
+def _appointments_retrieve(context):
+    return context.get(f'/api/appointments/{context.appointment.pk}/')
+
+@benchmark('api.appointments.doctor_schedule')
+def _appointments_doctor_schedule(context):
+    return context.get('/api/appointments/doctor_schedule/', doctor_id=context.doctor.pk)
+
+@benchmark('api.appointments.date_range')
+def _appointments_date_range(context):
+    return context.get(
+        '/api/appointments/date_range/',
+        start_date=context.today.isoformat(),
+        end_date=(context.today + timedelta(days=7)).isoformat()
+    )
+
+@benchmark('api.appointments.create', rollback=True)
+def _appointments_create(context):
+    return context.post('/api/appointments/', {
+        'patient': context.patient.pk,
+        'doctor': context.doctor.pk,
+        # Past the generated calendar, so the slot is always free
+        'date': (context.today + timedelta(days=3650)).isoformat(),
+        'time_slot': '07:00',
+        'reason': 'Benchmark',
+    })
+
+@benchmark('api.appointments.status', rollback=True)
+def _appointments_status(context):
+    return context.put(f'/api/appointments/{context.appointment.pk}/status/', {'status': 'CONFIRMED'})
+
+@benchmark('api.billing.invoices.list')
+def _invoices_list(context):
+    return context.get('/api/billing/invoices/')
+
+@benchmark('api.billing.invoices.retrieve')
+def _invoices_retrieve(context):
+    return context.get(f'/api/billing/invoices/{context.invoice.pk}/')
+
+@benchmark('api.billing.invoices.payments')
+def _invoices_payments(context):
+    return context.get(f'/api/billing/invoices/{context.invoice.pk}/payments/')
+
+@benchmark('api.billing.payments.list')
+def _payments_list(context):
+    return context.get('/api/billing/payments/')
+
+@benchmark('api.analytics.patient_demographics')
+def _analytics_demographics(context):
+    return context.get('/api/analytics/patient_demographics/')
+
+@benchmark('api.analytics.financial_summary')
+def _analytics_financial_summary(context):
+    return context.get('/api/analytics/financial_summary/', period='month')
+
+@benchmark('api.analytics.appointment_statistics')
+def _analytics_appointment_statistics(context):
+    return context.get('/api/analytics/appointment_statistics/', period='month')
+
+@benchmark('api.users.audit_logs')
+def _users_audit_logs(context):
+    return context.get('/api/users/audit_logs/')
+
+# Celery tasks, run eagerly in-process: task code without broker overhead
+
+def _reset_hl7_backlog(context):
+    from patients.models import HL7Message
+    HL7Message.objects.filter(id__in=context.hl7_sample).update(processed=False)
+
+@benchmark('tasks.process_hl7_messages', kind='task', setup=_reset_hl7_backlog)
+def _task_process_hl7(context):
+    from patients.tasks import process_hl7_messages
+    return process_hl7_messages.apply()
+
+def _reset_outbox(context):
+    mail.outbox = []
+
+@benchmark('tasks.send_appointment_reminders', kind='task', setup=_reset_outbox)
+def _task_send_reminders(context):
+    from appointments.tasks import send_appointment_reminders
+    with override_settings(EMAIL_BACKEND='django.core.mail.backends.locmem.EmailBackend'):
+        return send_appointment_reminders.apply()
+
+@benchmark('tasks.cleanup_cancelled_appointments', kind='task', rollback=True)
+def _task_cleanup_cancelled(context):
+    from appointments.tasks import cleanup_cancelled_appointments
+    return cleanup_cancelled_appointments.apply()
+
+@benchmark('tasks.refresh_analytics_rollups', kind='task', max_iterations=5)
+def _task_refresh_rollups(context):
+    from analytics.tasks import refresh_analytics_rollups
+    return refresh_analytics_rollups.apply(kwargs={'days': 7})
+
+@benchmark('tasks.compute_cohort_analytics', kind='task', max_iterations=5)
+def _task_cohort(context):
+    from analytics.tasks import compute_cohort_analytics
+    return compute_cohort_analytics.apply(kwargs={'days': 30})
+
+@benchmark('tasks.generate_daily_analytics', kind='task', max_iterations=5)
+def _task_daily_analytics(context):
+    from analytics.tasks import generate_daily_analytics
+    return generate_daily_analytics.apply()
+
+@benchmark('tasks.generate_monthly_report', kind='task', max_iterations=5)
+def _task_monthly_report(context):
+    from analytics.tasks import generate_monthly_report
+    return generate_monthly_report.apply()
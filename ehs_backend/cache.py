@@ -1,8 +1,17 @@
-from django.core.cache import cache
+from django.core.cache import cache, caches
 from django.conf import settings
+from django.db import transaction
+from django.db.models.signals import post_init, post_save, post_delete
+from django.http import HttpResponse
+from django.utils.cache import get_conditional_response, patch_cache_control
+from django.utils.http import http_date, quote_etag, urlencode
+from rest_framework.response import Response
+from .db_router import replicas_configured, use_primary
+from .fastjson import json_safe
+from contextlib import nullcontext
 from functools import wraps
 import hashlib
-import json
+import time
 
 def cache_key_generator(*args, **kwargs):
     """Generate a unique cache key based on arguments"""
@@ -11,34 +20,368 @@ def cache_key_generator(*args, **kwargs):
     key_string = "|".join(key_parts)
     return hashlib.md5(key_string.encode()).hexdigest()
 
-def cache_response(timeout=300):
-    """Cache decorator for API responses"""
+def _tag_cache():
+    # Generations are read on every tagged lookup; keep them in the local tier
+    return caches[settings.LAYERED_CACHE_ALIAS]
+
+def _tag_key(tag):
+    return f"tag:{tag}"
+
+def _new_generation():
+    # Nanoseconds: far ahead of any generation reached by incr() since the
+    # previous one started, even under heavy invalidation
+    return time.time_ns()
+
+def tag_versions(tags):
+    """Current generation of each tag, starting a generation for unseen tags.
+
+    A missing generation is started at the current time rather than 0, so
+    a tag whose counter was evicted can never fall back to a generation
+    that older entries were stored under.
+    """
+    cache = _tag_cache()
+    keys = {_tag_key(tag): tag for tag in tags}
+    stored = cache.get_many(list(keys))
+    versions = {}
+    for key, tag in keys.items():
+        version = stored.get(key)
+        if version is None:
+            cache.add(key, _new_generation(), None)
+            version = cache.get(key)
+        versions[tag] = version
+    return versions
+
+def _tag_pin_key(tag):
+    return f"tag-pin:{tag}"
+
+def _pin_tags(tags):
+    if tags and replicas_configured():
+        cache.set_many({_tag_pin_key(tag): 1 for tag in tags}, settings.READ_YOUR_WRITES_SECONDS)
+
+def _recently_invalidated(tags):
+    """Whether a replica may not have replayed the write behind a tag yet"""
+    if not tags or not replicas_configured():
+        return False
+    return bool(cache.get_many([_tag_pin_key(tag) for tag in tags]))
+
+def _fresh_reads(tags):
+    # Rebuilding from a lagging replica would store pre-write data under
+    # the new generation; read from the primary until replicas catch up
+    return use_primary() if _recently_invalidated(tags) else nullcontext()
+
+def invalidate_tags(*tags):
+    """Make every entry stored under any of `tags` stale; O(1) per tag"""
+    _pin_tags(tags)
+    cache = _tag_cache()
+    for tag in tags:
+        key = _tag_key(tag)
+        if not cache.add(key, _new_generation(), None):
+            try:
+                cache.incr(key)
+            except ValueError:
+                # Evicted between add() and incr(); a fresh generation still
+                # differs from the one stale entries carry
+                cache.set(key, _new_generation(), None)
+
+def get_tagged(key, tags, default=None):
+    """Value cached under `key` if none of its tags changed since it was set.
+
+    The entry and the tag generations are read in one round trip; entries
+    remember the generations they were computed under, so invalidating a
+    tag never has to find or delete keys.
+    """
+    tag_keys = [_tag_key(tag) for tag in tags]
+    stored = _tag_cache().get_many([key] + tag_keys)
+    entry = stored.get(key)
+    if (
+        entry is not None
+        and all(tag_key in stored for tag_key in tag_keys)
+        and entry['tags'] == {tag: stored[_tag_key(tag)] for tag in tags}
+    ):
+        return entry['value']
+    return default
+
+def set_tagged(key, value, versions, timeout=300):
+    """Store `value` under the tag generations read before computing it"""
+    _tag_cache().set(key, {'value': value, 'tags': versions}, timeout)
+
+def get_or_set_tagged(key, tags, compute, timeout=300):
+    """Return the value cached under `key` while none of its tags changed"""
+    missing = object()
+    value = get_tagged(key, tags, missing)
+    if value is not missing:
+        return value
+
+    # Generations are read before computing, so a write landing while the
+    # value is built leaves the new entry already stale
+    versions = tag_versions(tags)
+    with _fresh_reads(tags):
+        value = compute()
+    set_tagged(key, value, versions, timeout)
+    return value
+
+def invalidate_tags_on_commit(*tags):
+    """Invalidate once the current transaction commits.
+
+    Bumping earlier would let a concurrent reader cache the pre-commit
+    rows under the new generation.
+    """
+    if tags:
+        transaction.on_commit(lambda: invalidate_tags(*tags))
+
+def track_cache_tags(model, fields, tags_for):
+    """Invalidate the tags of `model` rows whenever one is saved or deleted.
+
+    `tags_for(pk, values)` maps a row's primary key and the `fields` values
+    to its tags. Values are remembered as loaded, so moving a row (e.g. an
+    appointment to another doctor) invalidates the old owner's tags too.
+    Queryset update() and bulk_create() send no signals and must call
+    invalidate_tags() themselves.
+    """
+    def remember(instance):
+        # __dict__ avoids loading deferred fields just to remember them
+        instance._cache_tag_values = {field: instance.__dict__.get(field) for field in fields}
+
+    def loaded(sender, instance, **kwargs):
+        remember(instance)
+
+    def changed(sender, instance, **kwargs):
+        current = {field: getattr(instance, field) for field in fields}
+        tags = set(tags_for(instance.pk, current))
+        original = getattr(instance, '_cache_tag_values', None)
+        if original and original != current:
+            tags.update(tags_for(instance.pk, original))
+        invalidate_tags_on_commit(*sorted(tags))
+        remember(instance)
+
+    uid = f"cache-tags:{model._meta.label}"
+    post_init.connect(loaded, sender=model, weak=False, dispatch_uid=uid)
+    post_save.connect(changed, sender=model, weak=False, dispatch_uid=uid)
+    post_delete.connect(changed, sender=model, weak=False, dispatch_uid=uid)
+
+RESPONSE_STATS_EVENTS = ('hit', 'stale', 'miss', 'recompute', 'not_modified')
+
+def request_cache_key(request, prefix='response', scope='role', vary=(), extra=()):
+    """Cache key from path, normalized query params and the caller's scope.
+
+    `scope` is 'public' (everyone shares the entry), 'role' or 'user'.
+    User-scoped keys include the caller's permission version, so a
+    permission change never serves them a response computed before it.
+    `vary` names request headers whose values select the entry.
+    """
+    params = sorted(
+        (name, value)
+        for name in request.query_params
+        for value in request.query_params.getlist(name)
+    )
+    parts = [request.method, request.path, urlencode(params)]
+    if scope in ('role', 'user'):
+        parts.append(getattr(request.user, 'role', None) or 'anonymous')
+    if scope == 'user' and request.user.is_authenticated:
+        from users.permissions import PermissionCache
+        parts.append(f"{request.user.pk}@{PermissionCache.version(request.user.pk)}")
+    parts.extend(f"{header}={request.headers.get(header, '')}" for header in vary)
+    parts.extend(extra)
+    key_string = "|".join(parts)
+    return f"{prefix}:{hashlib.md5(key_string.encode()).hexdigest()}"
+
+def _bucket_end(now, bucket_seconds):
+    """Start of the next time bucket, so every worker expires entries together"""
+    return (int(now) // bucket_seconds + 1) * bucket_seconds
+
+def _count(name, event):
+    key = f"stats:response:{name}:{event}"
+    cache.add(key, 0, None)
+    try:
+        cache.incr(key)
+    except ValueError:
+        # Evicted between add() and incr(); counters are best effort
+        pass
+
+def response_cache_stats(names):
+    """Hit/stale/miss/recompute counters for the given cached views"""
+    keys = {
+        f"stats:response:{name}:{event}": (name, event)
+        for name in names
+        for event in RESPONSE_STATS_EVENTS
+    }
+    values = cache.get_many(list(keys))
+    stats = {name: {event: 0 for event in RESPONSE_STATS_EVENTS} for name in names}
+    for key, (name, event) in keys.items():
+        stats[name][event] = values.get(key, 0)
+    return stats
+
+def bucketed_cache_response(bucket_seconds=300, stale_seconds=60, lock_timeout=30, wait_timeout=5):
+    """Cache a DRF action's response per time bucket with stampede protection.
+
+    Entries are fresh until the end of the current ``bucket_seconds``
+    window and kept ``stale_seconds`` longer. Once stale, the first
+    request takes a short lock and recomputes while everybody else keeps
+    getting the stale copy. On a cold miss, requests that lose the lock
+    wait up to ``wait_timeout`` seconds for the winner's result instead of
+    all querying the database at once.
+    """
     def decorator(view_func):
+        name = view_func.__name__
+
         @wraps(view_func)
-        def wrapped_view(*args, **kwargs):
-            # Generate cache key
-            cache_key = cache_key_generator(
-                view_func.__name__,
-                *args,
-                **kwargs
-            )
-            
-            # Try to get cached response
-            cached_response = cache.get(cache_key)
-            if cached_response is not None:
-                return cached_response
-            
-            # Generate response and cache it
-            response = view_func(*args, **kwargs)
-            cache.set(cache_key, response, timeout)
-            return response
+        def wrapped_view(self, request, *args, **kwargs):
+            cache_key = request_cache_key(request, prefix=f"response:{name}")
+            lock_key = f"{cache_key}:lock"
+            locks = caches[settings.LOCK_CACHE_ALIAS]
+            entry = cache.get(cache_key)
+            now = time.time()
+
+            if entry is not None and now < entry['fresh_until']:
+                _count(name, 'hit')
+                return Response(entry['data'], status=entry['status'])
+
+            locked = locks.add(lock_key, 1, lock_timeout)
+            if entry is not None and not locked:
+                _count(name, 'stale')
+                return Response(entry['data'], status=entry['status'])
+
+            if entry is None:
+                _count(name, 'miss')
+                deadline = now + wait_timeout
+                while not locked and time.time() < deadline:
+                    time.sleep(0.05)
+                    entry = cache.get(cache_key)
+                    if entry is not None:
+                        return Response(entry['data'], status=entry['status'])
+
+            try:
+                _count(name, 'recompute')
+                response = view_func(self, request, *args, **kwargs)
+                if response.status_code != 200:
+                    return response
+                # Round-trip through JSON so cached and fresh responses are
+                # identical whatever serializer the cache backend uses
+                data = json_safe(response.data)
+                fresh_until = _bucket_end(time.time(), bucket_seconds)
+                cache.set(
+                    cache_key,
+                    {'data': data, 'status': response.status_code, 'fresh_until': fresh_until},
+                    int(fresh_until - time.time()) + stale_seconds
+                )
+                return Response(data, status=response.status_code)
+            finally:
+                if locked:
+                    locks.delete(lock_key)
         return wrapped_view
     return decorator
 
-def invalidate_cache_pattern(pattern):
-    """Invalidate all cache keys matching a pattern"""
-    if hasattr(cache, 'delete_pattern'):
-        cache.delete_pattern(pattern)
-    else:
-        # Fallback for cache backends that don't support pattern deletion
-        cache.clear()
\ No newline at end of file
+class CachedResponseMixin:
+    """Per-action settings for actions decorated with cache_response.
+
+    `cache_timeouts` maps action names to seconds; `get_cache_tags`
+    returns the tags whose invalidation makes an action's entries stale.
+    """
+    cache_timeouts = {}
+    cache_scope = 'user'
+    cache_vary_headers = ()
+
+    def get_cache_tags(self, request, *args, **kwargs):
+        return []
+
+def _cached_http_response(entry):
+    response = HttpResponse(entry['content'], content_type=entry['content_type'])
+    response['ETag'] = entry['etag']
+    response['Last-Modified'] = http_date(entry['last_modified'])
+    return response
+
+def _conditional(request, entry, response):
+    response = get_conditional_response(
+        request._request,
+        etag=entry['etag'],
+        last_modified=entry['last_modified'],
+        response=response
+    )
+    # Scoped entries must not be shared by proxies; clients revalidate
+    # with If-None-Match and get a body-less 304 while nothing changed
+    patch_cache_control(response, private=True, no_cache=True)
+    return response
+
+def cache_response(timeout=None, scope=None, vary=None, tags=None):
+    """Cache the rendered response of a DRF GET action.
+
+    Keys combine method, path, sorted query params, the caller's scope
+    (see request_cache_key), the negotiated media type and `vary`
+    headers. Hits return the stored bytes without running the action or
+    the renderer, with ETag and Last-Modified; conditional requests get
+    304. Entries are tagged (see get_tagged) and expire after `timeout`.
+
+    Unset arguments come from CachedResponseMixin attributes on the view:
+    `cache_timeouts[action]`, `cache_scope`, `cache_vary_headers` and
+    `get_cache_tags()`. A hit skips get_object(), so object permissions
+    are only checked when the entry is built; keep such actions
+    user-scoped.
+    """
+    def decorator(view_func):
+        name = view_func.__name__
+
+        @wraps(view_func)
+        def wrapped_view(self, request, *args, **kwargs):
+            if request.method not in ('GET', 'HEAD'):
+                return view_func(self, request, *args, **kwargs)
+
+            renderer = request.accepted_renderer
+            media_type = request.accepted_media_type
+            cache_key = request_cache_key(
+                request,
+                prefix=f"response:{name}",
+                scope=scope or getattr(self, 'cache_scope', 'user'),
+                vary=vary if vary is not None else getattr(self, 'cache_vary_headers', ()),
+                extra=[media_type]
+            )
+            if tags is not None:
+                entry_tags = tags(self, request, *args, **kwargs)
+            elif hasattr(self, 'get_cache_tags'):
+                entry_tags = self.get_cache_tags(request, *args, **kwargs)
+            else:
+                entry_tags = []
+
+            entry = get_tagged(cache_key, entry_tags)
+            if entry is not None:
+                response = _conditional(request, entry, _cached_http_response(entry))
+                _count(name, 'hit' if response.status_code == 200 else 'not_modified')
+                return response
+
+            _count(name, 'miss')
+            versions = tag_versions(entry_tags)
+            with _fresh_reads(entry_tags):
+                response = view_func(self, request, *args, **kwargs)
+            if response.status_code != 200 or not isinstance(response, Response):
+                return response
+
+            context = self.get_renderer_context()
+            context['response'] = response
+            content = renderer.render(response.data, media_type, context)
+            if isinstance(content, bytes):
+                try:
+                    content = content.decode(renderer.charset or 'utf-8')
+                except UnicodeDecodeError:
+                    return response
+            content_type = media_type
+            if renderer.charset:
+                content_type = f"{media_type}; charset={renderer.charset}"
+
+            entry = {
+                'content': content,
+                'content_type': content_type,
+                'etag': quote_etag(hashlib.md5(content.encode()).hexdigest()),
+                'last_modified': int(time.time()),
+            }
+            action_timeout = timeout or getattr(self, 'cache_timeouts', {}).get(name)
+            set_tagged(
+                cache_key, entry, versions,
+                action_timeout or settings.RESPONSE_CACHE_TIMEOUT
+            )
+            # Already rendered: keep the data for callers, skip the second render
+            response.content = content
+            response['Content-Type'] = content_type
+            response['ETag'] = entry['etag']
+            response['Last-Modified'] = http_date(entry['last_modified'])
+            return _conditional(request, entry, response)
+        return wrapped_view
+    return decorator
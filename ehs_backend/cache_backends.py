@@ -0,0 +1,318 @@
+import json
+import logging
+import os
+import threading
+import time
+import uuid
+from collections import OrderedDict
+from django.core.cache import caches
+from django.core.cache.backends.base import BaseCache, DEFAULT_TIMEOUT
+from django_redis.client import DefaultClient
+from django_redis.compressors.zlib import ZlibCompressor
+from .metrics import record_cache_lookups
+
+logger = logging.getLogger(__name__)
+
+TIER_EVENTS = ('local_hit', 'remote_hit', 'miss')
+
+_MISSING = object()
+
+class ThresholdZlibCompressor(ZlibCompressor):
+    """zlib that leaves payloads below COMPRESS_MIN_BYTES uncompressed.
+
+    Small values (counters, flags, short dicts) gain nothing from zlib but
+    still pay for it on every read and write.
+    """
+    def __init__(self, options):
+        super().__init__(options)
+        self.min_length = int(options.get('COMPRESS_MIN_BYTES', 1024))
+        self.preset = int(options.get('COMPRESS_LEVEL', self.preset))
+
+class MetricsClient(DefaultClient):
+    """django-redis client that counts hits and misses for /metrics.
+
+    The alias is passed in OPTIONS as METRICS_ALIAS; the backend itself
+    stays django_redis' RedisCache.
+    """
+    def __init__(self, server, params, backend):
+        super().__init__(server, params, backend)
+        self.metrics_alias = self._options.get('METRICS_ALIAS', 'unknown')
+
+    def get(self, key, default=None, version=None, client=None):
+        value = super().get(key, _MISSING, version=version, client=client)
+        if value is _MISSING:
+            record_cache_lookups(self.metrics_alias, 0, 1)
+            return default
+        record_cache_lookups(self.metrics_alias, 1, 0)
+        return value
+
+    def get_many(self, keys, version=None, client=None):
+        keys = list(keys)
+        found = super().get_many(keys, version=version, client=client)
+        record_cache_lookups(self.metrics_alias, len(found), len(keys) - len(found))
+        return found
+
+class LocalLRU:
+    """Bounded, thread-safe LRU of (expires_at, value) entries"""
+    def __init__(self, max_entries, ttl):
+        self.max_entries = max_entries
+        self.ttl = ttl
+        self.entries = OrderedDict()
+        self.lock = threading.Lock()
+
+    def get(self, key, default=None):
+        with self.lock:
+            entry = self.entries.get(key)
+            if entry is None:
+                return default
+            if entry[0] <= time.monotonic():
+                del self.entries[key]
+                return default
+            self.entries.move_to_end(key)
+            return entry[1]
+
+    def set(self, key, value, timeout=None):
+        ttl = self.ttl if timeout is None else min(self.ttl, timeout)
+        if ttl <= 0:
+            self.discard(key)
+            return
+        with self.lock:
+            self.entries[key] = (time.monotonic() + ttl, value)
+            self.entries.move_to_end(key)
+            while len(self.entries) > self.max_entries:
+                self.entries.popitem(last=False)
+
+    def discard(self, *keys):
+        with self.lock:
+            for key in keys:
+                self.entries.pop(key, None)
+
+    def clear(self):
+        with self.lock:
+            self.entries.clear()
+
+    def __len__(self):
+        return len(self.entries)
+
+class LocalTier:
+    """Process-wide state of one two-tier cache: LRU, stats and listener.
+
+    Django creates cache backends per thread; the tier is shared so every
+    thread of a worker sees the same entries and one listener serves them.
+    """
+    def __init__(self, channel, max_entries, ttl):
+        self.channel = channel
+        self.lru = LocalLRU(max_entries, ttl)
+        self.stats = {event: 0 for event in TIER_EVENTS}
+        self.node_id = None
+        self.pid = None
+
+_tiers = {}
+_tiers_lock = threading.Lock()
+
+def local_tier(channel, max_entries, ttl):
+    with _tiers_lock:
+        if channel not in _tiers:
+            _tiers[channel] = LocalTier(channel, max_entries, ttl)
+        return _tiers[channel]
+
+class TwoTierCache(BaseCache):
+    """Per-process LRU in front of another cache alias (normally Redis).
+
+    LOCATION names the remote alias. Reads are answered from the local
+    tier for at most LOCAL_TTL seconds; every write goes to the remote
+    tier and is broadcast on a Redis pub/sub channel so other processes
+    drop their local copy. Without Redis there is no broadcast and
+    LOCAL_TTL bounds how stale another process can be.
+
+    Local values are shared, not copied: callers must not mutate what
+    they get back.
+    """
+    def __init__(self, location, params):
+        super().__init__(params)
+        options = params.get('OPTIONS', {})
+        self.remote_alias = location
+        self.tier = local_tier(
+            options.get('CHANNEL', f'cache-invalidate:{location}'),
+            int(options.get('LOCAL_MAX_ENTRIES', 2048)),
+            float(options.get('LOCAL_TTL', 5))
+        )
+        self.local = self.tier.lru
+        self.stats = self.tier.stats
+        self.metrics_alias = options.get('METRICS_ALIAS', location)
+
+    @property
+    def remote(self):
+        return caches[self.remote_alias]
+
+    def _redis(self):
+        if not type(self.remote).__module__.startswith('django_redis'):
+            return None
+        from django_redis import get_redis_connection
+        return get_redis_connection(self.remote_alias)
+
+    # Cross-process invalidation
+
+    def _ensure_listener(self):
+        tier = self.tier
+        if tier.pid == os.getpid():
+            return
+        with _tiers_lock:
+            # Re-started after fork: threads do not survive it
+            if tier.pid == os.getpid():
+                return
+            tier.pid = os.getpid()
+            tier.node_id = uuid.uuid4().hex
+            tier.lru.clear()
+        if self._redis() is None:
+            return
+        threading.Thread(target=self._listen, name='cache-invalidation', daemon=True).start()
+
+    def _listen(self):
+        backoff = 1
+        while True:
+            try:
+                pubsub = self._redis().pubsub(ignore_subscribe_messages=True)
+                pubsub.subscribe(self.tier.channel)
+                # Anything may have changed while disconnected
+                self.local.clear()
+                backoff = 1
+                for message in pubsub.listen():
+                    self._apply_invalidation(message['data'])
+            except Exception:
+                logger.warning("Cache invalidation listener disconnected", exc_info=True)
+                self.local.clear()
+                time.sleep(backoff)
+                backoff = min(backoff * 2, 30)
+
+    def _apply_invalidation(self, data):
+        if isinstance(data, bytes):
+            data = data.decode()
+        node_id, _, payload = data.partition('|')
+        if node_id == self.tier.node_id:
+            return
+        keys = json.loads(payload)
+        if keys is None:
+            self.local.clear()
+        else:
+            self.local.discard(*keys)
+
+    def _publish(self, keys):
+        """Tell other processes to drop `keys`, or everything when None"""
+        redis = self._redis()
+        if redis is None:
+            return
+        try:
+            redis.publish(self.tier.channel, f'{self.tier.node_id}|{json.dumps(keys)}')
+        except Exception:
+            # Other processes fall back to LOCAL_TTL expiry
+            logger.warning("Cache invalidation publish failed", exc_info=True)
+
+    def _invalidate(self, keys):
+        self.local.discard(*keys)
+        self._publish(keys)
+
+    # Reads
+
+    def get(self, key, default=None, version=None):
+        self._ensure_listener()
+        local_key = self.make_key(key, version)
+        missing = object()
+        value = self.local.get(local_key, missing)
+        if value is not missing:
+            self.stats['local_hit'] += 1
+            record_cache_lookups(self.metrics_alias, 1, 0)
+            return value
+        value = self.remote.get(key, missing, version=version)
+        if value is missing:
+            self.stats['miss'] += 1
+            record_cache_lookups(self.metrics_alias, 0, 1)
+            return default
+        self.stats['remote_hit'] += 1
+        record_cache_lookups(self.metrics_alias, 1, 0)
+        self.local.set(local_key, value)
+        return value
+
+    def get_many(self, keys, version=None):
+        self._ensure_listener()
+        missing = object()
+        found, pending = {}, []
+        for key in keys:
+            value = self.local.get(self.make_key(key, version), missing)
+            if value is missing:
+                pending.append(key)
+            else:
+                found[key] = value
+        self.stats['local_hit'] += len(found)
+        fetched = {}
+        if pending:
+            fetched = self.remote.get_many(pending, version=version)
+            for key, value in fetched.items():
+                self.local.set(self.make_key(key, version), value)
+            found.update(fetched)
+            self.stats['remote_hit'] += len(fetched)
+            self.stats['miss'] += len(pending) - len(fetched)
+        record_cache_lookups(self.metrics_alias, len(found), len(pending) - len(fetched))
+        return found
+
+    def has_key(self, key, version=None):
+        return self.get(key, version=version) is not None
+
+    # Writes
+
+    def set(self, key, value, timeout=DEFAULT_TIMEOUT, version=None):
+        self._ensure_listener()
+        self.remote.set(key, value, timeout, version=version)
+        self._invalidate([self.make_key(key, version)])
+
+    def add(self, key, value, timeout=DEFAULT_TIMEOUT, version=None):
+        self._ensure_listener()
+        added = self.remote.add(key, value, timeout, version=version)
+        if added:
+            self._invalidate([self.make_key(key, version)])
+        return added
+
+    def set_many(self, data, timeout=DEFAULT_TIMEOUT, version=None):
+        self._ensure_listener()
+        failed = self.remote.set_many(data, timeout, version=version)
+        self._invalidate([self.make_key(key, version) for key in data])
+        return failed
+
+    def incr(self, key, delta=1, version=None):
+        self._ensure_listener()
+        value = self.remote.incr(key, delta, version=version)
+        self._invalidate([self.make_key(key, version)])
+        return value
+
+    def touch(self, key, timeout=DEFAULT_TIMEOUT, version=None):
+        return self.remote.touch(key, timeout, version=version)
+
+    def delete(self, key, version=None):
+        self._ensure_listener()
+        deleted = self.remote.delete(key, version=version)
+        self._invalidate([self.make_key(key, version)])
+        return deleted
+
+    def delete_many(self, keys, version=None):
+        self._ensure_listener()
+        self.remote.delete_many(keys, version=version)
+        self._invalidate([self.make_key(key, version) for key in keys])
+
+    def clear(self):
+        self._ensure_listener()
+        self.remote.clear()
+        self.local.clear()
+        self._publish(None)
+
+    def tier_stats(self):
+        """Per-process hit counts and ratios for each tier"""
+        stats = dict(self.stats)
+        lookups = sum(stats.values())
+        stats.update({
+            'local_entries': len(self.local),
+            'local_hit_ratio': round(stats['local_hit'] / lookups, 3) if lookups else None,
+            'hit_ratio': round(
+                (stats['local_hit'] + stats['remote_hit']) / lookups, 3
+            ) if lookups else None,
+        })
+        return stats
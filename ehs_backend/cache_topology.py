@@ -0,0 +1,198 @@
+import importlib.util
+import os
+import time
+from urllib.parse import urlsplit, urlunsplit
+
+# msgpack is smaller and faster to decode than JSON for the same values;
+# JSON stays the fallback where the package is not installed
+DEFAULT_SERIALIZER = (
+    'django_redis.serializers.msgpack.MSGPackSerializer'
+    if importlib.util.find_spec('msgpack')
+    else 'django_redis.serializers.json.JSONSerializer'
+)
+# Payloads shorter than this are stored uncompressed
+COMPRESS_MIN_BYTES = int(os.getenv('CACHE_COMPRESS_MIN_BYTES', '1024'))
+
+# One Redis logical database per alias so each can be sized, flushed and
+# monitored on its own. Sessions and token state are long-lived and must
+# not be evicted by response-cache churn; counters and locks are tiny and
+# latency sensitive, so they skip serialization and compression.
+CACHE_ALIASES = {
+    'default': {
+        'db': 0,
+        'max_connections': 50,
+        'serializer': DEFAULT_SERIALIZER,
+        'compressor': 'ehs_backend.cache_backends.ThresholdZlibCompressor',
+        'timeout': 300,
+        'socket_timeout': 5,
+    },
+    'rate_limiting': {
+        'db': 1,
+        'max_connections': 30,
+        'serializer': 'django_redis.serializers.json.JSONSerializer',
+        'compressor': 'django_redis.compressors.identity.IdentityCompressor',
+        'timeout': 600,
+        'socket_timeout': 1,
+    },
+    'sessions': {
+        'db': 2,
+        'max_connections': 30,
+        'serializer': 'django_redis.serializers.pickle.PickleSerializer',
+        'compressor': 'django_redis.compressors.identity.IdentityCompressor',
+        'timeout': 14 * 24 * 3600,
+        'socket_timeout': 2,
+    },
+    'locks': {
+        'db': 3,
+        'max_connections': 20,
+        'serializer': 'django_redis.serializers.json.JSONSerializer',
+        'compressor': 'django_redis.compressors.identity.IdentityCompressor',
+        'timeout': 60,
+        'socket_timeout': 1,
+    },
+}
+
+# Per-process LRU tiers in front of a Redis alias (ehs_backend.cache_backends).
+# For hot, small keys: tag generations, permission snapshots, reference data
+LAYERED_ALIASES = {
+    'layered': {
+        'remote': 'default',
+        'local_max_entries': 2048,
+        'local_ttl': 5,
+    },
+}
+
+def _alias_setting(alias, name, default):
+    """Per-alias override from the environment, e.g. CACHE_SESSIONS_MAX_CONNECTIONS"""
+    return os.getenv(f'CACHE_{alias.upper()}_{name.upper()}', default)
+
+def _redis_location(url, db):
+    parts = urlsplit(url)
+    return urlunsplit((parts.scheme, parts.netloc, f'/{db}', parts.query, parts.fragment))
+
+def redis_caches(url, key_prefix='ehs'):
+    caches = {}
+    for alias, spec in CACHE_ALIASES.items():
+        socket_timeout = float(_alias_setting(alias, 'socket_timeout', spec['socket_timeout']))
+        caches[alias] = {
+            'BACKEND': 'django_redis.cache.RedisCache',
+            'LOCATION': _redis_location(url, int(_alias_setting(alias, 'db', spec['db']))),
+            'OPTIONS': {
+                # Counts hits and misses per alias for /metrics
+                'CLIENT_CLASS': 'ehs_backend.cache_backends.MetricsClient',
+                'METRICS_ALIAS': alias,
+                'CONNECTION_POOL_KWARGS': {
+                    'max_connections': int(
+                        _alias_setting(alias, 'max_connections', spec['max_connections'])
+                    ),
+                    'retry_on_timeout': True,
+                    'socket_keepalive': True,
+                    'socket_timeout': socket_timeout,
+                    'socket_connect_timeout': socket_timeout,
+                    'health_check_interval': 30,
+                },
+                'SERIALIZER': spec['serializer'],
+                'COMPRESSOR': spec['compressor'],
+                'COMPRESS_MIN_BYTES': int(
+                    _alias_setting(alias, 'compress_min_bytes', COMPRESS_MIN_BYTES)
+                ),
+            },
+            'KEY_PREFIX': key_prefix,
+            'TIMEOUT': int(_alias_setting(alias, 'timeout', spec['timeout'])),
+        }
+    caches.update(layered_caches())
+    return caches
+
+def layered_caches():
+    return {
+        alias: {
+            'BACKEND': 'ehs_backend.cache_backends.TwoTierCache',
+            'LOCATION': spec['remote'],
+            'OPTIONS': {
+                'LOCAL_MAX_ENTRIES': int(
+                    _alias_setting(alias, 'local_max_entries', spec['local_max_entries'])
+                ),
+                'LOCAL_TTL': float(_alias_setting(alias, 'local_ttl', spec['local_ttl'])),
+                'METRICS_ALIAS': alias,
+            },
+        }
+        for alias, spec in LAYERED_ALIASES.items()
+    }
+
+def local_caches(backend='locmem'):
+    """Fallback topology for development and tests: the same aliases without Redis.
+
+    `locmem` gives every alias its own per-process store. `fakeredis` keeps
+    the django-redis code path (pipelines, incr, pool stats) in memory and
+    needs the fakeredis package.
+    """
+    if backend == 'fakeredis':
+        from fakeredis import FakeConnection
+
+        caches = redis_caches('redis://fakeredis:6379/0')
+        for alias in CACHE_ALIASES:
+            caches[alias]['OPTIONS']['CONNECTION_POOL_KWARGS'] = {'connection_class': FakeConnection}
+        return caches
+    caches = {
+        alias: {
+            'BACKEND': 'django.core.cache.backends.locmem.LocMemCache',
+            'LOCATION': f'ehs-{alias}',
+            'TIMEOUT': spec['timeout'],
+        }
+        for alias, spec in CACHE_ALIASES.items()
+    }
+    caches.update(layered_caches())
+    return caches
+
+def build_caches(url=None, fallback=None):
+    """CACHES setting for the Redis tier at `url`, or the local fallback"""
+    url = url if url is not None else os.getenv('REDIS_URL') or os.getenv('ELASTICACHE_URL')
+    if url:
+        return redis_caches(url)
+    return local_caches(fallback or os.getenv('CACHE_FALLBACK', 'locmem'))
+
+def _pool_stats(alias):
+    from django_redis import get_redis_connection
+
+    pool = get_redis_connection(alias).connection_pool
+    stats = {
+        'max_connections': pool.max_connections,
+        'in_use': len(getattr(pool, '_in_use_connections', ())),
+        'available': len(getattr(pool, '_available_connections', ())),
+        'created': getattr(pool, '_created_connections', None),
+    }
+    if stats['max_connections']:
+        stats['utilisation'] = round(stats['in_use'] / stats['max_connections'], 3)
+    return stats
+
+def alias_health(alias):
+    """Round-trip latency and pool usage for one cache alias"""
+    from django.core.cache import caches
+
+    backend = caches[alias]
+    probe = f'health:probe:{os.getpid()}'
+    result = {'backend': f'{type(backend).__module__}.{type(backend).__name__}'}
+    started = time.perf_counter()
+    try:
+        backend.set(probe, 1, 10)
+        healthy = backend.get(probe) == 1
+        backend.delete(probe)
+    except Exception as e:
+        result.update({'healthy': False, 'error': str(e)})
+        return result
+    result.update({
+        'healthy': healthy,
+        'latency_ms': round((time.perf_counter() - started) * 1000, 3),
+    })
+    if result['backend'].startswith('django_redis'):
+        result['pool'] = _pool_stats(alias)
+    elif hasattr(backend, 'tier_stats'):
+        result['tiers'] = backend.tier_stats()
+    elif hasattr(backend, '_cache'):
+        result['entries'] = len(backend._cache)
+    return result
+
+def cache_health(aliases=None):
+    from django.conf import settings
+
+    return {alias: alias_health(alias) for alias in (aliases or settings.CACHES)}
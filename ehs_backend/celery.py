@@ -13,6 +13,11 @@ app.conf.update(celery_config)
 # Auto-discover tasks in all installed apps
 app.autodiscover_tasks()
 
+# Queue latency, run time, RSS and outcome per task (signal handlers)
+from .task_metrics import connect_signals  # noqa: E402
+
+connect_signals()
+
 @app.task(bind=True, ignore_result=True)
 def debug_task(self):
     print(f'Request: {self.request!r}')
\ No newline at end of file
@@ -0,0 +1,204 @@
+import fnmatch
+import os
+from urllib.parse import urlsplit, urlunsplit
+from kombu import Queue
+
+DEFAULT_QUEUE = 'ehs-default'
+
+# One queue per workload type. Tasks inherit their queue's options: with
+# acks_late a message is only acknowledged once the task has finished, so
+# a worker killed mid-task (deploy, OOM) leaves it to be redelivered; the
+# hard time_limit kills a stuck task, soft_time_limit raises
+# SoftTimeLimitExceeded in it first. acks_late needs idempotent or
+# resumable tasks; send_appointment_reminders is neither (a redelivery
+# would email every patient again), so notifications are acknowledged on
+# receipt and a lost run skips reminders rather than repeating them.
+QUEUES = {
+    'ehs-images': {
+        'acks_late': True,
+        'soft_time_limit': 240,
+        'time_limit': 300,
+    },
+    'ehs-notifications': {
+        'acks_late': False,
+        'soft_time_limit': 45,
+        'time_limit': 60,
+    },
+    'ehs-analytics': {
+        'acks_late': True,
+        'soft_time_limit': 3 * 3600 - 300,
+        'time_limit': 3 * 3600,
+    },
+    DEFAULT_QUEUE: {
+        'acks_late': True,
+        'soft_time_limit': 3600 - 120,
+        'time_limit': 3600,
+    },
+}
+
+TASK_ROUTES = {
+    'patients.tasks.process_medical_image': {'queue': 'ehs-images'},
+    'appointments.tasks.send_appointment_reminders': {'queue': 'ehs-notifications'},
+    'analytics.tasks.*': {'queue': 'ehs-analytics'},
+}
+
+# How the worker for each workload runs its tasks; see worker_argv().
+#   images         CPU-bound Pillow/DICOM work: a process per CPU, recycled
+#                  to hand back fragmented memory, one message reserved at a
+#                  time so a long image never holds up queued ones
+#   notifications  I/O-bound email/SMS: many threads waiting on SMTP
+#                  (CELERY_NOTIFICATIONS_POOL=gevent where gevent is
+#                  installed). The threads pool does not enforce time
+#                  limits, EMAIL_TIMEOUT bounds each send instead
+#   analytics      heavy aggregate queries: one at a time so they don't
+#                  compete with each other for the database; a single
+#                  prefork child rather than the solo pool, which cannot
+#                  enforce time limits
+#   default        everything else
+#   all            development: every queue in one worker
+WORKER_PROFILES = {
+    'images': {
+        'queues': ['ehs-images'],
+        'pool': 'prefork',
+        'concurrency': None,
+        'prefetch_multiplier': 1,
+        'max_tasks_per_child': 50,
+        'max_memory_per_child': 512 * 1024,
+    },
+    'notifications': {
+        'queues': ['ehs-notifications'],
+        'pool': 'threads',
+        'concurrency': 32,
+        'prefetch_multiplier': 4,
+    },
+    'analytics': {
+        'queues': ['ehs-analytics'],
+        'pool': 'prefork',
+        'concurrency': 1,
+        'prefetch_multiplier': 1,
+        'max_tasks_per_child': 10,
+    },
+    'default': {
+        'queues': [DEFAULT_QUEUE],
+        'pool': 'prefork',
+        'concurrency': 2,
+        'prefetch_multiplier': 4,
+        'max_tasks_per_child': 200,
+    },
+    'all': {
+        'queues': list(QUEUES),
+        'pool': 'prefork',
+        'concurrency': 2,
+        'prefetch_multiplier': 1,
+    },
+}
+
+# Redis logical databases for the local broker, after the cache aliases'
+REDIS_BROKER_DB = 4
+REDIS_RESULT_DB = 5
+
+def queue_for(task_name):
+    for pattern, route in TASK_ROUTES.items():
+        if fnmatch.fnmatchcase(task_name, pattern):
+            return route['queue']
+    return DEFAULT_QUEUE
+
+class QueueAnnotations:
+    """Task options from the queue a task is routed to (task_annotations hook)"""
+    def annotate(self, task):
+        return QUEUES.get(queue_for(task.name))
+
+def visibility_timeout(queues=None):
+    """Seconds before an unacknowledged message is delivered again.
+
+    It must outlast the longest task on `queues` (every queue by default).
+    """
+    return max(QUEUES[name]['time_limit'] for name in (queues or QUEUES)) + 300
+
+def worker_transport_options(profile, broker_url):
+    """Broker transport options for a worker running only `profile`'s queues.
+
+    SQS sets the visibility timeout on each queue (deployment/terraform/sqs.tf).
+    Redis keeps one unacknowledged-message index per database and every
+    worker redelivers whatever in it is overdue, so each profile gets its
+    own index and a timeout sized to its own queues: a notifications
+    worker no longer waits three hours to redeliver a lost reminder, nor
+    redelivers a report still running on the analytics worker.
+    """
+    if not broker_url.startswith(('redis://', 'rediss://')):
+        return {}
+    options = {'visibility_timeout': visibility_timeout(WORKER_PROFILES[profile]['queues'])}
+    for key in ('unacked', 'unacked_index', 'unacked_mutex'):
+        options[f'{key}_key'] = f'{key}-{profile}'
+    return options
+
+def _redis_url(url, db):
+    parts = urlsplit(url)
+    return urlunsplit((parts.scheme, parts.netloc, f'/{db}', parts.query, parts.fragment))
+
+def broker_settings(mode=None, env=os.environ):
+    """Broker and result backend for 'sqs' (AWS) or 'redis' (local development)"""
+    mode = mode or env.get('CELERY_BROKER', 'sqs' if env.get('SQS_URL') else 'redis')
+    # Covers every queue; ehs_backend.worker narrows it per profile on Redis
+    timeout = visibility_timeout()
+    redis_url = env.get('REDIS_URL') or env.get('ELASTICACHE_URL') or 'redis://localhost:6379/0'
+
+    if mode == 'sqs':
+        settings = {
+            'broker_url': 'sqs://',
+            'broker_transport_options': {
+                'region': env.get('AWS_REGION', 'ap-south-1'),
+                'visibility_timeout': timeout,
+                'polling_interval': 1,
+                # e.g. "production-" for the production-ehs-* queues
+                'queue_name_prefix': env.get('SQS_QUEUE_PREFIX', ''),
+                'wait_time_seconds': 20,
+            },
+        }
+    elif mode == 'redis':
+        settings = {
+            'broker_url': env.get('CELERY_BROKER_URL') or _redis_url(redis_url, REDIS_BROKER_DB),
+            'broker_transport_options': {'visibility_timeout': timeout},
+        }
+    else:
+        raise ValueError("CELERY_BROKER must be 'sqs' or 'redis'")
+
+    settings['result_backend'] = env.get('CELERY_RESULT_BACKEND') or _redis_url(redis_url, REDIS_RESULT_DB)
+    return settings
+
+def build_celery_config(mode=None, env=os.environ):
+    return dict(
+        broker_settings(mode, env),
+        broker_connection_retry_on_startup=True,
+        result_expires=24 * 3600,
+        task_default_queue=DEFAULT_QUEUE,
+        task_queues=[Queue(name, routing_key=name) for name in QUEUES],
+        task_routes=TASK_ROUTES,
+        task_annotations=[QueueAnnotations()],
+    )
+
+def _profile_setting(profile, name, default):
+    """Per-profile override from the environment, e.g. CELERY_IMAGES_CONCURRENCY"""
+    return os.getenv(f'CELERY_{profile.upper()}_{name.upper()}', default)
+
+def worker_argv(profile, hostname=None):
+    """`celery worker` arguments for a worker profile"""
+    if profile not in WORKER_PROFILES:
+        raise ValueError(f"Unknown worker profile {profile!r}; choose from {', '.join(WORKER_PROFILES)}")
+    spec = WORKER_PROFILES[profile]
+    argv = [
+        'worker',
+        '--loglevel', os.getenv('CELERY_LOG_LEVEL', 'INFO'),
+        '--hostname', hostname or f'{profile}@%h',
+        '--queues', ','.join(spec['queues']),
+        '--pool', _profile_setting(profile, 'pool', spec['pool']),
+        '--prefetch-multiplier', str(_profile_setting(profile, 'prefetch_multiplier', spec['prefetch_multiplier'])),
+    ]
+    concurrency = _profile_setting(profile, 'concurrency', spec['concurrency'])
+    if concurrency:
+        argv += ['--concurrency', str(concurrency)]
+    for name in ('max_tasks_per_child', 'max_memory_per_child'):
+        value = _profile_setting(profile, name, spec.get(name))
+        if value:
+            argv += [f"--{name.replace('_', '-')}", str(value)]
+    return argv
@@ -0,0 +1,185 @@
+import contextvars
+import logging
+import random
+import threading
+import time
+from contextlib import contextmanager
+from django.conf import settings
+from django.core.cache import cache
+from django.db import connections
+from rest_framework.permissions import SAFE_METHODS
+
+logger = logging.getLogger(__name__)
+
+PRIMARY = 'default'
+
+class RoutingState:
+    """What the current request or task may read from, and whether it wrote"""
+    def __init__(self, replica_allowed=False):
+        self.replica_allowed = replica_allowed
+        self.wrote = False
+
+_state = contextvars.ContextVar('db_routing_state', default=None)
+
+@contextmanager
+def routing_context(replica_allowed=False):
+    state = RoutingState(replica_allowed)
+    token = _state.set(state)
+    try:
+        yield state
+    finally:
+        _state.reset(token)
+
+@contextmanager
+def use_replica():
+    """Send reads inside the block to a replica (until the block writes)"""
+    state = _state.get()
+    if state is None:
+        with routing_context(replica_allowed=True) as state:
+            yield state
+        return
+    previous = state.replica_allowed
+    state.replica_allowed = True
+    try:
+        yield state
+    finally:
+        state.replica_allowed = previous
+
+@contextmanager
+def use_primary():
+    """Keep reads inside the block on the primary, e.g. right after a write"""
+    state = _state.get()
+    if state is None:
+        yield
+        return
+    previous = state.replica_allowed
+    state.replica_allowed = False
+    try:
+        yield
+    finally:
+        state.replica_allowed = previous
+
+def replicas_configured():
+    return bool(settings.DATABASE_REPLICAS)
+
+def _pin_key(user_id):
+    return f'db-pin:user:{user_id}'
+
+def pin_to_primary(user_id):
+    """Read-your-writes: keep this user's reads on the primary for a while"""
+    cache.set(_pin_key(user_id), 1, settings.READ_YOUR_WRITES_SECONDS)
+
+def is_pinned(user_id):
+    return user_id is not None and cache.get(_pin_key(user_id)) is not None
+
+class ReplicaLag:
+    """Replication lag per replica, measured at most once per interval per process.
+
+    Unreachable replicas report None and are skipped until the next check.
+    """
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.checked = {}
+
+    def measure(self, alias):
+        connection = connections[alias]
+        if connection.vendor != 'postgresql':
+            return 0.0
+        with connection.cursor() as cursor:
+            # Zero when everything received has been replayed, so an idle
+            # primary does not make the replica look behind
+            cursor.execute(
+                "SELECT CASE WHEN pg_last_wal_receive_lsn() = pg_last_wal_replay_lsn() THEN 0 "
+                "ELSE COALESCE(EXTRACT(EPOCH FROM now() - pg_last_xact_replay_timestamp()), 0) END"
+            )
+            return float(cursor.fetchone()[0])
+
+    def get(self, alias):
+        now = time.monotonic()
+        with self.lock:
+            entry = self.checked.get(alias)
+            if entry is not None and now - entry[0] < settings.REPLICA_LAG_CHECK_INTERVAL:
+                return entry[1]
+            # Claim the check so concurrent threads keep the previous value
+            self.checked[alias] = (now, entry[1] if entry else None)
+        try:
+            lag = self.measure(alias)
+        except Exception:
+            logger.warning("Replica %s unavailable", alias, exc_info=True)
+            lag = None
+        with self.lock:
+            self.checked[alias] = (time.monotonic(), lag)
+        return lag
+
+    def healthy(self, aliases):
+        return [
+            alias for alias in aliases
+            if (lag := self.get(alias)) is not None and lag <= settings.REPLICA_MAX_LAG_SECONDS
+        ]
+
+    def reset(self):
+        with self.lock:
+            self.checked.clear()
+
+replica_lag = ReplicaLag()
+
+class ReplicaRouter:
+    """Route opted-in reads to a read replica that is not lagging.
+
+    Reads only leave the primary inside use_replica() or a
+    ReplicaReadMixin action, never after the current request has written,
+    and not while the user is pinned to the primary after a recent write.
+    Everything else, including migrations and Celery tasks outside the
+    analytics reads they wrap in use_replica(), uses the primary.
+    """
+    def db_for_read(self, model, **hints):
+        state = _state.get()
+        if state is None or not state.replica_allowed or state.wrote:
+            return None
+        candidates = replica_lag.healthy(settings.DATABASE_REPLICAS)
+        return random.choice(candidates) if candidates else PRIMARY
+
+    def db_for_write(self, model, **hints):
+        state = _state.get()
+        if state is not None:
+            state.wrote = True
+        return PRIMARY
+
+    def allow_relation(self, obj1, obj2, **hints):
+        databases = {PRIMARY, *settings.DATABASE_REPLICAS}
+        if obj1._state.db in databases and obj2._state.db in databases:
+            return True
+        return None
+
+    def allow_migrate(self, db, app_label, model_name=None, **hints):
+        # Replicas receive schema changes through replication
+        return db not in settings.DATABASE_REPLICAS
+
+class ReplicaRoutingMiddleware:
+    """Track writes per request and pin writers to the primary afterwards"""
+    def __init__(self, get_response):
+        self.get_response = get_response
+
+    def __call__(self, request):
+        with routing_context() as state:
+            response = self.get_response(request)
+        # DRF copies the authenticated user onto the Django request
+        user = getattr(request, 'user', None)
+        if state.wrote and user is not None and user.is_authenticated:
+            pin_to_primary(user.pk)
+        return response
+
+class ReplicaReadMixin:
+    """Serve safe requests for `replica_actions` from a read replica"""
+    replica_actions = ('list',)
+
+    def initial(self, request, *args, **kwargs):
+        super().initial(request, *args, **kwargs)
+        state = _state.get()
+        if (
+            state is not None
+            and request.method in SAFE_METHODS
+            and self.action in self.replica_actions
+            and not is_pinned(request.user.pk)
+        ):
+            state.replica_allowed = True
@@ -0,0 +1,171 @@
+import bisect
+import importlib.util
+import logging
+import os
+import threading
+import time
+
+logger = logging.getLogger(__name__)
+
+# How application processes hold PostgreSQL connections:
+#   persistent  one connection per worker thread kept for DB_CONN_MAX_AGE
+#               seconds and health-checked before reuse (default)
+#   pool        psycopg 3 connection pool per process (Django >= 5.1),
+#               falls back to persistent connections elsewhere
+#   pgbouncer   persistent connections to a PgBouncer in transaction
+#               pooling mode: no server-side cursors or prepared statements
+#   direct      a new connection per request (CONN_MAX_AGE = 0)
+CONNECTION_MODES = ('persistent', 'pool', 'pgbouncer', 'direct')
+
+# Upper bounds (ms) of the connection acquire latency histogram
+ACQUIRE_BUCKETS_MS = (1, 2.5, 5, 10, 25, 50, 100, 250, 500, 1000, 2500)
+
+def _pool_supported():
+    import django
+    return django.VERSION >= (5, 1) and importlib.util.find_spec('psycopg_pool') is not None
+
+def _uses_psycopg3():
+    return importlib.util.find_spec('psycopg') is not None
+
+def build_databases(mode=None, env=os.environ):
+    """DATABASES setting for the configured connection mode"""
+    mode = mode or env.get('DB_CONNECTION_MODE', 'persistent')
+    if mode not in CONNECTION_MODES:
+        raise ValueError(f"DB_CONNECTION_MODE must be one of {', '.join(CONNECTION_MODES)}")
+
+    options = {
+        'connect_timeout': int(env.get('DB_CONNECT_TIMEOUT', '5')),
+    }
+    config = {
+        # Times connection setup, see ehs_backend.postgresql
+        'ENGINE': 'ehs_backend.postgresql',
+        'NAME': env.get('DB_NAME', 'ehs_db'),
+        'USER': env.get('DB_USER', 'postgres'),
+        'PASSWORD': env.get('DB_PASSWORD', 'postgres'),
+        'HOST': env.get('DB_HOST', 'localhost'),
+        'PORT': env.get('DB_PORT', '5432'),
+        'CONN_MAX_AGE': int(env.get('DB_CONN_MAX_AGE', '60')),
+        # Ping reused connections once per request so a connection dropped
+        # by RDS failover or an idle timeout is replaced instead of failing
+        'CONN_HEALTH_CHECKS': True,
+        'OPTIONS': options,
+    }
+
+    if mode == 'pool' and not _pool_supported():
+        logger.warning("Connection pooling needs Django >= 5.1 and psycopg_pool; using persistent connections")
+        mode = 'persistent'
+    if mode == 'pool':
+        # The pool owns connection lifetime; Django must not close them
+        config['CONN_MAX_AGE'] = 0
+        options['pool'] = {
+            'min_size': int(env.get('DB_POOL_MIN_SIZE', '2')),
+            'max_size': int(env.get('DB_POOL_MAX_SIZE', '10')),
+            'timeout': float(env.get('DB_POOL_TIMEOUT', '10')),
+            'max_idle': float(env.get('DB_POOL_MAX_IDLE', '300')),
+        }
+    elif mode == 'pgbouncer':
+        # Named cursors and prepared statements live in a server session,
+        # which transaction pooling hands to another client after COMMIT
+        config['DISABLE_SERVER_SIDE_CURSORS'] = True
+        if _uses_psycopg3():
+            options['prepare_threshold'] = None
+    elif mode == 'direct':
+        config['CONN_MAX_AGE'] = 0
+    config['CONNECTION_MODE'] = mode
+
+    databases = {'default': config}
+    # Read replicas share credentials and options with the primary; tests
+    # mirror them onto the primary's test database
+    hosts = [host for host in env.get('DB_REPLICA_HOSTS', '').split(',') if host]
+    for index, host in enumerate(hosts, start=1):
+        host, _, port = host.partition(':')
+        databases[f'replica{index}'] = dict(
+            config,
+            HOST=host,
+            PORT=port or config['PORT'],
+            OPTIONS=dict(options),
+            TEST={'MIRROR': 'default'},
+        )
+    return databases
+
+def replica_aliases(databases):
+    return [alias for alias in databases if alias.startswith('replica')]
+
+class AcquireStats:
+    """Per-process histogram of connection acquire latency per alias"""
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.aliases = {}
+
+    def _alias(self, alias):
+        if alias not in self.aliases:
+            self.aliases[alias] = {
+                'connects': 0,
+                'failures': 0,
+                'sum_ms': 0.0,
+                'max_ms': 0.0,
+                'buckets': [0] * (len(ACQUIRE_BUCKETS_MS) + 1),
+            }
+        return self.aliases[alias]
+
+    def record(self, alias, elapsed_ms):
+        with self.lock:
+            stats = self._alias(alias)
+            if elapsed_ms is None:
+                stats['failures'] += 1
+                return
+            stats['connects'] += 1
+            stats['sum_ms'] += elapsed_ms
+            stats['max_ms'] = max(stats['max_ms'], elapsed_ms)
+            stats['buckets'][bisect.bisect_left(ACQUIRE_BUCKETS_MS, elapsed_ms)] += 1
+
+    def snapshot(self, alias):
+        with self.lock:
+            stats = self._alias(alias)
+            result = {
+                'connects': stats['connects'],
+                'failures': stats['failures'],
+                'avg_ms': round(stats['sum_ms'] / stats['connects'], 3) if stats['connects'] else None,
+                'max_ms': round(stats['max_ms'], 3),
+                'buckets_ms': {
+                    str(bound): count
+                    for bound, count in zip(ACQUIRE_BUCKETS_MS + ('+Inf',), stats['buckets'])
+                },
+            }
+        return result
+
+    def reset(self):
+        with self.lock:
+            self.aliases.clear()
+
+acquire_stats = AcquireStats()
+
+def alias_health(alias):
+    """Round-trip latency, connection settings and acquire stats for one alias"""
+    from django.db import connections
+
+    connection = connections[alias]
+    result = {
+        'vendor': connection.vendor,
+        'mode': connection.settings_dict.get('CONNECTION_MODE', 'persistent'),
+        'conn_max_age': connection.settings_dict.get('CONN_MAX_AGE'),
+    }
+    started = time.perf_counter()
+    try:
+        with connection.cursor() as cursor:
+            cursor.execute('SELECT 1')
+            cursor.fetchone()
+    except Exception as e:
+        result.update({'healthy': False, 'error': str(e)})
+    else:
+        result.update({
+            'healthy': True,
+            'latency_ms': round((time.perf_counter() - started) * 1000, 3),
+        })
+    result['acquire'] = acquire_stats.snapshot(alias)
+    return result
+
+def database_health(aliases=None):
+    from django.conf import settings
+
+    return {alias: alias_health(alias) for alias in (aliases or settings.DATABASES)}
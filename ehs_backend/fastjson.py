@@ -0,0 +1,97 @@
+import codecs
+import datetime
+import decimal
+import functools
+import importlib
+import importlib.util
+import json
+from django.conf import settings
+from django.core.serializers.json import DjangoJSONEncoder
+from rest_framework.exceptions import ParseError
+from rest_framework.parsers import JSONParser
+from rest_framework.renderers import JSONRenderer
+from rest_framework.settings import api_settings
+from rest_framework.utils import encoders
+
+# orjson encodes and decodes several times faster than the json module;
+# without it everything here falls back to json with the same output
+orjson = importlib.import_module('orjson') if importlib.util.find_spec('orjson') else None
+
+# Datetimes go through the encoder so they keep its format ('Z' for UTC
+# in DRF's, millisecond precision in Django's); int keys become strings
+# as with json
+_ORJSON_OPTIONS = orjson.OPT_PASSTHROUGH_DATETIME | orjson.OPT_NON_STR_KEYS if orjson else 0
+
+class JSONEncoder(encoders.JSONEncoder):
+    """DRF's encoder, with raw Decimals rendered like serializer DecimalFields.
+
+    Aggregates and computed amounts come out as strings while
+    COERCE_DECIMAL_TO_STRING is on (the default), so money keeps its exact
+    value instead of becoming a float.
+    """
+    def default(self, obj):
+        if isinstance(obj, decimal.Decimal):
+            return str(obj) if api_settings.COERCE_DECIMAL_TO_STRING else float(obj)
+        return super().default(obj)
+
+@functools.lru_cache(maxsize=None)
+def _default(encoder_class):
+    encode = encoder_class().default
+
+    def default(obj):
+        # Plain dates are the commonest passthrough value (appointment and
+        # rollup dates); skip the encoder's isinstance chain for them
+        if type(obj) is datetime.date:
+            return obj.isoformat()
+        return encode(obj)
+    return default
+
+def dumps(data, encoder_class=JSONEncoder):
+    """Compact UTF-8 JSON of `data`; `encoder_class` encodes non-JSON types"""
+    if orjson is not None:
+        try:
+            return orjson.dumps(data, default=_default(encoder_class), option=_ORJSON_OPTIONS)
+        except orjson.JSONEncodeError:
+            # e.g. integers wider than 64 bits; json raises for what is
+            # really unserializable
+            pass
+    return json.dumps(data, cls=encoder_class, ensure_ascii=False, separators=(',', ':')).encode()
+
+def loads(content):
+    return orjson.loads(content) if orjson is not None else json.loads(content)
+
+def json_safe(data):
+    """`data` as a client would decode it: plain dicts, lists, strings and numbers"""
+    return loads(dumps(data, DjangoJSONEncoder))
+
+class FastJSONRenderer(JSONRenderer):
+    """JSONRenderer on orjson, with the same output as DRF's json path.
+
+    Indented (browsable API, `indent=` in Accept), ASCII-only and
+    non-compact output are left to DRF. NaN and infinity render as null
+    rather than raising.
+    """
+    encoder_class = JSONEncoder
+
+    def render(self, data, accepted_media_type=None, renderer_context=None):
+        if (
+            orjson is None or data is None or self.ensure_ascii or not self.compact
+            or self.get_indent(accepted_media_type, renderer_context or {}) is not None
+        ):
+            return super().render(data, accepted_media_type, renderer_context)
+        content = dumps(data, self.encoder_class)
+        if b'\xe2\x80\xa8' in content or b'\xe2\x80\xa9' in content:
+            # Escaped like DRF does, so the output is safe inside <script>
+            content = content.replace(b'\xe2\x80\xa8', b'\\u2028').replace(b'\xe2\x80\xa9', b'\\u2029')
+        return content
+
+class FastJSONParser(JSONParser):
+    """JSONParser on orjson for UTF-8 bodies; NaN and Infinity are rejected"""
+    def parse(self, stream, media_type=None, parser_context=None):
+        encoding = (parser_context or {}).get('encoding', settings.DEFAULT_CHARSET)
+        if orjson is None or not self.strict or codecs.lookup(encoding).name != 'utf-8':
+            return super().parse(stream, media_type, parser_context)
+        try:
+            return orjson.loads(stream.read())
+        except orjson.JSONDecodeError as exc:
+            raise ParseError(f'JSON parse error - {exc}')
@@ -0,0 +1,103 @@
+import json
+import os
+import subprocess
+import sys
+from collections import defaultdict
+
+# What each kind of process imports before it can do any work, and the
+# heavy packages it is expected to leave for first use
+TARGETS = {
+    'setup': {
+        'description': 'django.setup(), paid by every manage.py command (migrate, shell, ...)',
+        'code': 'import django; django.setup()',
+        'lazy': ('celery', 'kombu', 'fhir', 'PIL', 'hl7', 'hl7apy', 'pydicom', 'pyarrow'),
+    },
+    'wsgi': {
+        'description': 'A gunicorn worker: WSGI handler, middleware and URLconf',
+        'code': (
+            'from ehs_backend.wsgi import application\n'
+            'from django.urls import get_resolver\n'
+            'get_resolver().url_patterns'
+        ),
+        'lazy': ('celery', 'kombu', 'fhir', 'PIL', 'hl7', 'hl7apy', 'pydicom', 'pyarrow'),
+    },
+    'worker': {
+        'description': 'A Celery worker: the app and every task module',
+        'code': (
+            'import django; django.setup()\n'
+            'from ehs_backend.celery import app\n'
+            'app.loader.import_default_modules()'
+        ),
+        'lazy': ('pydicom',),
+    },
+}
+
+_CHILD = '''
+import json, platform, resource, sys, time
+started = time.perf_counter()
+{code}
+rss = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+print(json.dumps({{
+    'seconds': time.perf_counter() - started,
+    'max_rss_kb': rss // 1024 if platform.system() == 'Darwin' else rss,
+    'modules': sorted(sys.modules),
+}}))
+'''
+
+def parse_importtime(output):
+    """(module, self_us, cumulative_us, depth) rows from `python -X importtime` stderr"""
+    rows = []
+    for line in output.splitlines():
+        if not line.startswith('import time:'):
+            continue
+        self_us, cumulative_us, name = line[len('import time:'):].split('|', 2)
+        if not self_us.strip().isdigit():
+            # Header line
+            continue
+        depth = (len(name) - len(name.lstrip(' ')) - 1) // 2
+        rows.append((name.strip(), int(self_us), int(cumulative_us), depth))
+    return rows
+
+def _run(target, settings_module):
+    env = dict(
+        os.environ,
+        DJANGO_SETTINGS_MODULE=settings_module,
+        PYTHONPATH=os.pathsep.join(path for path in sys.path if path),
+    )
+    # Byte-compiled files are kept, so only the first run measures compilation
+    completed = subprocess.run(
+        [sys.executable, '-X', 'importtime', '-c', _CHILD.format(code=TARGETS[target]['code'])],
+        capture_output=True, text=True, env=env, check=False
+    )
+    if completed.returncode:
+        raise RuntimeError(completed.stderr.strip().splitlines()[-1])
+    return json.loads(completed.stdout.strip().splitlines()[-1]), parse_importtime(completed.stderr)
+
+def profile_imports(target, top=25, repeat=3, settings_module=None):
+    """Import profile of a fresh interpreter starting `target`; fastest of `repeat` runs"""
+    settings_module = settings_module or os.environ.get('DJANGO_SETTINGS_MODULE', 'ehs_backend.settings')
+    runs = [_run(target, settings_module) for _ in range(max(1, repeat))]
+    summary, rows = min(runs, key=lambda run: run[0]['seconds'])
+
+    packages = defaultdict(int)
+    for name, self_us, _, _ in rows:
+        packages[name.split('.', 1)[0]] += self_us
+    loaded = {name.split('.', 1)[0] for name in summary['modules']}
+    return {
+        'target': target,
+        'description': TARGETS[target]['description'],
+        'startup_ms': round(summary['seconds'] * 1000, 1),
+        'import_ms': round(sum(cumulative for _, _, cumulative, depth in rows if depth == 0) / 1000, 1),
+        'max_rss_mb': round(summary['max_rss_kb'] / 1024, 1),
+        'modules': len(summary['modules']),
+        'slowest_modules': [
+            {'module': name, 'cumulative_ms': round(cumulative / 1000, 1), 'self_ms': round(self_us / 1000, 1)}
+            for name, self_us, cumulative, _ in sorted(rows, key=lambda row: row[2], reverse=True)[:top]
+        ],
+        'slowest_packages': [
+            {'package': package, 'self_ms': round(total / 1000, 1)}
+            for package, total in sorted(packages.items(), key=lambda item: item[1], reverse=True)[:top]
+        ],
+        # Heavy packages this target was expected to leave for first use
+        'eagerly_loaded': sorted(loaded.intersection(TARGETS[target]['lazy'])),
+    }
@@ -0,0 +1,174 @@
+import logging
+import os
+import threading
+import time
+from django.conf import settings
+from django.core.exceptions import MiddlewareNotUsed
+from django.db import connections
+from prometheus_client import (
+    REGISTRY, CollectorRegistry, Counter, Gauge, Histogram, generate_latest, multiprocess
+)
+from prometheus_client.core import GaugeMetricFamily
+
+logger = logging.getLogger(__name__)
+
+# Under gunicorn every worker writes its samples to files in this
+# directory and /metrics sums them (see gunicorn.conf.py); it must be set
+# before prometheus_client is imported
+MULTIPROCESS = bool(os.getenv('PROMETHEUS_MULTIPROC_DIR'))
+
+LATENCY_BUCKETS_S = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 30)
+QUERY_BUCKETS = (0, 1, 2, 3, 5, 10, 20, 50, 100, 250)
+
+REQUEST_LATENCY = Histogram(
+    'ehs_http_request_duration_seconds', 'Request latency by view and method',
+    ['method', 'view'], buckets=LATENCY_BUCKETS_S
+)
+REQUESTS = Counter(
+    'ehs_http_requests', 'Requests by view, method and status class', ['method', 'view', 'status']
+)
+REQUEST_QUERIES = Histogram(
+    'ehs_http_request_db_queries', 'Database queries per request by view', ['view'], buckets=QUERY_BUCKETS
+)
+DB_QUERIES = Counter('ehs_db_queries', 'Database queries by alias', ['alias'])
+CACHE_LOOKUPS = Counter('ehs_cache_lookups', 'Cache lookups by alias and result', ['alias', 'result'])
+# Saturation: sum(ehs_http_requests_in_progress) / sum(ehs_gunicorn_worker_capacity)
+IN_PROGRESS = Gauge(
+    'ehs_http_requests_in_progress', 'Requests being handled', multiprocess_mode='livesum'
+)
+WORKER_CAPACITY = Gauge(
+    'ehs_gunicorn_worker_capacity', 'Requests the live workers can handle at once', multiprocess_mode='livesum'
+)
+WORKERS = Gauge('ehs_gunicorn_workers', 'Live gunicorn worker processes', multiprocess_mode='livesum')
+
+def worker_started(capacity):
+    """Called by gunicorn's post_fork hook in every new worker"""
+    WORKERS.set(1)
+    WORKER_CAPACITY.set(capacity)
+
+def record_cache_lookups(alias, hits, misses):
+    if hits:
+        CACHE_LOOKUPS.labels(alias, 'hit').inc(hits)
+    if misses:
+        CACHE_LOOKUPS.labels(alias, 'miss').inc(misses)
+
+class _QueryCounter:
+    def __init__(self, alias):
+        self.alias = alias
+        self.count = 0
+
+    def __call__(self, execute, sql, params, many, context):
+        self.count += 1
+        return execute(sql, params, many, context)
+
+class MetricsMiddleware:
+    """Latency, status and query count per view, and requests in progress.
+
+    Outermost in MIDDLEWARE so the latency covers the whole stack. Views
+    are labelled by URL name, which keeps label cardinality bounded;
+    unmatched paths share one label.
+    """
+    def __init__(self, get_response):
+        if not settings.METRICS_ENABLED:
+            raise MiddlewareNotUsed
+        self.get_response = get_response
+
+    def __call__(self, request):
+        counters = [_QueryCounter(connection.alias) for connection in connections.all()]
+        IN_PROGRESS.inc()
+        started = time.perf_counter()
+        try:
+            with _wrap(counters):
+                response = self.get_response(request)
+        finally:
+            IN_PROGRESS.dec()
+        elapsed = time.perf_counter() - started
+
+        match = getattr(request, 'resolver_match', None)
+        view = (match.view_name or match.route) if match else 'unmatched'
+        if view == 'metrics':
+            return response
+        REQUEST_LATENCY.labels(request.method, view).observe(elapsed)
+        REQUESTS.labels(request.method, view, f'{response.status_code // 100}xx').inc()
+        REQUEST_QUERIES.labels(view).observe(sum(counter.count for counter in counters))
+        for counter in counters:
+            if counter.count:
+                DB_QUERIES.labels(counter.alias).inc(counter.count)
+        return response
+
+class _wrap:
+    def __init__(self, counters):
+        self.wrappers = [
+            connections[counter.alias].execute_wrapper(counter) for counter in counters
+        ]
+
+    def __enter__(self):
+        for wrapper in self.wrappers:
+            wrapper.__enter__()
+
+    def __exit__(self, *exc_info):
+        for wrapper in reversed(self.wrappers):
+            wrapper.__exit__(*exc_info)
+
+class CeleryQueueCollector:
+    """Messages waiting per Celery queue, read from the broker at scrape time.
+
+    Depths are cached per process for METRICS_QUEUE_DEPTH_INTERVAL
+    seconds so frequent scrapes don't turn into broker (SQS API) calls.
+    """
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.checked = 0.0
+        self.depths = {}
+
+    def read_depths(self):
+        from .celery import app
+        from .celery_topology import QUEUES
+
+        depths = {}
+        with app.connection_for_read(connect_timeout=2) as connection:
+            connection.ensure_connection(max_retries=1)
+            channel = connection.default_channel
+            for queue in QUEUES:
+                try:
+                    depths[queue] = channel.queue_declare(queue, passive=True).message_count
+                except Exception:
+                    # Not declared yet: nothing has been sent to it
+                    depths[queue] = 0
+        return depths
+
+    def current(self):
+        with self.lock:
+            if time.monotonic() - self.checked >= settings.METRICS_QUEUE_DEPTH_INTERVAL:
+                try:
+                    self.depths = self.read_depths()
+                except Exception:
+                    logger.warning("Could not read Celery queue depths", exc_info=True)
+                    self.depths = {}
+                self.checked = time.monotonic()
+            return dict(self.depths)
+
+    def collect(self):
+        family = GaugeMetricFamily('ehs_celery_queue_depth', 'Messages waiting in each Celery queue', labels=['queue'])
+        for queue, depth in sorted(self.current().items()):
+            family.add_metric([queue], depth)
+        yield family
+
+queue_collector = CeleryQueueCollector()
+_scrape_time_registry = CollectorRegistry()
+_scrape_time_registry.register(queue_collector)
+
+def render():
+    """Exposition text for every process: HTTP/DB/cache, queue depths, task metrics"""
+    from .task_metrics import prometheus_text
+
+    if MULTIPROCESS:
+        registry = CollectorRegistry()
+        multiprocess.MultiProcessCollector(registry)
+    else:
+        registry = REGISTRY
+    return (
+        generate_latest(registry)
+        + generate_latest(_scrape_time_registry)
+        + prometheus_text().encode()
+    )
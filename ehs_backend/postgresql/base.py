@@ -0,0 +1,20 @@
+import time
+from django.db.backends.postgresql import base
+from ehs_backend.db_topology import acquire_stats
+
+class DatabaseWrapper(base.DatabaseWrapper):
+    """PostgreSQL backend recording how long acquiring a connection takes.
+
+    Covers opening a new connection (TCP, TLS, auth) and, in pool mode,
+    checking one out of the pool; reused persistent connections cost
+    nothing and are not counted.
+    """
+    def get_new_connection(self, conn_params):
+        started = time.perf_counter()
+        try:
+            connection = super().get_new_connection(conn_params)
+        except Exception:
+            acquire_stats.record(self.alias, None)
+            raise
+        acquire_stats.record(self.alias, (time.perf_counter() - started) * 1000)
+        return connection
@@ -0,0 +1,157 @@
+import contextvars
+import json
+import logging
+import re
+import time
+from collections import Counter
+from contextlib import ExitStack, contextmanager
+from django.conf import settings
+from django.db import connections
+
+logger = logging.getLogger(__name__)
+
+PROFILE_HEADER = 'X-Profile-Queries'
+
+_IN_LIST = re.compile(r'IN \((?:%s, )*%s\)')
+_LITERAL = re.compile(r"'(?:[^']|'')*'|\b\d+(?:\.\d+)?\b")
+_WHITESPACE = re.compile(r'\s+')
+
+def fingerprint(sql):
+    """SQL with literals and IN lists collapsed, so repeats of one query compare equal"""
+    sql = _IN_LIST.sub('IN (...)', sql)
+    sql = _LITERAL.sub('?', sql)
+    return _WHITESPACE.sub(' ', sql).strip()
+
+class QueryProfile:
+    """Queries, DB time and serializer time recorded for one request or block"""
+    def __init__(self):
+        self.count = 0
+        self.db_ms = 0.0
+        self.serializer_ms = 0.0
+        self.fingerprints = Counter()
+        self.started = time.perf_counter()
+
+    def __call__(self, execute, sql, params, many, context):
+        # connection.execute_wrapper hook
+        started = time.perf_counter()
+        try:
+            return execute(sql, params, many, context)
+        finally:
+            self.db_ms += (time.perf_counter() - started) * 1000
+            self.count += 1
+            self.fingerprints[fingerprint(sql)] += 1
+
+    @property
+    def total_ms(self):
+        return (time.perf_counter() - self.started) * 1000
+
+    def duplicates(self):
+        """Fingerprints executed more than once, most repeated first"""
+        return [(sql, count) for sql, count in self.fingerprints.most_common() if count > 1]
+
+    def n_plus_one(self, threshold=None):
+        """Queries repeated often enough to look like a per-row lookup"""
+        threshold = threshold or settings.QUERY_PROFILING_N_PLUS_ONE_THRESHOLD
+        return [(sql, count) for sql, count in self.duplicates() if count >= threshold]
+
+    def server_timing(self):
+        return ', '.join([
+            f'db;dur={self.db_ms:.1f};desc="{self.count} queries"',
+            f'serializer;dur={self.serializer_ms:.1f}',
+            f'total;dur={self.total_ms:.1f}',
+        ])
+
+    def as_dict(self):
+        return {
+            'queries': self.count,
+            'db_ms': round(self.db_ms, 2),
+            'serializer_ms': round(self.serializer_ms, 2),
+            'total_ms': round(self.total_ms, 2),
+            'duplicates': [{'sql': sql, 'count': count} for sql, count in self.duplicates()[:10]],
+            'n_plus_one': [{'sql': sql, 'count': count} for sql, count in self.n_plus_one()],
+        }
+
+_current = contextvars.ContextVar('query_profile', default=None)
+
+@contextmanager
+def profile_queries():
+    """Record every query on every database alias run inside the block"""
+    profile = QueryProfile()
+    token = _current.set(profile)
+    try:
+        with ExitStack() as stack:
+            for connection in connections.all():
+                stack.enter_context(connection.execute_wrapper(profile))
+            yield profile
+    finally:
+        _current.reset(token)
+
+def install_serializer_timing():
+    """Time top-level serializer `.data` access into the active profile.
+
+    Nested serializers go through to_representation, not `.data`, so each
+    response's serialization is counted once. Queries triggered by lazy
+    querysets while serializing are included in the serializer time.
+    """
+    from rest_framework import serializers
+
+    for cls in (serializers.Serializer, serializers.ListSerializer):
+        prop = cls.__dict__['data']
+        if getattr(prop.fget, '_profiled', False):
+            continue
+
+        def timed(self, _fget=prop.fget):
+            profile = _current.get()
+            if profile is None:
+                return _fget(self)
+            started = time.perf_counter()
+            try:
+                return _fget(self)
+            finally:
+                profile.serializer_ms += (time.perf_counter() - started) * 1000
+
+        timed._profiled = True
+        cls.data = property(timed, doc=prop.__doc__)
+
+class QueryProfilingMiddleware:
+    """Per-request query count, DB time, duplicates and serializer time.
+
+    QUERY_PROFILING is 'on' (every request), 'header' (requests sending
+    X-Profile-Queries: 1) or 'off'. Results go to the `Server-Timing`
+    header, visible to staff or under DEBUG, and to a structured log line
+    on the ehs_backend.profiling logger; likely N+1 patterns are logged
+    as warnings.
+    """
+    def __init__(self, get_response):
+        self.get_response = get_response
+        self.mode = settings.QUERY_PROFILING
+        if self.mode != 'off':
+            install_serializer_timing()
+
+    def enabled(self, request):
+        if self.mode == 'on':
+            return True
+        return self.mode == 'header' and request.headers.get(PROFILE_HEADER) == '1'
+
+    def __call__(self, request):
+        if not self.enabled(request):
+            return self.get_response(request)
+
+        with profile_queries() as profile:
+            response = self.get_response(request)
+
+        user = getattr(request, 'user', None)
+        if settings.DEBUG or (user is not None and user.is_staff):
+            response['Server-Timing'] = profile.server_timing()
+
+        record = dict(
+            profile.as_dict(),
+            method=request.method,
+            path=request.path,
+            status=response.status_code,
+        )
+        if record['n_plus_one']:
+            logger.warning("Likely N+1 queries: %s", json.dumps(record))
+        else:
+            logger.info("Query profile: %s", json.dumps(record))
+        return response
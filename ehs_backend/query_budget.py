@@ -0,0 +1,32 @@
+from contextlib import contextmanager
+import pytest
+from ehs_backend.profiling import profile_queries
+
+def _report(profile):
+    lines = [f'{count:>4} x {sql}' for sql, count in profile.fingerprints.most_common(15)]
+    return '\n'.join(lines)
+
+@pytest.fixture
+def query_budget():
+    """Fail the test when the block exceeds a query budget.
+
+        with query_budget(queries=3, duplicates=0):
+            client.get('/api/appointments/')
+
+    `queries` caps the total count, `duplicates` the number of repeated
+    fingerprints, and likely N+1 patterns fail unless `n_plus_one=True`.
+    """
+    @contextmanager
+    def budget(queries=None, duplicates=None, n_plus_one=False):
+        with profile_queries() as profile:
+            yield profile
+        failures = []
+        if queries is not None and profile.count > queries:
+            failures.append(f'{profile.count} queries, budget {queries}')
+        if duplicates is not None and len(profile.duplicates()) > duplicates:
+            failures.append(f'{len(profile.duplicates())} duplicated queries, budget {duplicates}')
+        if not n_plus_one and profile.n_plus_one():
+            failures.append(f'likely N+1: {profile.n_plus_one()[0][1]} repeats of one query')
+        if failures:
+            pytest.fail('Query budget exceeded: ' + '; '.join(failures) + '\n' + _report(profile))
+    return budget
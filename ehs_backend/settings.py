@@ -1,5 +1,7 @@
 import os
 from pathlib import Path
+from .cache_topology import build_caches
+from .db_topology import build_databases, replica_aliases
 
 # Build paths inside the project like this: BASE_DIR / 'subdir'.
 BASE_DIR = Path(__file__).resolve().parent.parent
@@ -26,6 +28,11 @@ INSTALLED_APPS = [
     'django_otp',
     'django_otp.plugins.otp_totp',
     'django_otp.plugins.otp_static',
+    # Health checks served under /api/health/
+    'health_check',
+    'health_check.db',
+    'health_check.cache',
+    'health_check.contrib.migrations',
     # Local apps
     'users',
     'patients',
@@ -38,12 +45,16 @@ INSTALLED_APPS = [
 AUTH_USER_MODEL = 'users.User'
 
 MIDDLEWARE = [
+    # First so request latency covers every other middleware
+    'ehs_backend.metrics.MetricsMiddleware',
     'django.middleware.security.SecurityMiddleware',
+    'ehs_backend.profiling.QueryProfilingMiddleware',
     'django.contrib.sessions.middleware.SessionMiddleware',
     'corsheaders.middleware.CorsMiddleware',
     'django.middleware.common.CommonMiddleware',
     'django.middleware.csrf.CsrfViewMiddleware',
     'django.contrib.auth.middleware.AuthenticationMiddleware',
+    'ehs_backend.db_router.ReplicaRoutingMiddleware',
     'django_otp.middleware.OTPMiddleware',  # Add OTP middleware
     'django.contrib.messages.middleware.MessageMiddleware',
     'django.middleware.clickjacking.XFrameOptionsMiddleware',
@@ -68,18 +79,41 @@ TEMPLATES = [
 ]
 
 WSGI_APPLICATION = 'ehs_backend.wsgi.application'
+ASGI_APPLICATION = 'ehs_backend.asgi.application'
 
-# Database
-DATABASES = {
-    'default': {
-        'ENGINE': 'django.db.backends.postgresql',
-        'NAME': os.getenv('DB_NAME', 'ehs_db'),
-        'USER': os.getenv('DB_USER', 'postgres'),
-        'PASSWORD': os.getenv('DB_PASSWORD', 'postgres'),
-        'HOST': os.getenv('DB_HOST', 'localhost'),
-        'PORT': os.getenv('DB_PORT', '5432'),
-    }
-}
+# Query profiling (ehs_backend.profiling): 'on', 'header' (requests sending
+# X-Profile-Queries: 1) or 'off'; a query repeated this many times in one
+# request is reported as a likely N+1
+QUERY_PROFILING = os.getenv('QUERY_PROFILING', 'on' if DEBUG else 'header')
+QUERY_PROFILING_N_PLUS_ONE_THRESHOLD = int(os.getenv('QUERY_PROFILING_N_PLUS_ONE_THRESHOLD', '5'))
+
+# Database: connection mode (persistent, pool, pgbouncer, direct) from
+# DB_CONNECTION_MODE, see ehs_backend.db_topology. Persistent connections
+# are held per worker thread, so size max_connections on RDS for
+# workers x threads per container
+DATABASES = build_databases()
+# Read replicas from DB_REPLICA_HOSTS (host[:port],...), used by
+# ehs_backend.db_router for opted-in reads (analytics, exports, listings)
+DATABASE_REPLICAS = replica_aliases(DATABASES)
+DATABASE_ROUTERS = ['ehs_backend.db_router.ReplicaRouter']
+# Replicas further behind than this are skipped; lag is re-measured at
+# most every REPLICA_LAG_CHECK_INTERVAL seconds per process
+REPLICA_MAX_LAG_SECONDS = float(os.getenv('REPLICA_MAX_LAG_SECONDS', '5'))
+REPLICA_LAG_CHECK_INTERVAL = float(os.getenv('REPLICA_LAG_CHECK_INTERVAL', '5'))
+# After writing, a user's reads stay on the primary this long
+READ_YOUR_WRITES_SECONDS = int(os.getenv('READ_YOUR_WRITES_SECONDS', '10'))
+
+# Caches: one Redis database per alias (default = API responses, sessions,
+# rate_limiting, locks) when REDIS_URL/ELASTICACHE_URL is set, otherwise a
+# local LocMem (or CACHE_FALLBACK=fakeredis) stand-in with the same aliases
+CACHES = build_caches()
+SESSION_ENGINE = os.getenv('SESSION_ENGINE', 'django.contrib.sessions.backends.cache')
+SESSION_CACHE_ALIAS = 'sessions'
+# JWT revocation list lives with the sessions; single-flight locks on their own alias
+TOKEN_CACHE_ALIAS = os.getenv('TOKEN_CACHE_ALIAS', 'sessions')
+LOCK_CACHE_ALIAS = os.getenv('LOCK_CACHE_ALIAS', 'locks')
+# Two-tier alias (in-process LRU over Redis) for hot keys
+LAYERED_CACHE_ALIAS = os.getenv('LAYERED_CACHE_ALIAS', 'layered')
 
 # Password validation
 AUTH_PASSWORD_VALIDATORS = [
@@ -97,6 +131,25 @@ AUTH_PASSWORD_VALIDATORS = [
     },
 ]
 
+# Password hashing: PASSWORD_HASHER picks the algorithm for new hashes;
+# tune the work factors with `manage.py benchmark_logins --hash-only`
+PASSWORD_HASHER = os.getenv('PASSWORD_HASHER', 'pbkdf2')
+PASSWORD_PBKDF2_ITERATIONS = int(os.getenv('PASSWORD_PBKDF2_ITERATIONS', '720000'))
+PASSWORD_ARGON2_TIME_COST = int(os.getenv('PASSWORD_ARGON2_TIME_COST', '2'))
+PASSWORD_ARGON2_MEMORY_COST = int(os.getenv('PASSWORD_ARGON2_MEMORY_COST', '102400'))
+PASSWORD_ARGON2_PARALLELISM = int(os.getenv('PASSWORD_ARGON2_PARALLELISM', '8'))
+CONFIGURED_PASSWORD_HASHERS = {
+    'pbkdf2': 'users.hashers.ConfiguredPBKDF2PasswordHasher',
+    'argon2': 'users.hashers.ConfiguredArgon2PasswordHasher',
+}
+PASSWORD_HASHERS = [CONFIGURED_PASSWORD_HASHERS[PASSWORD_HASHER]] + [
+    hasher for name, hasher in CONFIGURED_PASSWORD_HASHERS.items() if name != PASSWORD_HASHER
+] + [
+    'django.contrib.auth.hashers.PBKDF2SHA1PasswordHasher',
+    'django.contrib.auth.hashers.BCryptSHA256PasswordHasher',
+    'django.contrib.auth.hashers.ScryptPasswordHasher',
+]
+
 # Internationalization
 LANGUAGE_CODE = 'en-us'
 TIME_ZONE = 'UTC'
@@ -113,13 +166,96 @@ DEFAULT_AUTO_FIELD = 'django.db.models.BigAutoField'
 # REST Framework settings
 REST_FRAMEWORK = {
     'DEFAULT_AUTHENTICATION_CLASSES': (
-        'rest_framework_simplejwt.authentication.JWTAuthentication',
+        'users.authentication.StatelessJWTAuthentication',
     ),
     'DEFAULT_PERMISSION_CLASSES': (
         'rest_framework.permissions.IsAuthenticated',
     ),
+    # orjson-backed JSON (ehs_backend.fastjson); same output as DRF's own,
+    # which they fall back to when orjson is not installed
+    'DEFAULT_RENDERER_CLASSES': (
+        'ehs_backend.fastjson.FastJSONRenderer',
+        'rest_framework.renderers.BrowsableAPIRenderer',
+    ),
+    'DEFAULT_PARSER_CLASSES': (
+        'ehs_backend.fastjson.FastJSONParser',
+        'rest_framework.parsers.FormParser',
+        'rest_framework.parsers.MultiPartParser',
+    ),
 }
 
+# Reject logged-out tokens (users.authentication). Tokens of deactivated users
+# or users whose role or staff status changed are rejected regardless
+JWT_REVOCATION_ENABLED = os.getenv('JWT_REVOCATION_ENABLED', 'True') == 'True'
+
+# Bulk patient registry import (patients.imports): rows per transaction,
+# processes used for password hashing, and where uploaded files are stored
+PATIENT_IMPORT_CHUNK_SIZE = int(os.getenv('PATIENT_IMPORT_CHUNK_SIZE', '1000'))
+PATIENT_IMPORT_HASH_WORKERS = int(os.getenv('PATIENT_IMPORT_HASH_WORKERS', str(os.cpu_count() or 1)))
+PATIENT_IMPORT_PREFIX = os.getenv('PATIENT_IMPORT_PREFIX', 'patient-imports')
+
+# Login throttling (users.ratelimit), as 'attempts/seconds' sliding windows.
+# Counters live in the `rate_limiting` cache when configured.
+RATE_LIMIT_CACHE_ALIAS = os.getenv('RATE_LIMIT_CACHE_ALIAS', 'rate_limiting')
+LOGIN_RATE_LIMIT_ENABLED = os.getenv('LOGIN_RATE_LIMIT_ENABLED', 'True') == 'True'
+LOGIN_RATE_LIMIT_USER = os.getenv('LOGIN_RATE_LIMIT_USER', '10/300')
+LOGIN_RATE_LIMIT_IP = os.getenv('LOGIN_RATE_LIMIT_IP', '300/60')
+# Seconds the confirmed OTP device id of a user stays cached (users.mfa)
+MFA_DEVICE_CACHE_TIMEOUT = int(os.getenv('MFA_DEVICE_CACHE_TIMEOUT', '3600'))
+
+# Seconds a resolved permission snapshot (users.permissions) stays cached;
+# group/permission changes invalidate earlier through version stamps
+PERMISSION_CACHE_TIMEOUT = int(os.getenv('PERMISSION_CACHE_TIMEOUT', '3600'))
+
+# Default seconds a response cached with ehs_backend.cache.cache_response
+# is kept; tag invalidation usually expires it earlier
+RESPONSE_CACHE_TIMEOUT = int(os.getenv('RESPONSE_CACHE_TIMEOUT', '300'))
+
+# Seconds a doctor's schedule stays cached; appointment changes invalidate
+# it earlier through the doctor:<id>:schedule tag (ehs_backend.cache)
+SCHEDULE_CACHE_TIMEOUT = int(os.getenv('SCHEDULE_CACHE_TIMEOUT', '300'))
+
+# Analytics rollups: trailing days recomputed by refresh_analytics_rollups
+ANALYTICS_ROLLUP_REFRESH_DAYS = int(os.getenv('ANALYTICS_ROLLUP_REFRESH_DAYS', '3'))
+# Rows per batch pulled by analytics.compute, and bookable slots per doctor per day
+ANALYTICS_COMPUTE_CHUNK_SIZE = int(os.getenv('ANALYTICS_COMPUTE_CHUNK_SIZE', '20000'))
+ANALYTICS_DOCTOR_SLOTS_PER_DAY = int(os.getenv('ANALYTICS_DOCTOR_SLOTS_PER_DAY', '16'))
+# Warehouse snapshot export (analytics.export), written through default_storage
+ANALYTICS_EXPORT_PREFIX = os.getenv('ANALYTICS_EXPORT_PREFIX', 'warehouse')
+ANALYTICS_EXPORT_COMPRESSION = os.getenv('ANALYTICS_EXPORT_COMPRESSION', 'zstd')
+ANALYTICS_EXPORT_CHUNK_SIZE = int(os.getenv('ANALYTICS_EXPORT_CHUNK_SIZE', '50000'))
+# Rows changed within this many seconds of an export are left for the next
+# one; keep it above the longest transaction that writes exported tables
+ANALYTICS_EXPORT_SAFETY_LAG = int(os.getenv('ANALYTICS_EXPORT_SAFETY_LAG', '600'))
+
+# Celery task metrics (ehs_backend.task_metrics), kept in this cache alias's Redis
+TASK_METRICS_ENABLED = os.getenv('TASK_METRICS_ENABLED', 'True') == 'True'
+TASK_METRICS_CACHE_ALIAS = os.getenv('TASK_METRICS_CACHE_ALIAS', 'default')
+# Bearer token for Prometheus scrapes of the metrics exporters; unset disables them
+METRICS_TOKEN = os.getenv('METRICS_TOKEN', '')
+# Request, database and cache metrics served at /metrics (ehs_backend.metrics)
+METRICS_ENABLED = os.getenv('METRICS_ENABLED', 'True') == 'True'
+# Seconds between broker reads of Celery queue depths; each is an API call on SQS
+METRICS_QUEUE_DEPTH_INTERVAL = float(os.getenv('METRICS_QUEUE_DEPTH_INTERVAL', '15'))
+
+# SMTP socket timeout; bounds reminder tasks on the threads-pool
+# notifications worker, which cannot enforce Celery time limits
+EMAIL_TIMEOUT = int(os.getenv('EMAIL_TIMEOUT', '20'))
+
+# Audit logging: 'async' queues events for a background bulk writer,
+# 'sync' writes each event on the request path
+AUDIT_LOG_MODE = os.getenv('AUDIT_LOG_MODE', 'async')
+AUDIT_LOG_BUFFER_SIZE = int(os.getenv('AUDIT_LOG_BUFFER_SIZE', '10000'))
+AUDIT_LOG_BATCH_SIZE = int(os.getenv('AUDIT_LOG_BATCH_SIZE', '500'))
+AUDIT_LOG_FLUSH_INTERVAL = float(os.getenv('AUDIT_LOG_FLUSH_INTERVAL', '1.0'))
+# Audit retention: months kept in the live table before partitions are
+# exported to AUDIT_LOG_ARCHIVE_PREFIX (through default_storage) and dropped
+AUDIT_LOG_ONLINE_MONTHS = int(os.getenv('AUDIT_LOG_ONLINE_MONTHS', '13'))
+AUDIT_LOG_PARTITIONS_AHEAD = int(os.getenv('AUDIT_LOG_PARTITIONS_AHEAD', '2'))
+AUDIT_LOG_ARCHIVE_PREFIX = os.getenv('AUDIT_LOG_ARCHIVE_PREFIX', 'audit-archive')
+AUDIT_LOG_ARCHIVE_CHUNK_SIZE = int(os.getenv('AUDIT_LOG_ARCHIVE_CHUNK_SIZE', '5000'))
+AUDIT_LOG_PAGE_SIZE = int(os.getenv('AUDIT_LOG_PAGE_SIZE', '100'))
+
 # CORS settings
 CORS_ALLOW_ALL_ORIGINS = True  # Since DEBUG is True, we'll allow all origins for development
 CORS_ALLOWED_ORIGINS = [
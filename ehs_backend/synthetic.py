@@ -0,0 +1,289 @@
+import math
+import random
+from datetime import datetime, time, timedelta
+from decimal import Decimal
+from django.contrib.auth.hashers import make_password
+from django.db import transaction
+from django.utils import timezone
+from appointments.models import Appointment
+from billing.models import Invoice, Payment
+from patients.models import HL7Message, MedicalHistory, Patient
+from users.models import Role, User
+
+# Every generated row is recognisable by one of these, so a dataset can be
+# topped up or removed without touching real records
+USER_PREFIX = 'synth-'
+PATIENT_PREFIX = 'SYN'
+INVOICE_PREFIX = 'SYN-INV'
+ADMIN_USERNAME = f'{USER_PREFIX}admin'
+PASSWORD = 'synth-Password-123'
+
+# 15 minute slots from 08:00 to 17:00
+SLOTS_PER_DAY = 36
+SLOT_MINUTES = 15
+
+FIRST_NAMES = [
+    'Aarav', 'Ananya', 'Arjun', 'Diya', 'Ishaan', 'Kavya', 'Meera', 'Nikhil', 'Priya',
+    'Rahul', 'Riya', 'Rohan', 'Saanvi', 'Sai', 'Tara', 'Vihaan', 'Aditi', 'Kiran',
+    'James', 'Maria', 'Wei', 'Fatima', 'Olga', 'Kwame', 'Lucia', 'Hiro',
+]
+LAST_NAMES = [
+    'Sharma', 'Reddy', 'Patel', 'Iyer', 'Nair', 'Gupta', 'Rao', 'Menon', 'Das', 'Khan',
+    'Singh', 'Kumar', 'Joshi', 'Bose', 'Smith', 'Garcia', 'Chen', 'Okafor', 'Ivanova',
+]
+BLOOD_GROUPS = ['O+', 'A+', 'B+', 'AB+', 'O-', 'A-', 'B-', 'AB-']
+BLOOD_GROUP_WEIGHTS = [37, 28, 22, 5, 3, 2, 2, 1]
+CITIES = ['Hyderabad', 'Bengaluru', 'Chennai', 'Pune', 'Mumbai', 'Delhi', 'Kochi']
+CONDITIONS = [
+    'Hypertension', 'Type 2 diabetes', 'Asthma', 'Hypothyroidism', 'Migraine',
+    'Osteoarthritis', 'Anaemia', 'GERD', 'Chronic kidney disease', 'Depression',
+]
+REASONS = [
+    'Routine check-up', 'Follow-up', 'Fever', 'Chest pain', 'Back pain',
+    'Lab results review', 'Prescription renewal', 'Vaccination', 'Headache',
+]
+HL7_TYPES = ['ADT^A01', 'ADT^A08', 'ORU^R01', 'SIU^S12']
+PAYMENT_METHODS = ['CARD', 'UPI', 'CASH', 'INSURANCE']
+
+class SyntheticHospital:
+    """Seeded generator of a realistic hospital dataset written with bulk_create.
+
+    The same seed, size and `today` always produce the same rows. Patients
+    are generated in chunks of `batch_size`, each chunk with its users,
+    medical history, appointments, invoices, payments and HL7 messages in
+    one transaction, so memory stays flat at millions of patients.
+    Appointment slots are a permutation of every doctor/day/slot in the
+    covered period, which keeps (doctor, date, time_slot) unique without
+    looking anything up. created_at is set by the database to the time of
+    generation.
+    """
+    def __init__(self, patients=10000, seed=0, doctors=None, appointments_per_patient=4,
+                 history_per_patient=2, hl7_per_patient=2, batch_size=2000, today=None):
+        self.patients = patients
+        self.seed = seed
+        self.doctors = doctors or max(5, patients // 500)
+        self.appointments_per_patient = appointments_per_patient
+        self.history_per_patient = history_per_patient
+        self.hl7_per_patient = hl7_per_patient
+        self.batch_size = batch_size
+        self.today = today or timezone.now().date()
+
+        # A patient has at most 2x the average number of appointments, so
+        # this many slots can never run out
+        max_appointments = max(1, patients * 2 * appointments_per_patient)
+        self.days = max(30, math.ceil(max_appointments / (self.doctors * SLOTS_PER_DAY)))
+        self.capacity = self.doctors * self.days * SLOTS_PER_DAY
+        # 90% of the period lies in the past, the rest is upcoming bookings
+        self.first_day = self.today - timedelta(days=self.days * 9 // 10)
+        self.stride = self._coprime_stride(self.capacity)
+
+    @staticmethod
+    def _coprime_stride(capacity):
+        stride = 7919
+        while math.gcd(stride, capacity) != 1:
+            stride += 2
+        return stride % capacity or 1
+
+    def slot(self, number):
+        """(doctor index, date, time) of the `number`th appointment"""
+        position = (number * self.stride) % self.capacity
+        doctor, position = divmod(position, self.days * SLOTS_PER_DAY)
+        day, slot = divmod(position, SLOTS_PER_DAY)
+        minutes = 8 * 60 + slot * SLOT_MINUTES
+        return doctor, self.first_day + timedelta(days=day), time(minutes // 60, minutes % 60)
+
+    def generate(self, progress=None):
+        """Write the dataset; returns row counts per model"""
+        rng = random.Random(self.seed)
+        password = make_password(PASSWORD)
+        counts = dict.fromkeys(
+            ['users', 'patients', 'medical_history', 'appointments', 'invoices', 'payments', 'hl7_messages'], 0
+        )
+
+        with transaction.atomic():
+            User.objects.bulk_create([
+                User(
+                    username=ADMIN_USERNAME,
+                    password=password,
+                    role=Role.ADMIN,
+                    is_staff=True,
+                    is_superuser=True,
+                    phone_number='+910000000000'
+                )
+            ])
+            doctors = User.objects.bulk_create([
+                User(
+                    username=f'{USER_PREFIX}doctor-{index}',
+                    password=password,
+                    role=Role.DOCTOR,
+                    first_name=rng.choice(FIRST_NAMES),
+                    last_name=rng.choice(LAST_NAMES),
+                    email=f'doctor{index}@synthetic.example',
+                    phone_number=f'+91{7000000000 + index}'
+                )
+                for index in range(self.doctors)
+            ])
+        counts['users'] += self.doctors + 1
+
+        appointment_number = 0
+        invoice_number = 0
+        for start in range(0, self.patients, self.batch_size):
+            stop = min(start + self.batch_size, self.patients)
+            with transaction.atomic():
+                appointment_number, invoice_number = self._chunk(
+                    rng, password, doctors, start, stop, appointment_number, invoice_number, counts
+                )
+            if progress:
+                progress(stop, counts)
+        return counts
+
+    def _chunk(self, rng, password, doctors, start, stop, appointment_number, invoice_number, counts):
+        users = []
+        for index in range(start, stop):
+            first_name, last_name = rng.choice(FIRST_NAMES), rng.choice(LAST_NAMES)
+            users.append(User(
+                username=f'{USER_PREFIX}patient-{index}',
+                password=password,
+                role=Role.PATIENT,
+                first_name=first_name,
+                last_name=last_name,
+                email=f'patient{index}@synthetic.example',
+                phone_number=f'+91{9000000000 + index}'
+            ))
+        users = User.objects.bulk_create(users)
+
+        patients = Patient.objects.bulk_create([
+            Patient(
+                user=user,
+                patient_id=f'{PATIENT_PREFIX}{index:09d}',
+                fhir_id=f'synthetic-{index}',
+                date_of_birth=self.today - timedelta(days=rng.randint(0, 95 * 365)),
+                blood_group=rng.choices(BLOOD_GROUPS, BLOOD_GROUP_WEIGHTS)[0],
+                emergency_contact=f'+91{8000000000 + index}',
+                address=f'{rng.randint(1, 999)} {rng.choice(LAST_NAMES)} Road, {rng.choice(CITIES)}'
+            )
+            for index, user in zip(range(start, stop), users)
+        ])
+
+        history = []
+        appointments = []
+        messages = []
+        for patient in patients:
+            for _ in range(rng.randint(0, 2 * self.history_per_patient)):
+                history.append(MedicalHistory(
+                    patient=patient,
+                    condition=rng.choice(CONDITIONS),
+                    diagnosis_date=patient.date_of_birth + timedelta(
+                        days=rng.randint(0, max(0, (self.today - patient.date_of_birth).days))
+                    ),
+                    notes='Synthetic record',
+                    is_active=rng.random() < 0.7
+                ))
+            for _ in range(rng.randint(0, 2 * self.appointments_per_patient)):
+                doctor, date, time_slot = self.slot(appointment_number)
+                appointment_number += 1
+                appointments.append(Appointment(
+                    patient=patient,
+                    doctor=doctors[doctor],
+                    date=date,
+                    time_slot=time_slot,
+                    status=self._appointment_status(rng, date),
+                    reason=rng.choice(REASONS)
+                ))
+            for sequence in range(rng.randint(0, 2 * self.hl7_per_patient)):
+                message_type = rng.choice(HL7_TYPES)
+                messages.append(HL7Message(
+                    patient=patient,
+                    message_type=message_type,
+                    message_content=self._hl7(patient, message_type, sequence),
+                    # A small backlog for the HL7 processing task
+                    processed=rng.random() < 0.98
+                ))
+
+        MedicalHistory.objects.bulk_create(history)
+        appointments = Appointment.objects.bulk_create(appointments)
+        HL7Message.objects.bulk_create(messages)
+
+        invoices = []
+        for appointment in appointments:
+            if appointment.status != Appointment.Status.COMPLETED or rng.random() < 0.2:
+                continue
+            amount = Decimal(rng.randint(300, 20000)).quantize(Decimal('0.01'))
+            tax = (amount * Decimal('0.18')).quantize(Decimal('0.01'))
+            invoices.append(Invoice(
+                patient_id=appointment.patient_id,
+                appointment=appointment,
+                invoice_number=f'{INVOICE_PREFIX}{invoice_number:010d}',
+                amount=amount,
+                tax=tax,
+                total_amount=amount + tax,
+                status=rng.choices(
+                    [Invoice.Status.PAID, Invoice.Status.PENDING, Invoice.Status.CANCELLED, Invoice.Status.REFUNDED],
+                    [75, 18, 5, 2]
+                )[0],
+                due_date=appointment.date + timedelta(days=30)
+            ))
+            invoice_number += 1
+        invoices = Invoice.objects.bulk_create(invoices)
+
+        payments = Payment.objects.bulk_create([
+            Payment(
+                invoice=invoice,
+                amount=invoice.total_amount,
+                payment_method=rng.choice(PAYMENT_METHODS),
+                transaction_id=f'synthetic-{invoice.invoice_number}',
+                status='COMPLETED'
+            )
+            for invoice in invoices if invoice.status == Invoice.Status.PAID
+        ])
+
+        counts['users'] += len(users)
+        counts['patients'] += len(patients)
+        counts['medical_history'] += len(history)
+        counts['appointments'] += len(appointments)
+        counts['invoices'] += len(invoices)
+        counts['payments'] += len(payments)
+        counts['hl7_messages'] += len(messages)
+        return appointment_number, invoice_number
+
+    def _appointment_status(self, rng, date):
+        if date >= self.today:
+            return rng.choices([Appointment.Status.SCHEDULED, Appointment.Status.CONFIRMED,
+                                Appointment.Status.CANCELLED], [55, 35, 10])[0]
+        return rng.choices([Appointment.Status.COMPLETED, Appointment.Status.CANCELLED], [88, 12])[0]
+
+    def _hl7(self, patient, message_type, sequence):
+        sent = datetime.combine(self.today, time()) - timedelta(minutes=sequence)
+        return '\r'.join([
+            f'MSH|^~\\&|EHS|HOSPITAL|RECEIVER|FACILITY|{sent:%Y%m%d%H%M%S}||{message_type}|'
+            f'{patient.patient_id}-{sequence}|P|2.5.1',
+            f'PID|||{patient.patient_id}||{patient.user.last_name}^{patient.user.first_name}||'
+            f'{patient.date_of_birth:%Y%m%d}|',
+        ])
+
+def exists():
+    return User.objects.filter(username=ADMIN_USERNAME).exists()
+
+def clear():
+    """Delete every generated row; dropping the database is faster at scale"""
+    users = User.objects.filter(username__startswith=USER_PREFIX)
+    patients = Patient.objects.filter(patient_id__startswith=PATIENT_PREFIX)
+    Payment.objects.filter(invoice__patient__in=patients).delete()
+    Invoice.objects.filter(patient__in=patients).delete()
+    Appointment.objects.filter(patient__in=patients).delete()
+    HL7Message.objects.filter(patient__in=patients).delete()
+    MedicalHistory.objects.filter(patient__in=patients).delete()
+    patients.delete()
+    users.delete()
+
+def dataset_counts():
+    """Row counts of the models the benchmarks read"""
+    return {
+        'users': User.objects.count(),
+        'patients': Patient.objects.count(),
+        'medical_history': MedicalHistory.objects.count(),
+        'appointments': Appointment.objects.count(),
+        'invoices': Invoice.objects.count(),
+        'payments': Payment.objects.count(),
+        'hl7_messages': HL7Message.objects.count(),
+    }
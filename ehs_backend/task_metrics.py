@@ -0,0 +1,263 @@
+import bisect
+import logging
+import platform
+import resource
+import time
+from datetime import datetime
+from django.conf import settings
+from django.core.cache import caches
+
+logger = logging.getLogger(__name__)
+
+# Histogram upper bounds
+LATENCY_BUCKETS_S = (0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 30, 60, 300, 900, 3600)
+RUNTIME_BUCKETS_S = (0.01, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 30, 60, 300, 900, 3600)
+RSS_BUCKETS_MB = (64, 128, 256, 384, 512, 768, 1024, 1536, 2048, 4096)
+HISTOGRAMS = {
+    'latency': LATENCY_BUCKETS_S,
+    'runtime': RUNTIME_BUCKETS_S,
+    'rss_mb': RSS_BUCKETS_MB,
+}
+
+ENQUEUED_HEADER = 'enqueued_at'
+
+def _bucket(bounds, value):
+    index = bisect.bisect_left(bounds, value)
+    return str(bounds[index]) if index < len(bounds) else '+Inf'
+
+def _peak_rss_mb():
+    # ru_maxrss is KB on Linux, bytes on macOS
+    rss = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    return rss / (1024 * 1024) if platform.system() == 'Darwin' else rss / 1024
+
+class TaskMetricsStore:
+    """Per-task counters and histograms, one Redis hash per task name.
+
+    Workers write with a single pipelined round trip per task run; any
+    process can read the totals of every worker. Without django-redis the
+    hash is kept as a plain cache value, which is only exact in a single
+    process (development and tests).
+    """
+    def __init__(self, alias=None):
+        self.alias = alias
+
+    @property
+    def cache(self):
+        return caches[self.alias or settings.TASK_METRICS_CACHE_ALIAS]
+
+    def _redis(self):
+        if not type(self.cache).__module__.startswith('django_redis'):
+            return None
+        from django_redis import get_redis_connection
+        return get_redis_connection(self.alias or settings.TASK_METRICS_CACHE_ALIAS)
+
+    def _key(self, name):
+        return self.cache.make_key(f'task-metrics:{name}')
+
+    def record(self, name, increments):
+        """Add `increments` (field -> number) to the task's counters"""
+        client = self._redis()
+        if client is None:
+            fields = self.cache.get(f'task-metrics:{name}', {})
+            for field, amount in increments.items():
+                fields[field] = fields.get(field, 0) + amount
+            self.cache.set(f'task-metrics:{name}', fields, None)
+            names = self.cache.get('task-metrics:tasks', [])
+            if name not in names:
+                self.cache.set('task-metrics:tasks', names + [name], None)
+            return
+        pipe = client.pipeline(transaction=False)
+        pipe.sadd(self._key('tasks'), name)
+        for field, amount in increments.items():
+            if isinstance(amount, int):
+                pipe.hincrby(self._key(name), field, amount)
+            else:
+                pipe.hincrbyfloat(self._key(name), field, amount)
+        pipe.execute()
+
+    def read(self):
+        """Task name -> field -> value, for every task that has run"""
+        client = self._redis()
+        if client is None:
+            return {
+                name: dict(self.cache.get(f'task-metrics:{name}', {}))
+                for name in self.cache.get('task-metrics:tasks', [])
+            }
+        names = sorted(name.decode() for name in client.smembers(self._key('tasks')))
+        pipe = client.pipeline(transaction=False)
+        for name in names:
+            pipe.hgetall(self._key(name))
+        return {
+            name: {field.decode(): float(value) for field, value in fields.items()}
+            for name, fields in zip(names, pipe.execute())
+        }
+
+    def reset(self):
+        client = self._redis()
+        if client is None:
+            names = self.cache.get('task-metrics:tasks', [])
+            self.cache.delete_many([f'task-metrics:{name}' for name in names] + ['task-metrics:tasks'])
+            return
+        names = [name.decode() for name in client.smembers(self._key('tasks'))]
+        client.delete(self._key('tasks'), *[self._key(name) for name in names])
+
+store = TaskMetricsStore()
+
+# task id -> (perf_counter at start, queue latency in seconds or None)
+_running = {}
+
+def _queue_latency(request, now):
+    """Seconds between publishing (or the ETA of a delayed task) and starting"""
+    enqueued_at = getattr(request, ENQUEUED_HEADER, None)
+    if enqueued_at is None:
+        return None
+    ready_at = float(enqueued_at)
+    if request.eta:
+        eta = request.eta if isinstance(request.eta, datetime) else datetime.fromisoformat(request.eta)
+        ready_at = max(ready_at, eta.timestamp())
+    return max(0.0, now - ready_at)
+
+def _stamp_enqueue_time(headers=None, **kwargs):
+    if headers is not None:
+        headers[ENQUEUED_HEADER] = time.time()
+
+def _task_started(task_id=None, task=None, **kwargs):
+    if not settings.TASK_METRICS_ENABLED:
+        return
+    _running[task_id] = (time.perf_counter(), _queue_latency(task.request, time.time()))
+
+def _task_finished(task_id=None, task=None, state=None, **kwargs):
+    started = _running.pop(task_id, None)
+    if started is None:
+        return
+    started_at, latency = started
+    runtime = time.perf_counter() - started_at
+    rss_mb = _peak_rss_mb()
+    increments = {
+        f'state:{state or "UNKNOWN"}': 1,
+        f'runtime:{_bucket(RUNTIME_BUCKETS_S, runtime)}': 1,
+        'runtime_sum': runtime,
+        f'rss_mb:{_bucket(RSS_BUCKETS_MB, rss_mb)}': 1,
+        'rss_mb_sum': rss_mb,
+    }
+    if latency is not None:
+        increments[f'latency:{_bucket(LATENCY_BUCKETS_S, latency)}'] = 1
+        increments['latency_sum'] = latency
+    try:
+        store.record(task.name, increments)
+    except Exception:
+        # Metrics must never fail a task
+        logger.warning("Could not record metrics for %s", task.name, exc_info=True)
+
+def _task_failed(task_id=None, exception=None, sender=None, **kwargs):
+    name = getattr(sender, 'name', 'unknown')
+    logger.error("Task %s[%s] failed: %r", name, task_id, exception)
+    if not settings.TASK_METRICS_ENABLED:
+        return
+    try:
+        store.record(name, {f'exception:{type(exception).__name__}': 1})
+    except Exception:
+        logger.warning("Could not record metrics for %s", name, exc_info=True)
+
+def connect_signals():
+    """Record metrics from this process's Celery signals; called by ehs_backend.celery.
+
+    Kept out of import time so the web process, which reads the metrics
+    here, only loads Celery once it first publishes a task.
+    """
+    from celery.signals import before_task_publish, task_failure, task_postrun, task_prerun
+
+    before_task_publish.connect(_stamp_enqueue_time, weak=False, dispatch_uid='task-metrics-publish')
+    task_prerun.connect(_task_started, weak=False, dispatch_uid='task-metrics-prerun')
+    task_postrun.connect(_task_finished, weak=False, dispatch_uid='task-metrics-postrun')
+    task_failure.connect(_task_failed, weak=False, dispatch_uid='task-metrics-failure')
+
+def _histogram(fields, name, bounds):
+    """Cumulative bucket counts, total and sum of one histogram"""
+    counts = [int(fields.get(f'{name}:{bound}', 0)) for bound in bounds]
+    counts.append(int(fields.get(f'{name}:+Inf', 0)))
+    cumulative = []
+    total = 0
+    for count in counts:
+        total += count
+        cumulative.append(total)
+    return cumulative, total, fields.get(f'{name}_sum', 0.0)
+
+def _quantile(bounds, cumulative, total, q):
+    """Upper bound of the bucket holding the q-th quantile (an overestimate)"""
+    if not total:
+        return None
+    for bound, count in zip(bounds + ('+Inf',), cumulative):
+        if count >= q * total:
+            return bound
+    return '+Inf'
+
+def task_metrics():
+    """Outcomes, exceptions and latency/runtime/RSS summaries per task name"""
+    report = {}
+    for name, fields in store.read().items():
+        entry = {
+            'outcomes': {
+                field.split(':', 1)[1]: int(value) for field, value in fields.items() if field.startswith('state:')
+            },
+            'exceptions': {
+                field.split(':', 1)[1]: int(value) for field, value in fields.items() if field.startswith('exception:')
+            },
+        }
+        for histogram, bounds in HISTOGRAMS.items():
+            cumulative, total, total_sum = _histogram(fields, histogram, bounds)
+            entry[histogram] = {
+                'count': total,
+                'mean': round(total_sum / total, 4) if total else None,
+                'p50_le': _quantile(bounds, cumulative, total, 0.5),
+                'p95_le': _quantile(bounds, cumulative, total, 0.95),
+                'p99_le': _quantile(bounds, cumulative, total, 0.99),
+            }
+        report[name] = entry
+    return report
+
+def _label(value):
+    return str(value).replace('\\', '\\\\').replace('"', '\\"').replace('\n', '\\n')
+
+# Prometheus metric name, help text, histogram, unit multiplier
+PROMETHEUS_HISTOGRAMS = (
+    ('ehs_celery_task_queue_latency_seconds', 'Time from publish (or ETA) to task start', 'latency', 1),
+    ('ehs_celery_task_runtime_seconds', 'Task run time', 'runtime', 1),
+    ('ehs_celery_task_peak_rss_bytes', 'Worker process peak RSS after the task', 'rss_mb', 1024 * 1024),
+)
+
+def prometheus_text():
+    """All task metrics in the Prometheus text exposition format"""
+    data = store.read()
+    lines = [
+        '# HELP ehs_celery_task_runs_total Finished task runs by final state',
+        '# TYPE ehs_celery_task_runs_total counter',
+    ]
+    for name, fields in data.items():
+        for field, value in sorted(fields.items()):
+            if field.startswith('state:'):
+                lines.append(
+                    f'ehs_celery_task_runs_total{{task="{_label(name)}",state="{_label(field[6:])}"}} {int(value)}'
+                )
+    lines += [
+        '# HELP ehs_celery_task_exceptions_total Task failures by exception type',
+        '# TYPE ehs_celery_task_exceptions_total counter',
+    ]
+    for name, fields in data.items():
+        for field, value in sorted(fields.items()):
+            if field.startswith('exception:'):
+                lines.append(
+                    f'ehs_celery_task_exceptions_total{{task="{_label(name)}",exception="{_label(field[10:])}"}} {int(value)}'
+                )
+    for metric, help_text, histogram, unit in PROMETHEUS_HISTOGRAMS:
+        bounds = HISTOGRAMS[histogram]
+        lines += [f'# HELP {metric} {help_text}', f'# TYPE {metric} histogram']
+        for name, fields in data.items():
+            cumulative, total, total_sum = _histogram(fields, histogram, bounds)
+            task = _label(name)
+            for bound, count in zip(bounds + ('+Inf',), cumulative):
+                le = bound if bound == '+Inf' else repr(float(bound * unit))
+                lines.append(f'{metric}_bucket{{task="{task}",le="{le}"}} {count}')
+            lines.append(f'{metric}_sum{{task="{task}"}} {total_sum * unit}')
+            lines.append(f'{metric}_count{{task="{task}"}} {total}')
+    return '\n'.join(lines) + '\n'
@@ -2,16 +2,23 @@ from django.contrib import admin
 from django.urls import path, include
 from django.conf import settings
 from django.conf.urls.static import static
-from rest_framework_simplejwt.views import (
-    TokenObtainPairView,
-    TokenRefreshView
+from users.views import CustomTokenObtainPairView, CustomTokenRefreshView
+from .views import (
+    cache_health_view, database_health_view, metrics_view, task_metrics_prometheus_view,
+    task_metrics_view
 )
-from users.views import CustomTokenObtainPairView
 
 urlpatterns = [
     path('admin/', admin.site.urls),
     path('api/token/', CustomTokenObtainPairView.as_view(), name='token_obtain_pair'),
-    path('api/token/refresh/', TokenRefreshView.as_view(), name='token_refresh'),
+    path('api/token/refresh/', CustomTokenRefreshView.as_view(), name='token_refresh'),
+    path('api/health/cache/', cache_health_view, name='cache_health'),
+    path('api/health/database/', database_health_view, name='database_health'),
+    # Liveness/readiness checks of the database, caches and migrations
+    path('api/health/', include('health_check.urls')),
+    path('metrics', metrics_view, name='metrics'),
+    path('api/metrics/tasks/', task_metrics_view, name='task_metrics'),
+    path('api/metrics/tasks/prometheus/', task_metrics_prometheus_view, name='task_metrics_prometheus'),
     path('api/users/', include('users.urls')),
     path('api/patients/', include('patients.urls')),
     path('api/appointments/', include('appointments.urls')),
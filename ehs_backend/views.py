@@ -0,0 +1,57 @@
+import hmac
+from django.conf import settings
+from django.http import HttpResponse
+from rest_framework import permissions
+from rest_framework.decorators import api_view, authentication_classes, permission_classes
+from rest_framework.response import Response
+from .cache_topology import cache_health
+from .db_topology import database_health
+from .metrics import render as render_metrics
+from .task_metrics import prometheus_text, task_metrics
+
+PROMETHEUS_CONTENT_TYPE = 'text/plain; version=0.0.4; charset=utf-8'
+
+class MetricsTokenPermission(permissions.BasePermission):
+    """Scrapers authenticate with `Authorization: Bearer <METRICS_TOKEN>`"""
+    def has_permission(self, request, view):
+        token = settings.METRICS_TOKEN
+        header = request.headers.get('Authorization', '')
+        return bool(token) and hmac.compare_digest(header.encode(), f'Bearer {token}'.encode())
+
+@api_view(['GET'])
+@permission_classes([permissions.IsAdminUser])
+def cache_health_view(request):
+    """Per-alias cache round-trip latency and connection pool usage"""
+    aliases = [
+        alias for alias in request.query_params.getlist('alias') if alias in settings.CACHES
+    ] or None
+    report = cache_health(aliases)
+    healthy = all(entry['healthy'] for entry in report.values())
+    return Response({'healthy': healthy, 'caches': report}, status=200 if healthy else 503)
+
+@api_view(['GET'])
+@permission_classes([permissions.IsAdminUser])
+def database_health_view(request):
+    """Per-alias database latency, connection mode and acquire latency"""
+    report = database_health()
+    healthy = all(entry['healthy'] for entry in report.values())
+    return Response({'healthy': healthy, 'databases': report}, status=200 if healthy else 503)
+
+@api_view(['GET'])
+@permission_classes([permissions.IsAdminUser])
+def task_metrics_view(request):
+    """Outcomes, exceptions and queue latency, run time and RSS per Celery task"""
+    return Response(task_metrics())
+
+@api_view(['GET'])
+@authentication_classes([])
+@permission_classes([MetricsTokenPermission])
+def task_metrics_prometheus_view(request):
+    return HttpResponse(prometheus_text(), content_type=PROMETHEUS_CONTENT_TYPE)
+
+@api_view(['GET'])
+@authentication_classes([])
+@permission_classes([MetricsTokenPermission])
+def metrics_view(request):
+    """Prometheus scrape target: HTTP, database, cache, Celery and worker metrics"""
+    return HttpResponse(render_metrics(), content_type=PROMETHEUS_CONTENT_TYPE)
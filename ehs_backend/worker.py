@@ -0,0 +1,18 @@
+import os
+import sys
+from .celery import app
+from .celery_topology import worker_argv, worker_transport_options
+
+def main():
+    """python -m ehs_backend.worker <profile> [extra celery worker options]"""
+    args = sys.argv[1:]
+    profile = args.pop(0) if args and not args[0].startswith('-') else os.getenv('CELERY_WORKER_PROFILE', 'all')
+    argv = worker_argv(profile)
+    app.conf.broker_transport_options = dict(
+        app.conf.broker_transport_options,
+        **worker_transport_options(profile, app.conf.broker_url)
+    )
+    app.worker_main(argv + args)
+
+if __name__ == '__main__':
+    main()
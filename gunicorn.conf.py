@@ -0,0 +1,148 @@
+import gc
+import importlib
+import multiprocessing
+import os
+import shutil
+import tempfile
+
+# Serving profile for the API containers. Every value can be overridden
+# from the environment; defaults are derived from the CPU and memory the
+# container is actually allowed to use (cgroup limits, not host totals).
+
+# Interface: 'wsgi' serves ehs_backend.wsgi with sync/gthread workers,
+# 'asgi' serves ehs_backend.asgi with uvicorn workers for async endpoints
+SERVER_MODE = os.getenv('SERVER_MODE', 'wsgi')
+# Resident memory budgeted per worker, and what to leave for the master,
+# page cache and the occasional large export
+WORKER_MEMORY_MB = int(os.getenv('GUNICORN_WORKER_MEMORY_MB', '256'))
+RESERVED_MEMORY_MB = int(os.getenv('GUNICORN_RESERVED_MEMORY_MB', '256'))
+
+def _read(path):
+    try:
+        with open(path) as f:
+            return f.read().strip()
+    except OSError:
+        return None
+
+def available_cpus():
+    """CPUs usable by this process, honouring cgroup quotas"""
+    quota = _read('/sys/fs/cgroup/cpu.max')
+    if quota and not quota.startswith('max'):
+        limit, period = quota.split()
+        return max(1, int(int(limit) / int(period)))
+    limit = _read('/sys/fs/cgroup/cpu/cpu.cfs_quota_us')
+    period = _read('/sys/fs/cgroup/cpu/cpu.cfs_period_us')
+    if limit and period and int(limit) > 0:
+        return max(1, int(int(limit) / int(period)))
+    if hasattr(os, 'sched_getaffinity'):
+        return len(os.sched_getaffinity(0))
+    return multiprocessing.cpu_count()
+
+def available_memory_mb():
+    """Memory limit of the container in MB, or physical memory"""
+    for path in ('/sys/fs/cgroup/memory.max', '/sys/fs/cgroup/memory/memory.limit_in_bytes'):
+        value = _read(path)
+        # cgroup v1 reports "unlimited" as a huge number
+        if value and value.isdigit() and int(value) < 1 << 60:
+            return int(value) // (1024 * 1024)
+    try:
+        return os.sysconf('SC_PAGE_SIZE') * os.sysconf('SC_PHYS_PAGES') // (1024 * 1024)
+    except (ValueError, OSError):
+        return None
+
+def default_workers(cpus, memory_mb):
+    # 2n+1 keeps every core busy while some workers wait on I/O; memory
+    # caps it so the container is never OOM-killed under load
+    workers = 2 * cpus + 1
+    if memory_mb:
+        workers = min(workers, max(1, (memory_mb - RESERVED_MEMORY_MB) // WORKER_MEMORY_MB))
+    return max(1, workers)
+
+WORKER_CLASSES = {
+    'sync': 'sync',
+    'gthread': 'gthread',
+    'uvicorn': 'uvicorn.workers.UvicornWorker',
+}
+
+cpus = available_cpus()
+memory_mb = available_memory_mb()
+
+bind = os.getenv('GUNICORN_BIND', '0.0.0.0:8000')
+if SERVER_MODE == 'asgi':
+    wsgi_app = 'ehs_backend.asgi:application'
+    worker_class = WORKER_CLASSES['uvicorn']
+else:
+    wsgi_app = 'ehs_backend.wsgi:application'
+    worker_class = WORKER_CLASSES[os.getenv('GUNICORN_WORKER_CLASS', 'gthread')]
+workers = int(os.getenv('GUNICORN_WORKERS', default_workers(cpus, memory_mb)))
+# Threads only apply to gthread; requests mostly wait on PostgreSQL/Redis
+threads = int(os.getenv('GUNICORN_THREADS', '4'))
+
+# Import Django once in the master so workers share its pages copy-on-write
+preload_app = os.getenv('GUNICORN_PRELOAD', 'True') == 'True'
+# The app imports these on first use so manage.py commands and Celery
+# workers skip them; web requests do use them, so when preloading the
+# master imports them once instead of every worker on its first request
+preload_modules = [
+    module for module in os.getenv(
+        'GUNICORN_PRELOAD_MODULES',
+        'fhir.resources.patient,fhir.resources.observation,fhir.resources.bundle,PIL.Image,hl7'
+    ).split(',') if module
+]
+# Recycle workers gradually to bound slow leaks; jitter keeps them from
+# all restarting at once
+max_requests = int(os.getenv('GUNICORN_MAX_REQUESTS', '2000'))
+max_requests_jitter = int(os.getenv('GUNICORN_MAX_REQUESTS_JITTER', '200'))
+timeout = int(os.getenv('GUNICORN_TIMEOUT', '60'))
+graceful_timeout = int(os.getenv('GUNICORN_GRACEFUL_TIMEOUT', '30'))
+# Longer than the load balancer's idle timeout (60s) so it never reuses a
+# connection gunicorn has just closed
+keepalive = int(os.getenv('GUNICORN_KEEPALIVE', '75'))
+# Heartbeat files on tmpfs; a disk-backed /tmp can stall workers in Docker
+worker_tmp_dir = os.getenv('GUNICORN_WORKER_TMP_DIR', '/dev/shm' if os.path.isdir('/dev/shm') else None)
+# Each worker writes its Prometheus samples here and /metrics sums them
+# (ehs_backend.metrics); set before the app, and so prometheus_client, loads
+prometheus_dir = os.environ.setdefault(
+    'PROMETHEUS_MULTIPROC_DIR', os.path.join(worker_tmp_dir or tempfile.gettempdir(), 'ehs-prometheus')
+)
+# Emptied here, before preload_app imports the app and its live gauges open
+# their files: counters left by a previous master would be added to this one's
+shutil.rmtree(prometheus_dir, ignore_errors=True)
+os.makedirs(prometheus_dir, exist_ok=True)
+
+accesslog = os.getenv('GUNICORN_ACCESS_LOG', '-') or None
+errorlog = '-'
+loglevel = os.getenv('GUNICORN_LOG_LEVEL', 'info')
+
+def when_ready(server):
+    server.log.info(
+        "Serving %s with %d %s workers (cpus=%s, memory_mb=%s, preload=%s)",
+        wsgi_app, workers, worker_class, cpus, memory_mb, preload_app
+    )
+    if preload_app:
+        for module in preload_modules:
+            importlib.import_module(module)
+        # Move everything imported so far to the permanent generation so
+        # collections in the workers don't write to, and un-share, its pages
+        gc.collect()
+        gc.freeze()
+
+def post_fork(server, worker):
+    if preload_app:
+        # Connections opened while preloading belong to the master
+        from django.db import connections
+        connections.close_all()
+    from ehs_backend.metrics import worker_started
+    # Requests one worker serves at once; async workers are bounded by connections
+    if worker_class == 'gthread':
+        capacity = threads
+    elif worker_class == 'sync':
+        capacity = 1
+    else:
+        capacity = server.cfg.worker_connections
+    worker_started(capacity)
+
+def child_exit(server, worker):
+    # Drops the worker's live gauges from the aggregate
+    from prometheus_client import multiprocess
+    multiprocess.mark_process_dead(worker.pid)
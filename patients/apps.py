@@ -0,0 +1,7 @@
+from django.apps import AppConfig
+
+class PatientsConfig(AppConfig):
+    name = 'patients'
+
+    def ready(self):
+        from . import signals  # noqa: F401
@@ -0,0 +1,202 @@
+import csv
+import io
+import json
+import logging
+import multiprocessing
+from concurrent.futures import ProcessPoolExecutor
+from itertools import islice
+from django.conf import settings
+from django.contrib.auth.hashers import make_password
+from django.db import IntegrityError, transaction
+from users.models import User, Role
+from .models import Patient, PatientImportJob
+from .serializers import PatientImportRowSerializer
+
+logger = logging.getLogger(__name__)
+
+USER_FIELDS = ('username', 'email', 'first_name', 'last_name', 'phone_number')
+PATIENT_FIELDS = ('patient_id', 'date_of_birth', 'blood_group', 'emergency_contact', 'address')
+# Errors kept on the job row; the counter keeps counting past this
+MAX_STORED_ERRORS = 1000
+IMPORT_FORMATS = ('csv', 'ndjson')
+
+def iter_records(stream, file_format):
+    """Yield dict records from a CSV or NDJSON byte or text stream"""
+    if isinstance(stream.read(0), bytes):
+        stream = io.TextIOWrapper(stream, encoding='utf-8-sig', newline='')
+    if file_format == 'csv':
+        yield from csv.DictReader(stream)
+    elif file_format == 'ndjson':
+        for line in stream:
+            if line.strip():
+                yield json.loads(line)
+    else:
+        raise ValueError(f"Unsupported import format: {file_format}")
+
+def _init_hash_worker():
+    import django
+    django.setup()
+
+def _hash_passwords(passwords):
+    return [make_password(password) for password in passwords]
+
+class PasswordHasherPool:
+    """Hash password batches across processes; hashing dominates import time.
+
+    Falls back to hashing in-process when `workers` is 1 or the current
+    process is daemonic (e.g. a Celery prefork child), which cannot fork.
+    """
+    def __init__(self, workers):
+        self.workers = workers
+        self.pool = None
+        if workers > 1 and not multiprocessing.current_process().daemon:
+            self.pool = ProcessPoolExecutor(max_workers=workers, initializer=_init_hash_worker)
+
+    def hash(self, passwords):
+        # Rows without a password get an unusable one; that needs no hashing
+        hashed = [None if password else make_password(None) for password in passwords]
+        pending = [index for index, password in enumerate(passwords) if password]
+        if not pending:
+            return hashed
+        values = [passwords[index] for index in pending]
+        if self.pool is None:
+            results = _hash_passwords(values)
+        else:
+            size = max(1, -(-len(values) // self.workers))
+            batches = [values[start:start + size] for start in range(0, len(values), size)]
+            results = [value for batch in self.pool.map(_hash_passwords, batches) for value in batch]
+        for index, value in zip(pending, results):
+            hashed[index] = value
+        return hashed
+
+    def close(self):
+        if self.pool is not None:
+            self.pool.shutdown()
+
+class PatientImporter:
+    """Chunked, resumable bulk import of patient users and Patient rows.
+
+    Each chunk is validated, checked for username and patient_id
+    collisions against the file and the database, hashed, and written with
+    two bulk_create calls in one transaction together with the job's
+    checkpoint, so an interrupted import resumes exactly after the last
+    committed chunk.
+    """
+    def __init__(self, job, chunk_size=None, workers=None):
+        self.job = job
+        self.chunk_size = chunk_size or settings.PATIENT_IMPORT_CHUNK_SIZE
+        self.workers = workers or settings.PATIENT_IMPORT_HASH_WORKERS
+
+    def run(self, stream):
+        job = self.job
+        job.status = PatientImportJob.Status.RUNNING
+        job.save(update_fields=['status', 'updated_at'])
+
+        records = islice(iter_records(stream, job.file_format), job.next_record, None)
+        hasher = PasswordHasherPool(self.workers)
+        try:
+            while True:
+                chunk = list(islice(records, self.chunk_size))
+                if not chunk:
+                    break
+                self.import_chunk(job.next_record, chunk, hasher)
+        except Exception:
+            job.status = PatientImportJob.Status.FAILED
+            job.save(update_fields=['status', 'updated_at'])
+            raise
+        finally:
+            hasher.close()
+
+        job.status = PatientImportJob.Status.COMPLETED
+        job.save(update_fields=['status', 'updated_at'])
+        return job
+
+    def validate_chunk(self, offset, chunk):
+        """Validated rows as (record number, data) plus per-record errors"""
+        rows, errors = [], []
+        seen_usernames, seen_patient_ids = set(), set()
+        for number, record in enumerate(chunk, start=offset):
+            serializer = PatientImportRowSerializer(data=record)
+            if not serializer.is_valid():
+                errors.append({'record': number, 'errors': serializer.errors})
+                continue
+            data = serializer.validated_data
+            if data['username'] in seen_usernames:
+                errors.append({'record': number, 'errors': {'username': ['Duplicate in file']}})
+                continue
+            if data['patient_id'] in seen_patient_ids:
+                errors.append({'record': number, 'errors': {'patient_id': ['Duplicate in file']}})
+                continue
+            seen_usernames.add(data['username'])
+            seen_patient_ids.add(data['patient_id'])
+            rows.append((number, data))
+
+        taken_usernames = set(User.objects.filter(
+            username__in=seen_usernames
+        ).values_list('username', flat=True))
+        taken_patient_ids = set(Patient.objects.filter(
+            patient_id__in=seen_patient_ids
+        ).values_list('patient_id', flat=True))
+
+        valid = []
+        for number, data in rows:
+            if data['username'] in taken_usernames:
+                errors.append({'record': number, 'errors': {'username': ['Already exists']}})
+            elif data['patient_id'] in taken_patient_ids:
+                errors.append({'record': number, 'errors': {'patient_id': ['Already exists']}})
+            else:
+                valid.append((number, data))
+        return valid, errors
+
+    def import_chunk(self, offset, chunk, hasher):
+        rows, errors = self.validate_chunk(offset, chunk)
+        passwords = hasher.hash([data['password'] for _, data in rows])
+
+        users = [
+            User(
+                role=Role.PATIENT,
+                password=password,
+                **{field: data[field] for field in USER_FIELDS}
+            )
+            for (_, data), password in zip(rows, passwords)
+        ]
+        try:
+            with transaction.atomic():
+                created = self.write(rows, users)
+                self.checkpoint(offset + len(chunk), created, errors)
+        except IntegrityError:
+            # A concurrent registration took a username or patient_id after
+            # validation; retry row by row so only the clashing rows fail
+            logger.warning("Bulk insert conflict at record %d, retrying row by row", offset)
+            with transaction.atomic():
+                created = 0
+                for (number, data), user in zip(rows, users):
+                    # Drop primary keys assigned by the rolled-back insert
+                    user.pk = None
+                    user._state.adding = True
+                    try:
+                        with transaction.atomic():
+                            created += self.write([(number, data)], [user])
+                    except IntegrityError as e:
+                        errors.append({'record': number, 'errors': {'non_field_errors': [str(e)]}})
+                self.checkpoint(offset + len(chunk), created, errors)
+
+    def write(self, rows, users):
+        User.objects.bulk_create(users)
+        Patient.objects.bulk_create([
+            Patient(user=user, **{field: data[field] for field in PATIENT_FIELDS})
+            for (_, data), user in zip(rows, users)
+        ])
+        return len(users)
+
+    def checkpoint(self, next_record, created, errors):
+        job = self.job
+        job.next_record = next_record
+        job.created_count += created
+        job.error_count += len(errors)
+        room = MAX_STORED_ERRORS - len(job.errors)
+        if room > 0:
+            job.errors = job.errors + errors[:room]
+        job.save(update_fields=[
+            'next_record', 'created_count', 'error_count', 'errors', 'updated_at'
+        ])
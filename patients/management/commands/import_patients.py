@@ -0,0 +1,42 @@
+import os
+from django.core.management.base import BaseCommand, CommandError
+from patients.imports import PatientImporter
+from patients.models import PatientImportJob
+
+class Command(BaseCommand):
+    help = 'Bulk import patients (user account plus Patient row) from CSV or NDJSON'
+
+    def add_arguments(self, parser):
+        parser.add_argument('path')
+        parser.add_argument('--format', choices=['csv', 'ndjson'], dest='file_format')
+        parser.add_argument('--chunk-size', type=int)
+        parser.add_argument('--workers', type=int, help='Password hashing processes')
+        parser.add_argument('--restart', action='store_true',
+                            help='Start over instead of resuming an unfinished import')
+
+    def handle(self, *args, **options):
+        path = os.path.abspath(options['path'])
+        if not os.path.exists(path):
+            raise CommandError(f"No such file: {path}")
+        file_format = options['file_format'] or (
+            'ndjson' if path.endswith(('.ndjson', '.jsonl')) else 'csv'
+        )
+
+        job = None
+        if not options['restart']:
+            job = PatientImportJob.objects.filter(source=path).exclude(
+                status=PatientImportJob.Status.COMPLETED
+            ).order_by('-created_at').first()
+        if job is None:
+            job = PatientImportJob.objects.create(source=path, file_format=file_format)
+        else:
+            self.stdout.write(f"Resuming import {job.id} at record {job.next_record}")
+
+        with open(path, 'rb') as source:
+            PatientImporter(job, options['chunk_size'], options['workers']).run(source)
+
+        self.stdout.write(self.style.SUCCESS(
+            f"Import {job.id}: {job.created_count} patients created, {job.error_count} rows rejected"
+        ))
+        for error in job.errors[:20]:
+            self.stdout.write(self.style.WARNING(f"record {error['record']}: {error['errors']}"))
@@ -2,8 +2,6 @@ from django.db import models
 from django.core.validators import FileExtensionValidator
 from users.models import User
 from django.utils.translation import gettext_lazy as _
-from fhir.resources.patient import Patient as FHIRPatient
-from fhir.resources.observation import Observation as FHIRObservation
 
 class Patient(models.Model):
     user = models.OneToOneField(User, on_delete=models.CASCADE)
@@ -19,6 +17,10 @@ class Patient(models.Model):
 
     def to_fhir(self):
         """Convert patient data to FHIR format"""
+        # fhir.resources builds pydantic models for every resource it loads
+        # (~100ms); only import it where FHIR is actually produced
+        from fhir.resources.patient import Patient as FHIRPatient
+
         return FHIRPatient(
             id=self.fhir_id,
             identifier=[{
@@ -50,6 +52,8 @@ class MedicalHistory(models.Model):
 
     def to_fhir_observation(self):
         """Convert medical history to FHIR Observation"""
+        from fhir.resources.observation import Observation as FHIRObservation
+
         return FHIRObservation(
             subject={"reference": f"Patient/{self.patient.fhir_id}"},
             status="final",
@@ -108,4 +112,32 @@ class HL7Message(models.Model):
     class Meta:
         indexes = [
             models.Index(fields=['message_type', 'processed'])
-        ]
\ No newline at end of file
+        ]
+
+class PatientImportJob(models.Model):
+    """Progress of a bulk registry import; `next_record` is the resume point"""
+    class Status(models.TextChoices):
+        PENDING = 'PENDING', _('Pending')
+        RUNNING = 'RUNNING', _('Running')
+        COMPLETED = 'COMPLETED', _('Completed')
+        FAILED = 'FAILED', _('Failed')
+
+    source = models.CharField(max_length=255)
+    file_format = models.CharField(max_length=10)
+    status = models.CharField(
+        max_length=20,
+        choices=Status.choices,
+        default=Status.PENDING
+    )
+    next_record = models.PositiveIntegerField(default=0)
+    created_count = models.PositiveIntegerField(default=0)
+    error_count = models.PositiveIntegerField(default=0)
+    errors = models.JSONField(default=list)
+    created_by = models.ForeignKey(User, on_delete=models.SET_NULL, null=True)
+    created_at = models.DateTimeField(auto_now_add=True)
+    updated_at = models.DateTimeField(auto_now=True)
+
+    class Meta:
+        indexes = [
+            models.Index(fields=['source', 'status'])
+        ]
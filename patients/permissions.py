@@ -0,0 +1,12 @@
+from users.models import Role
+from users.permissions import PermissionRule, SnapshotPermission
+
+class PatientRecordPermission(SnapshotPermission):
+    rules = {
+        'medical_history': PermissionRule(
+            'users.can_view_patient_records', roles=[Role.DOCTOR], owner_field='user_id'
+        ),
+        'documents': PermissionRule('users.can_edit_patient_records', owner_field='user_id'),
+        'fhir': PermissionRule('users.can_view_patient_records', owner_field='user_id'),
+        'import_hl7': PermissionRule('users.can_edit_patient_records'),
+    }
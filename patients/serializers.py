@@ -1,4 +1,5 @@
 from rest_framework import serializers
+from django.contrib.auth.validators import UnicodeUsernameValidator
 from .models import Patient, MedicalHistory, Document, HL7Message
 
 class PatientSerializer(serializers.ModelSerializer):
@@ -70,4 +71,18 @@ class HL7MessageSerializer(serializers.ModelSerializer):
             'processed',
             'created_at'
         ]
-        read_only_fields = ['processed', 'created_at']
\ No newline at end of file
+        read_only_fields = ['processed', 'created_at']
+
+class PatientImportRowSerializer(serializers.Serializer):
+    """One registry row; uniqueness is checked per chunk by the importer"""
+    username = serializers.CharField(max_length=150, validators=[UnicodeUsernameValidator()])
+    email = serializers.EmailField(required=False, allow_blank=True, default='')
+    first_name = serializers.CharField(max_length=150, required=False, allow_blank=True, default='')
+    last_name = serializers.CharField(max_length=150, required=False, allow_blank=True, default='')
+    phone_number = serializers.CharField(max_length=15)
+    password = serializers.CharField(required=False, allow_blank=True, default='')
+    patient_id = serializers.CharField(max_length=20)
+    date_of_birth = serializers.DateField()
+    blood_group = serializers.CharField(max_length=5)
+    emergency_contact = serializers.CharField(max_length=15)
+    address = serializers.CharField()
@@ -1,18 +1,19 @@
 import os
 import json
-from PIL import Image
 from io import BytesIO
 from django.core.files.base import ContentFile
 from django.conf import settings
-from fhir.resources.patient import Patient as FHIRPatient
-from fhir.resources.bundle import Bundle
-import hl7
+
+# PIL, fhir.resources and hl7 are imported where they are used: web
+# workers and management commands that never touch them skip loading them
 
 class ImageProcessor:
     @staticmethod
     def compress_image(document):
         """Compress image while maintaining quality"""
         if document.mime_type.startswith('image/'):
+            from PIL import Image
+
             img = Image.open(document.file)
             
             # Convert RGBA to RGB if necessary
@@ -48,6 +49,8 @@ class FHIRExporter:
     @staticmethod
     def export_patient_data(patient):
         """Export patient data in FHIR format"""
+        from fhir.resources.bundle import Bundle
+
         # Create FHIR Patient resource
         fhir_patient = patient.to_fhir()
         
@@ -70,6 +73,8 @@ class HL7Processor:
     @staticmethod
     def parse_message(message_content):
         """Parse HL7 message"""
+        import hl7
+
         try:
             parsed_message = hl7.parse(message_content)
             return {
@@ -0,0 +1,28 @@
+from django.db.models.signals import post_save
+from django.dispatch import receiver
+from ehs_backend.cache import invalidate_tags_on_commit, track_cache_tags
+from users.models import ClaimsUser, User
+from .models import Patient, MedicalHistory
+
+# User fields in cached patient responses (the FHIR Patient name)
+PATIENT_USER_FIELDS = ('first_name', 'last_name')
+
+def patient_tags(pk, values):
+    return [f"patient:{pk}"]
+
+def medical_history_tags(pk, values):
+    if values['patient_id'] is None:
+        return []
+    return [f"patient:{values['patient_id']}:medical_history"]
+
+track_cache_tags(Patient, (), patient_tags)
+track_cache_tags(MedicalHistory, ('patient_id',), medical_history_tags)
+
+@receiver(post_save, sender=User)
+@receiver(post_save, sender=ClaimsUser)
+def patient_user_saved(sender, instance, created, update_fields=None, **kwargs):
+    """Invalidate a patient's cached responses when their user is renamed"""
+    if created or (update_fields is not None and not set(update_fields) & set(PATIENT_USER_FIELDS)):
+        return
+    patient_ids = Patient.objects.filter(user_id=instance.pk).values_list('pk', flat=True)
+    invalidate_tags_on_commit(*[f"patient:{pk}" for pk in patient_ids])
@@ -1,8 +1,12 @@
-from celery import shared_task
+import logging
+from ehs_backend.celery import app
+from django.core.files.storage import default_storage
 from .models import Document
 from .services import ImageProcessor
 
-@shared_task
+logger = logging.getLogger(__name__)
+
+@app.task
 def process_medical_image(document_id):
     """Asynchronous task to process and compress medical images"""
     try:
@@ -14,7 +18,7 @@ def process_medical_image(document_id):
     except Exception as e:
         return f"Error processing document {document_id}: {str(e)}"
 
-@shared_task
+@app.task
 def process_hl7_messages():
     """Process pending HL7 messages"""
     from .models import HL7Message
@@ -28,6 +32,32 @@ def process_hl7_messages():
             # Update patient records accordingly
             message.processed = True
             message.save()
-        except Exception as e:
-            print(f"Error processing HL7 message {message.id}: {str(e)}")
-            continue
\ No newline at end of file
+        except Exception:
+            logger.exception("Error processing HL7 message %s", message.id)
+            continue
+
+@app.task
+def import_patient_registry(job_id):
+    """Run (or resume) a bulk patient import from a file in default_storage.
+
+    The file holds PHI and initial passwords, so it is deleted once the
+    task finishes, whatever the outcome. A worker lost mid-import never
+    gets there, which leaves the file for the redelivered task to resume.
+    """
+    from .imports import PatientImporter
+    from .models import PatientImportJob
+
+    job = PatientImportJob.objects.get(id=job_id)
+    try:
+        if job.status == PatientImportJob.Status.COMPLETED:
+            return {'job_id': job.id, 'status': job.status}
+        with default_storage.open(job.source, 'rb') as source:
+            PatientImporter(job).run(source)
+    finally:
+        default_storage.delete(job.source)
+    return {
+        'job_id': job.id,
+        'status': job.status,
+        'created': job.created_count,
+        'errors': job.error_count
+    }
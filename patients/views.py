@@ -1,24 +1,30 @@
 from rest_framework import viewsets, permissions, status, parsers, filters
 from rest_framework.decorators import action
 from rest_framework.response import Response
+from django.conf import settings
 from django.shortcuts import get_object_or_404
 from django.core.files.storage import default_storage
+from django.db import transaction
 from django.db.models import Q
-from .models import Patient, MedicalHistory, Document, HL7Message
+from .imports import IMPORT_FORMATS
+from .models import Patient, MedicalHistory, Document, HL7Message, PatientImportJob
 from .serializers import (
     PatientSerializer, 
     MedicalHistorySerializer,
     DocumentSerializer,
     HL7MessageSerializer
 )
+from .permissions import PatientRecordPermission
 from .services import ImageProcessor, FHIRExporter, HL7Processor
-from .tasks import process_medical_image
-from users.models import User, AuditLog
+from users.models import User
+from users.audit import record_audit_event
+from ehs_backend.cache import CachedResponseMixin, cache_response
+from ehs_backend.db_router import ReplicaReadMixin
 
-class PatientViewSet(viewsets.ModelViewSet):
+class PatientViewSet(ReplicaReadMixin, CachedResponseMixin, viewsets.ModelViewSet):
     queryset = Patient.objects.all()
     serializer_class = PatientSerializer
-    permission_classes = [permissions.IsAuthenticated]
+    permission_classes = [permissions.IsAuthenticated, PatientRecordPermission]
     filter_backends = [filters.SearchFilter]
     search_fields = [
         'user__first_name',
@@ -27,11 +33,24 @@ class PatientViewSet(viewsets.ModelViewSet):
         'user__email',
         'user__phone_number'
     ]
+    replica_actions = ('list', 'fhir')
+    cache_timeouts = {
+        'medical_history': 300,
+        'fhir': 900,
+    }
+
+    def get_cache_tags(self, request, pk=None):
+        # Invalidated by patients.signals on Patient, MedicalHistory and
+        # patient User writes
+        return [f"patient:{pk}", f"patient:{pk}:medical_history"]
 
     def get_queryset(self):
         """Filter queryset based on user role and search query"""
         user = self.request.user
         queryset = Patient.objects.all()
+        if self.action == 'fhir':
+            # The FHIR Patient resource includes the user's name
+            queryset = queryset.select_related('user')
 
         # Filter based on user role
         if user.role == User.Role.PATIENT:
@@ -53,11 +72,11 @@ class PatientViewSet(viewsets.ModelViewSet):
     def perform_create(self, serializer):
         """Create new patient and log action"""
         patient = serializer.save()
-        AuditLog.objects.create(
+        record_audit_event(
             user=self.request.user,
             action='CREATE',
             resource_type='PATIENT',
-            resource_id=str(patient.id),
+            resource_id=patient.id,
             ip_address=self.request.META.get('REMOTE_ADDR'),
             details={'patient_id': patient.patient_id}
         )
@@ -65,28 +84,20 @@ class PatientViewSet(viewsets.ModelViewSet):
     def perform_update(self, serializer):
         """Update patient and log action"""
         patient = serializer.save()
-        AuditLog.objects.create(
+        record_audit_event(
             user=self.request.user,
             action='UPDATE',
             resource_type='PATIENT',
-            resource_id=str(patient.id),
+            resource_id=patient.id,
             ip_address=self.request.META.get('REMOTE_ADDR'),
             details={'patient_id': patient.patient_id}
         )
 
     @action(detail=True, methods=['get'])
+    @cache_response()
     def medical_history(self, request, pk=None):
         """Retrieve medical history for a specific patient"""
         patient = self.get_object()
-        
-        # Check permissions
-        if not request.user.has_perm('users.can_view_patient_records'):
-            if request.user.role != User.Role.DOCTOR and request.user != patient.user:
-                return Response(
-                    {"detail": "Permission denied"},
-                    status=status.HTTP_403_FORBIDDEN
-                )
-        
         medical_history = MedicalHistory.objects.filter(patient=patient)
         serializer = MedicalHistorySerializer(medical_history, many=True)
         return Response(serializer.data)
@@ -94,16 +105,10 @@ class PatientViewSet(viewsets.ModelViewSet):
     @action(detail=True, methods=['post'])
     def documents(self, request, pk=None):
         """Upload document for a patient"""
-        patient = self.get_object()
-        
-        # Check permissions
-        if not request.user.has_perm('users.can_edit_patient_records'):
-            if request.user != patient.user:
-                return Response(
-                    {"detail": "Permission denied"},
-                    status=status.HTTP_403_FORBIDDEN
-                )
+        # Imported here so web processes load the Celery app on first use
+        from .tasks import process_medical_image
 
+        patient = self.get_object()
         serializer = DocumentSerializer(data=request.data)
         if serializer.is_valid():
             document = serializer.save(
@@ -119,30 +124,59 @@ class PatientViewSet(viewsets.ModelViewSet):
         return Response(serializer.errors, status=status.HTTP_400_BAD_REQUEST)
 
     @action(detail=True, methods=['get'])
+    @cache_response()
     def fhir(self, request, pk=None):
         """Export patient data in FHIR format"""
         patient = self.get_object()
-        
-        # Check permissions
-        if not request.user.has_perm('users.can_view_patient_records'):
-            if request.user != patient.user:
-                return Response(
-                    {"detail": "Permission denied"},
-                    status=status.HTTP_403_FORBIDDEN
-                )
-        
         fhir_data = FHIRExporter.export_patient_data(patient)
         return Response(fhir_data)
 
-    @action(detail=False, methods=['post'])
-    def import_hl7(self, request):
-        """Import patient data from HL7 message"""
-        if not request.user.has_perm('users.can_edit_patient_records'):
+    @action(detail=False, methods=['post'], parser_classes=[parsers.MultiPartParser])
+    def import_registry(self, request):
+        """Queue a bulk import of an uploaded CSV or NDJSON patient registry"""
+        from .tasks import import_patient_registry
+
+        if not request.user.is_staff:
             return Response(
                 {"detail": "Permission denied"},
                 status=status.HTTP_403_FORBIDDEN
             )
+        upload = request.FILES.get('file')
+        if upload is None:
+            return Response(
+                {"file": "A registry file is required"},
+                status=status.HTTP_400_BAD_REQUEST
+            )
+        file_format = request.data.get('format') or upload.name.rsplit('.', 1)[-1].lower()
+        if file_format not in IMPORT_FORMATS:
+            return Response(
+                {"format": f"Expected one of: {', '.join(IMPORT_FORMATS)}"},
+                status=status.HTTP_400_BAD_REQUEST
+            )
+
+        source = default_storage.save(f'{settings.PATIENT_IMPORT_PREFIX}/{upload.name}', upload)
+        job = PatientImportJob.objects.create(
+            source=source,
+            file_format=file_format,
+            created_by=request.user
+        )
+        transaction.on_commit(lambda: import_patient_registry.delay(job.id))
+        record_audit_event(
+            user=request.user,
+            action='IMPORT',
+            resource_type='PATIENT_IMPORT',
+            resource_id=job.id,
+            ip_address=request.META.get('REMOTE_ADDR'),
+            details={'source': source, 'format': file_format}
+        )
+        return Response(
+            {'job_id': job.id, 'status': job.status},
+            status=status.HTTP_202_ACCEPTED
+        )
 
+    @action(detail=False, methods=['post'])
+    def import_hl7(self, request):
+        """Import patient data from HL7 message"""
         serializer = HL7MessageSerializer(data=request.data)
         if serializer.is_valid():
             try:
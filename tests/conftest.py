@@ -1,9 +1,23 @@
 import pytest
 import os
+from django.core.cache import caches
 from django.core.files.uploadedfile import SimpleUploadedFile
 from rest_framework.test import APIClient
 from users.models import User
 
+@pytest.fixture(autouse=True)
+def clear_cache():
+    for alias in caches:
+        caches[alias].clear()
+    yield
+    for alias in caches:
+        caches[alias].clear()
+
+@pytest.fixture(autouse=True)
+def sync_audit_log(settings):
+    # Tests assert on audit rows straight after the request
+    settings.AUDIT_LOG_MODE = 'sync'
+
 @pytest.fixture
 def api_client():
     return APIClient()
@@ -37,6 +51,12 @@ def doctor_user():
         phone_number='+911234567891'
     )
 
+@pytest.fixture
+def media_root(settings, tmp_path):
+    """Uploads saved during the test go to a temporary MEDIA_ROOT"""
+    settings.MEDIA_ROOT = str(tmp_path)
+    return tmp_path
+
 @pytest.fixture
 def test_image():
     file_path = os.path.join(os.path.dirname(__file__), 'test_files/test_image.jpg')
@@ -0,0 +1,302 @@
+import pytest
+from array import array
+from datetime import date, timedelta
+from decimal import Decimal
+from unittest.mock import patch
+from django.utils import timezone
+from patients.models import Patient
+from appointments.models import Appointment
+from billing.models import Invoice
+from analytics.models import (
+    DailyPatientRollup, DailyAppointmentRollup, DailyInvoiceRollup, AnalyticsSnapshot, ExportWatermark,
+    StaleRollupDate
+)
+from analytics import dashboards
+from analytics.compute import CohortAnalytics, Column, Histogram, iter_column_chunks
+from analytics.export import SnapshotExporter
+from analytics.services import RollupBuilder
+from analytics.tasks import (
+    backfill_analytics_rollups, generate_daily_analytics, generate_monthly_report, refresh_analytics_rollups
+)
+
+@pytest.fixture
+def patient(create_user):
+    return Patient.objects.create(
+        user=create_user,
+        patient_id='P1',
+        date_of_birth='1990-01-01'
+    )
+
+@pytest.mark.django_db
+class TestAnalyticsRollups:
+    def test_rebuild_is_idempotent(self, patient, doctor_user):
+        today = timezone.now().date()
+        Appointment.objects.create(
+            patient=patient,
+            doctor=doctor_user,
+            date=today,
+            time_slot='10:00:00',
+            status=Appointment.Status.COMPLETED
+        )
+        Appointment.objects.create(
+            patient=patient,
+            doctor=doctor_user,
+            date=today,
+            time_slot='11:00:00',
+            status=Appointment.Status.COMPLETED
+        )
+
+        RollupBuilder.rebuild(today, today)
+        RollupBuilder.rebuild(today, today)
+
+        rollup = DailyAppointmentRollup.objects.get(date=today)
+        assert rollup.count == 2
+        assert rollup.doctor == doctor_user
+        assert DailyPatientRollup.objects.get(date=today).new_patients == 1
+
+    def test_invoice_rollup_sums_by_status(self, patient):
+        for number, status in [('INV001', Invoice.Status.PAID), ('INV002', Invoice.Status.PAID),
+                               ('INV003', Invoice.Status.PENDING)]:
+            Invoice.objects.create(
+                patient=patient,
+                invoice_number=number,
+                amount=Decimal('100.00'),
+                tax=Decimal('18.00'),
+                total_amount=Decimal('118.00'),
+                status=status,
+                due_date='2024-01-15'
+            )
+        today = timezone.now().date()
+
+        RollupBuilder.rebuild(today, today)
+
+        paid = DailyInvoiceRollup.objects.get(date=today, status=Invoice.Status.PAID)
+        assert paid.invoice_count == 2
+        assert paid.total_amount == Decimal('236.00')
+
+    def test_refresh_rebuilds_days_of_late_status_changes(self, patient):
+        invoice = Invoice.objects.create(
+            patient=patient,
+            invoice_number='INV-OLD',
+            amount=Decimal('100.00'),
+            tax=Decimal('18.00'),
+            total_amount=Decimal('118.00'),
+            status=Invoice.Status.PENDING,
+            due_date='2024-01-15'
+        )
+        old_date = timezone.now().date() - timedelta(days=30)
+        Invoice.objects.filter(pk=invoice.pk).update(created_at=timezone.now() - timedelta(days=30))
+        RollupBuilder.rebuild(old_date, old_date)
+
+        # Paid long after the refresh window moved past its creation day
+        invoice.refresh_from_db()
+        invoice.status = Invoice.Status.PAID
+        invoice.save()
+        result = refresh_analytics_rollups.apply().get()
+
+        assert result['changed_dates'] == [old_date.isoformat()]
+        rollup = DailyInvoiceRollup.objects.get(date=old_date)
+        assert (rollup.status, rollup.invoice_count) == (Invoice.Status.PAID, 1)
+
+    def test_refresh_rebuilds_days_left_by_reschedules_and_deletes(self, patient, doctor_user, settings):
+        settings.REPLICA_MAX_LAG_SECONDS = 0
+        today = timezone.now().date()
+        moved_from, deleted_on = today - timedelta(days=30), today - timedelta(days=40)
+        moved = Appointment.objects.create(
+            patient=patient, doctor=doctor_user, date=moved_from, time_slot='10:00', reason='Checkup'
+        )
+        deleted = Appointment.objects.create(
+            patient=patient, doctor=doctor_user, date=deleted_on, time_slot='10:00', reason='Checkup'
+        )
+        RollupBuilder.rebuild(deleted_on, moved_from)
+
+        moved.date = today
+        moved.save()
+        deleted.delete()
+        result = refresh_analytics_rollups.apply().get()
+
+        assert result['changed_dates'] == [deleted_on.isoformat(), moved_from.isoformat()]
+        assert not DailyAppointmentRollup.objects.filter(date__in=[moved_from, deleted_on]).exists()
+        assert DailyAppointmentRollup.objects.get(date=today).count == 1
+        assert not StaleRollupDate.objects.exists()
+
+    def test_backfill_covers_history_in_chunks(self, patient, doctor_user):
+        old_date = timezone.now().date() - timedelta(days=90)
+        Appointment.objects.create(
+            patient=patient,
+            doctor=doctor_user,
+            date=old_date,
+            time_slot='10:00:00'
+        )
+
+        result = backfill_analytics_rollups(chunk_days=31)
+
+        assert result['chunks'] == 3
+        assert DailyAppointmentRollup.objects.get(date=old_date).count == 1
+
+    def test_backfill_accepts_iso_dates(self, patient, doctor_user):
+        Appointment.objects.create(
+            patient=patient,
+            doctor=doctor_user,
+            date=date(2024, 1, 1),
+            time_slot='10:00:00'
+        )
+
+        backfill_analytics_rollups('2024-01-01', '2024-01-01')
+
+        assert DailyAppointmentRollup.objects.filter(date=date(2024, 1, 1)).count() == 1
+
+    def test_generate_daily_analytics_persists_rollups(self, patient, doctor_user):
+        yesterday = timezone.now().date() - timedelta(days=1)
+        Appointment.objects.create(
+            patient=patient,
+            doctor=doctor_user,
+            date=yesterday,
+            time_slot='10:00:00'
+        )
+
+        analytics = generate_daily_analytics()
+
+        assert analytics['appointments'] == 1
+        assert DailyAppointmentRollup.objects.filter(date=yesterday).exists()
+
+@pytest.mark.django_db
+class TestDashboardQueries:
+    def test_age_buckets_use_actual_age(self, create_user, doctor_user):
+        today = date(2024, 6, 15)
+        # Turns 19 tomorrow, so still in the 0-18 bucket
+        Patient.objects.create(user=create_user, patient_id='P1', date_of_birth='2005-06-16')
+        # Turned 19 today
+        Patient.objects.create(user=doctor_user, patient_id='P2', date_of_birth='2005-06-15')
+
+        demographics = dashboards.patient_demographics(today).run()
+
+        assert demographics['total_patients'] == 2
+        assert demographics['age_distribution']['0-18'] == 1
+        assert demographics['age_distribution']['19-30'] == 1
+        assert demographics['age_distribution']['51+'] == 0
+
+    def test_financial_summary_is_one_statement(self, patient, django_assert_num_queries):
+        today = timezone.now().date()
+        DailyInvoiceRollup.objects.create(
+            date=today, status=Invoice.Status.PAID, invoice_count=2, total_amount=Decimal('200.00')
+        )
+        DailyInvoiceRollup.objects.create(
+            date=today, status=Invoice.Status.PENDING, invoice_count=1, total_amount=Decimal('50.00')
+        )
+
+        with django_assert_num_queries(1):
+            summary = dashboards.financial_summary(today, today).run()
+
+        assert summary['total_revenue'] == Decimal('250.00')
+        assert summary['paid_amount'] == Decimal('200.00')
+        assert summary['pending_amount'] == Decimal('50.00')
+        assert summary['invoice_count'] == 3
+
+    @patch('analytics.tasks.CohortAnalytics.compute', return_value={})
+    def test_monthly_report_query_budget(self, compute, patient, django_assert_num_queries):
+        with django_assert_num_queries(3):
+            report = generate_monthly_report()
+
+        assert report['patient_demographics']['total_patients'] == 1
+        assert report['financial_summary']['total_revenue'] == 0
+
+@pytest.mark.django_db
+class TestCohortAnalytics:
+    def test_histogram_quantiles(self):
+        histogram = Histogram(list(range(0, 131)))
+        histogram.add(array('l', [10, 20, 30, 40]))
+        histogram.add(array('l', [50]))
+
+        result = histogram.as_dict()
+
+        assert result['count'] == 5
+        assert result['mean'] == 30
+        assert result['min'] == 10 and result['max'] == 50
+        assert 30 <= result['quantiles']['p50'] < 31
+
+    def test_column_chunks_are_bounded(self, patient, doctor_user):
+        for hour in range(5):
+            Appointment.objects.create(
+                patient=patient,
+                doctor=doctor_user,
+                date=date(2024, 1, 1),
+                time_slot=f'{10 + hour}:00:00'
+            )
+
+        chunks = list(iter_column_chunks(Appointment.objects.all(), [Column('doctor_id', 'q')], chunk_size=2))
+
+        assert [len(doctor_ids) for (doctor_ids,) in chunks] == [2, 2, 1]
+
+    def test_compute_stores_snapshots(self, patient, doctor_user):
+        today = timezone.now().date()
+        Appointment.objects.create(
+            patient=patient,
+            doctor=doctor_user,
+            date=today,
+            time_slot='10:00:00',
+            status=Appointment.Status.COMPLETED
+        )
+        Appointment.objects.create(
+            patient=patient,
+            doctor=doctor_user,
+            date=today,
+            time_slot='11:00:00',
+            status=Appointment.Status.CANCELLED
+        )
+        Invoice.objects.create(
+            patient=patient,
+            invoice_number='INV001',
+            amount=Decimal('1000.00'),
+            tax=Decimal('180.00'),
+            total_amount=Decimal('1180.00'),
+            due_date='2024-01-15'
+        )
+
+        metrics = CohortAnalytics.compute(today - timedelta(days=30), today, chunk_size=1)
+
+        assert metrics['invoice_revenue']['max'] == 1180
+        assert metrics['patient_age']['count'] == 1
+        utilisation = metrics['doctor_utilisation'][0]
+        assert utilisation['appointments'] == 2
+        assert utilisation['completion_rate'] == 1
+        assert utilisation['cancellation_rate'] == 0.5
+        assert AnalyticsSnapshot.objects.filter(period_end=today).count() == 3
+
+@pytest.mark.django_db
+class TestWarehouseExport:
+    def test_incremental_export_only_moves_changed_rows(self, patient, tmp_path, settings):
+        import pyarrow.parquet as pq
+        from django.core.files.storage import FileSystemStorage
+
+        settings.ANALYTICS_EXPORT_SAFETY_LAG = 0
+        storage = FileSystemStorage(location=str(tmp_path))
+        exporter = SnapshotExporter(storage=storage, chunk_size=1)
+
+        first = exporter.export(tables=['patients'])[0]
+        assert len(first['files']) == 1
+        table = pq.read_table(storage.path(first['files'][0]))
+        assert table.column('patient_id').to_pylist() == ['P1']
+
+        second = exporter.export(tables=['patients'])[0]
+        assert second['files'] == []
+
+        patient.address = 'New address'
+        patient.save()
+        third = exporter.export(tables=['patients'])[0]
+        assert len(third['files']) == 1
+        assert ExportWatermark.objects.get(table='patients').value == patient.updated_at
+
+    def test_rows_inside_the_safety_lag_wait_for_the_next_run(self, patient, tmp_path, settings):
+        from django.core.files.storage import FileSystemStorage
+
+        settings.ANALYTICS_EXPORT_SAFETY_LAG = 600
+        exporter = SnapshotExporter(storage=FileSystemStorage(location=str(tmp_path)))
+        assert exporter.export(tables=['patients'])[0]['files'] == []
+
+        # Committed late, stamped when its transaction began
+        late = timezone.now() - timedelta(seconds=900)
+        Patient.objects.filter(pk=patient.pk).update(updated_at=late)
+        exported = exporter.export(tables=['patients'])[0]
+        assert len(exported['files']) == 1
+        assert ExportWatermark.objects.get(table='patients').value == late
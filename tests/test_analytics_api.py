@@ -1,12 +1,16 @@
 import pytest
+from django.core.cache import cache, caches
 from django.urls import reverse
 from rest_framework import status
+from rest_framework.request import Request
 from rest_framework.test import APIClient
 from datetime import datetime, timedelta
 from decimal import Decimal
 from patients.models import Patient
 from appointments.models import Appointment
 from billing.models import Invoice
+from analytics.tasks import refresh_analytics_rollups
+from ehs_backend.cache import request_cache_key
 
 @pytest.mark.django_db
 class TestAnalyticsAPI:
@@ -56,6 +60,7 @@ class TestAnalyticsAPI:
             due_date='2024-01-15'
         )
         
+        refresh_analytics_rollups()
         response = authenticated_client.get(
             reverse('analytics-financial-summary'),
             {'period': 'month'}
@@ -76,18 +81,19 @@ class TestAnalyticsAPI:
         Appointment.objects.create(
             patient=patient,
             doctor=doctor_user,
-            date='2024-01-01',
+            date=datetime.now().date() - timedelta(days=2),
             time_slot='10:00:00',
             status=Appointment.Status.COMPLETED
         )
         Appointment.objects.create(
             patient=patient,
             doctor=doctor_user,
-            date='2024-01-02',
+            date=datetime.now().date() - timedelta(days=1),
             time_slot='11:00:00',
             status=Appointment.Status.SCHEDULED
         )
         
+        refresh_analytics_rollups()
         response = authenticated_client.get(
             reverse('analytics-appointment-statistics'),
             {'period': 'month'}
@@ -95,4 +101,49 @@ class TestAnalyticsAPI:
         assert response.status_code == status.HTTP_200_OK
         assert response.data['total_appointments'] == 2
         assert len(response.data['status_distribution']) == 2
-        assert len(response.data['daily_distribution']) == 2
\ No newline at end of file
+        assert len(response.data['daily_distribution']) == 2
+
+    def test_dashboards_run_in_a_single_query(self, authenticated_client, django_assert_num_queries):
+        for name in ['patient-demographics', 'financial-summary', 'appointment-statistics']:
+            with django_assert_num_queries(1):
+                response = authenticated_client.get(reverse(f'analytics-{name}'))
+            assert response.status_code == status.HTTP_200_OK
+
+    def test_responses_are_cached_per_time_bucket(self, authenticated_client, django_assert_num_queries):
+        url = reverse('analytics-financial-summary')
+        first = authenticated_client.get(url, {'period': 'month'})
+
+        with django_assert_num_queries(0):
+            second = authenticated_client.get(url, {'period': 'month'})
+
+        assert second.data == first.data
+        # Different query params are a different entry
+        with django_assert_num_queries(1):
+            authenticated_client.get(url, {'period': 'year'})
+
+    def test_stale_entry_is_served_while_another_worker_recomputes(self, authenticated_client):
+        url = reverse('analytics-appointment-statistics')
+        authenticated_client.get(url)
+        request = authenticated_client.get(url).wsgi_request
+        key = request_cache_key(Request(request), prefix='response:appointment_statistics')
+        entry = cache.get(key)
+        entry['fresh_until'] = 0
+        entry['data']['total_appointments'] = 'stale'
+        cache.set(key, entry)
+        caches['locks'].add(f'{key}:lock', 1)
+
+        response = authenticated_client.get(url)
+
+        assert response.data['total_appointments'] == 'stale'
+
+    def test_cache_stats_requires_admin(self, authenticated_client, create_user):
+        response = authenticated_client.get(reverse('analytics-cache-stats'))
+        assert response.status_code == status.HTTP_403_FORBIDDEN
+
+        create_user.is_staff = True
+        create_user.save()
+        authenticated_client.get(reverse('analytics-patient-demographics'))
+        authenticated_client.get(reverse('analytics-patient-demographics'))
+        response = authenticated_client.get(reverse('analytics-cache-stats'))
+        assert response.data['patient_demographics']['miss'] == 1
+        assert response.data['patient_demographics']['hit'] == 1
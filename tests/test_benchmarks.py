@@ -0,0 +1,84 @@
+import json
+from datetime import date
+import pytest
+from django.core.management import call_command
+from appointments.models import Appointment
+from ehs_backend import benchmarks, synthetic
+from patients.models import Patient
+
+TODAY = date(2024, 6, 1)
+
+def snapshot():
+    return list(Patient.objects.order_by('patient_id').values_list(
+        'patient_id', 'user__last_name', 'date_of_birth', 'blood_group'
+    )) + list(Appointment.objects.order_by('date', 'time_slot', 'doctor__username').values_list(
+        'patient__patient_id', 'doctor__username', 'date', 'time_slot', 'status'
+    ))
+
+def test_slots_never_collide():
+    generator = synthetic.SyntheticHospital(patients=200, doctors=3, today=TODAY)
+    slots = [generator.slot(number) for number in range(200 * 2 * 4)]
+    assert len(set(slots)) == len(slots)
+
+@pytest.mark.django_db
+class TestSyntheticHospital:
+    def test_same_seed_same_dataset(self):
+        counts = synthetic.SyntheticHospital(patients=30, seed=7, batch_size=8, today=TODAY).generate()
+        first = snapshot()
+        synthetic.clear()
+        synthetic.SyntheticHospital(patients=30, seed=7, batch_size=8, today=TODAY).generate()
+
+        assert snapshot() == first
+        assert counts['patients'] == Patient.objects.count() == 30
+        assert counts['appointments'] == Appointment.objects.count()
+
+    def test_clear_leaves_other_rows(self, create_user):
+        synthetic.SyntheticHospital(patients=5, today=TODAY).generate()
+        synthetic.clear()
+        assert not synthetic.exists()
+        assert Patient.objects.count() == 0
+        assert create_user.__class__.objects.filter(pk=create_user.pk).exists()
+
+@pytest.mark.django_db
+class TestBenchmarkSuite:
+    @pytest.fixture
+    def dataset(self):
+        synthetic.SyntheticHospital(patients=20, seed=1).generate()
+
+    def test_report(self, dataset, tmp_path):
+        output = tmp_path / 'report.json'
+        call_command(
+            'run_benchmarks', 'api.patients.retrieve', 'api.appointments.create', 'serializers.*',
+            iterations=3, warmup=1, output=str(output), json=True
+        )
+        report = json.loads(output.read_text())
+
+        assert report['environment']['dataset']['patients'] == 20
+        results = {result['name']: result for result in report['results']}
+        assert set(results) == {
+            'api.patients.retrieve', 'api.appointments.create',
+            'serializers.patient_list', 'serializers.appointment_list', 'serializers.invoice_list',
+        }
+        retrieve = results['api.patients.retrieve']
+        assert retrieve['errors'] == 0
+        assert retrieve['queries'] > 0
+        assert retrieve['p50_ms'] <= retrieve['p95_ms'] <= retrieve['p99_ms']
+        # Writes are rolled back after every run
+        assert results['api.appointments.create']['errors'] == 0
+        assert not Appointment.objects.filter(reason='Benchmark').exists()
+
+    def test_json_cases_render_and_parse_real_payloads(self, dataset):
+        context = benchmarks.BenchmarkContext()
+        selected = benchmarks.select(['json.*'])
+
+        assert {bench.name.rsplit('.', 1)[1] for bench in selected} == {'stdlib', 'orjson'}
+        for bench in selected:
+            assert benchmarks.run_benchmark(bench, context, iterations=1, warmup=0)['errors'] == 0
+
+    def test_compare_flags_regressions(self):
+        def report(p95, queries):
+            return {'results': [{'name': 'api.patients.list', 'p95_ms': p95, 'queries': queries}]}
+
+        assert not benchmarks.compare(report(10.0, 3), report(10.5, 3))[0]['regressed']
+        assert benchmarks.compare(report(10.0, 3), report(12.0, 3))[0]['regressed']
+        assert benchmarks.compare(report(10.0, 3), report(9.0, 4))[0]['regressed']
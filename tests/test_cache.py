@@ -0,0 +1,215 @@
+import time
+import pytest
+from django.core.cache import caches
+from rest_framework import status
+from appointments.models import Appointment
+from ehs_backend.cache import get_or_set_tagged, invalidate_tags, tag_versions
+from ehs_backend.cache_backends import ThresholdZlibCompressor, TwoTierCache
+from ehs_backend.cache_topology import CACHE_ALIASES, LAYERED_ALIASES, build_caches
+from patients.models import Patient
+from users.models import User
+
+class TestCacheTopology:
+    def test_redis_topology_uses_one_database_per_alias(self):
+        caches = build_caches('redis://cache.internal:6379/0')
+
+        assert set(caches) == set(CACHE_ALIASES) | set(LAYERED_ALIASES)
+        assert caches['sessions']['LOCATION'] == 'redis://cache.internal:6379/2'
+        assert caches['rate_limiting']['LOCATION'] == 'redis://cache.internal:6379/1'
+        assert caches['default']['OPTIONS']['COMPRESSOR'].endswith('ZlibCompressor')
+        assert caches['locks']['OPTIONS']['CONNECTION_POOL_KWARGS']['max_connections'] == 20
+
+    def test_pool_size_overridable_per_alias(self, monkeypatch):
+        monkeypatch.setenv('CACHE_SESSIONS_MAX_CONNECTIONS', '75')
+        caches = build_caches('redis://cache.internal:6379')
+
+        assert caches['sessions']['OPTIONS']['CONNECTION_POOL_KWARGS']['max_connections'] == 75
+        assert caches['default']['OPTIONS']['CONNECTION_POOL_KWARGS']['max_connections'] == 50
+
+    def test_local_fallback_keeps_aliases_separate(self):
+        caches = build_caches('', fallback='locmem')
+
+        assert set(caches) == set(CACHE_ALIASES) | set(LAYERED_ALIASES)
+        assert len({caches[alias]['LOCATION'] for alias in CACHE_ALIASES}) == len(CACHE_ALIASES)
+        assert caches['layered']['LOCATION'] == 'default'
+
+class TestTwoTierCache:
+    @pytest.fixture
+    def layered(self):
+        cache = TwoTierCache('default', {'OPTIONS': {
+            'LOCAL_MAX_ENTRIES': 2, 'LOCAL_TTL': 60, 'CHANNEL': 'test-invalidate'
+        }})
+        cache.local.clear()
+        cache.stats.update(dict.fromkeys(cache.stats, 0))
+        return cache
+
+    def test_second_read_is_served_locally(self, layered):
+        caches['default'].set('k', 'v')
+
+        assert layered.get('k') == 'v'
+        caches['default'].set('k', 'changed elsewhere')
+        assert layered.get('k') == 'v'
+        assert layered.tier_stats()['local_hit'] == 1
+        assert layered.tier_stats()['remote_hit'] == 1
+
+    def test_writes_go_through_and_drop_the_local_copy(self, layered):
+        layered.set('k', 1)
+        assert layered.get('k') == 1
+
+        layered.incr('k')
+
+        assert layered.get('k') == 2
+        assert caches['default'].get('k') == 2
+
+    def test_local_tier_is_bounded_and_expires(self, layered):
+        for key in ('a', 'b', 'c'):
+            layered.set(key, key)
+            layered.get(key)
+        assert len(layered.local) == 2
+
+        layered.local.ttl = 0.01
+        layered.local.set('d', 'd')
+        time.sleep(0.02)
+        assert layered.local.get('d') is None
+
+    def test_invalidation_from_another_process_is_applied(self, layered):
+        layered.set('k', 'v')
+        layered.get('k')
+
+        layered._apply_invalidation(f'other-node|["{layered.make_key("k")}"]')
+        caches['default'].set('k', 'new')
+
+        assert layered.get('k') == 'new'
+
+    def test_get_many_counts_each_tier(self, layered):
+        layered.set_many({'a': 1, 'b': 2})
+        layered.get('a')
+
+        assert layered.get_many(['a', 'b', 'c']) == {'a': 1, 'b': 2}
+        stats = layered.tier_stats()
+        assert (stats['local_hit'], stats['remote_hit'], stats['miss']) == (1, 2, 1)
+        assert stats['hit_ratio'] == 0.75
+
+    def test_small_payloads_are_not_compressed(self):
+        compressor = ThresholdZlibCompressor({'COMPRESS_MIN_BYTES': 64})
+
+        assert compressor.compress(b'x' * 10) == b'x' * 10
+        assert len(compressor.compress(b'x' * 1000)) < 1000
+
+@pytest.mark.django_db
+class TestCacheHealthView:
+    def test_reports_every_alias(self, api_client):
+        admin = User.objects.create_user(username='admin', password='pass', is_staff=True)
+        api_client.force_authenticate(user=admin)
+
+        response = api_client.get('/api/health/cache/')
+
+        assert response.status_code == status.HTTP_200_OK
+        assert response.data['healthy'] is True
+        assert set(response.data['caches']) >= set(CACHE_ALIASES)
+        assert response.data['caches']['sessions']['latency_ms'] >= 0
+
+    def test_requires_admin(self, authenticated_client):
+        response = authenticated_client.get('/api/health/cache/')
+        assert response.status_code == status.HTTP_403_FORBIDDEN
+
+class TestTaggedCache:
+    def compute(self, calls, value):
+        def inner():
+            calls.append(value)
+            return value
+        return inner
+
+    def test_entries_survive_until_a_tag_is_invalidated(self):
+        calls = []
+        for _ in range(2):
+            value = get_or_set_tagged('k', ['patient:1', 'doctor:2:schedule'], self.compute(calls, 'a'))
+        assert value == 'a' and calls == ['a']
+
+        invalidate_tags('doctor:2:schedule')
+
+        assert get_or_set_tagged('k', ['patient:1', 'doctor:2:schedule'], self.compute(calls, 'b')) == 'b'
+        assert calls == ['a', 'b']
+
+    def test_invalidation_only_touches_its_own_tag(self):
+        calls = []
+        get_or_set_tagged('one', ['patient:1'], self.compute(calls, 1))
+        get_or_set_tagged('two', ['patient:2'], self.compute(calls, 2))
+
+        invalidate_tags('patient:1')
+        get_or_set_tagged('one', ['patient:1'], self.compute(calls, 1))
+        get_or_set_tagged('two', ['patient:2'], self.compute(calls, 2))
+
+        assert calls == [1, 2, 1]
+
+    def test_evicted_generation_never_goes_back(self):
+        before = tag_versions(['patient:1'])['patient:1']
+        caches['layered'].delete('tag:patient:1')
+        assert tag_versions(['patient:1'])['patient:1'] != before
+
+@pytest.mark.django_db
+class TestTagSignals:
+    @pytest.fixture
+    def appointment(self, create_user, doctor_user):
+        patient = Patient.objects.create(user=create_user, patient_id='P1', date_of_birth='1990-01-01')
+        return Appointment.objects.create(
+            patient=patient, doctor=doctor_user, date='2024-01-01',
+            time_slot='10:00:00', reason='Checkup'
+        )
+
+    def test_appointment_save_invalidates_schedule_after_commit(
+        self, appointment, doctor_user, django_capture_on_commit_callbacks
+    ):
+        tag = f'doctor:{doctor_user.pk}:schedule'
+        before = tag_versions([tag])[tag]
+
+        with django_capture_on_commit_callbacks(execute=True):
+            appointment.status = Appointment.Status.CONFIRMED
+            appointment.save()
+            assert tag_versions([tag])[tag] == before
+
+        assert tag_versions([tag])[tag] != before
+
+    def test_moving_appointment_invalidates_previous_doctor(
+        self, appointment, doctor_user, django_capture_on_commit_callbacks
+    ):
+        other = User.objects.create_user(username='other-doctor', password='pass', role=User.Role.DOCTOR)
+        appointment = Appointment.objects.get(pk=appointment.pk)
+        tags = [f'doctor:{doctor_user.pk}:schedule', f'doctor:{other.pk}:schedule']
+        before = tag_versions(tags)
+
+        with django_capture_on_commit_callbacks(execute=True):
+            appointment.doctor = other
+            appointment.save()
+
+        after = tag_versions(tags)
+        assert all(after[tag] != before[tag] for tag in tags)
+
+    def test_renaming_a_patient_user_invalidates_the_patient(
+        self, appointment, create_user, django_capture_on_commit_callbacks
+    ):
+        tag = f'patient:{appointment.patient_id}'
+        before = tag_versions([tag])[tag]
+
+        with django_capture_on_commit_callbacks(execute=True):
+            create_user.save(update_fields=['last_login'])
+        assert tag_versions([tag])[tag] == before
+
+        with django_capture_on_commit_callbacks(execute=True):
+            create_user.last_name = 'Renamed'
+            create_user.save()
+        assert tag_versions([tag])[tag] != before
+
+    def test_doctor_schedule_is_served_from_cache_until_rebooked(
+        self, authenticated_client, appointment, doctor_user, django_capture_on_commit_callbacks
+    ):
+        url = '/api/appointments/doctor_schedule/'
+        params = {'doctor_id': doctor_user.pk, 'start_date': '2024-01-01', 'end_date': '2024-01-07'}
+        assert len(authenticated_client.get(url, params).data) == 1
+
+        Appointment.objects.filter(pk=appointment.pk).update(date='2024-02-01')
+        assert len(authenticated_client.get(url, params).data) == 1
+
+        with django_capture_on_commit_callbacks(execute=True):
+            Appointment.objects.get(pk=appointment.pk).save()
+        assert len(authenticated_client.get(url, params).data) == 0
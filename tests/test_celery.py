@@ -0,0 +1,61 @@
+import pytest
+from ehs_backend.celery import app
+from ehs_backend.celery_topology import broker_settings, queue_for, worker_argv, worker_transport_options
+
+@pytest.mark.parametrize('task_name, queue', [
+    ('patients.tasks.process_medical_image', 'ehs-images'),
+    ('appointments.tasks.send_appointment_reminders', 'ehs-notifications'),
+    ('analytics.tasks.generate_monthly_report', 'ehs-analytics'),
+    ('patients.tasks.import_patient_registry', 'ehs-default'),
+])
+def test_tasks_are_routed_by_workload(task_name, queue):
+    assert queue_for(task_name) == queue
+    assert app.amqp.router.route({}, task_name)['queue'].name == queue
+
+def test_tasks_inherit_queue_options():
+    from analytics.tasks import generate_monthly_report
+    from appointments.tasks import send_appointment_reminders
+
+    # Not idempotent: a redelivery would send every reminder again
+    assert not send_appointment_reminders.acks_late
+    assert generate_monthly_report.acks_late
+    assert send_appointment_reminders.time_limit == 60
+    assert generate_monthly_report.time_limit > send_appointment_reminders.time_limit
+
+def test_broker_modes():
+    local = broker_settings(env={'REDIS_URL': 'redis://redis:6379/0'})
+    assert local['broker_url'] == 'redis://redis:6379/4'
+    assert local['result_backend'] == 'redis://redis:6379/5'
+
+    aws = broker_settings(env={'SQS_URL': 'https://sqs', 'SQS_QUEUE_PREFIX': 'staging-'})
+    assert aws['broker_url'] == 'sqs://'
+    assert aws['broker_transport_options']['queue_name_prefix'] == 'staging-'
+    # Longer than the longest task time limit
+    assert aws['broker_transport_options']['visibility_timeout'] > 3 * 3600
+
+    with pytest.raises(ValueError):
+        broker_settings('rabbitmq', env={})
+
+def test_redis_visibility_timeout_is_per_profile():
+    notifications = worker_transport_options('notifications', 'redis://redis:6379/4')
+    analytics = worker_transport_options('analytics', 'redis://redis:6379/4')
+
+    assert notifications['visibility_timeout'] == 60 + 300
+    assert analytics['visibility_timeout'] > 3 * 3600
+    assert notifications['unacked_index_key'] != analytics['unacked_index_key']
+    # SQS queues carry their own visibility timeout
+    assert worker_transport_options('notifications', 'sqs://') == {}
+
+def test_worker_profiles(monkeypatch):
+    images = worker_argv('images')
+    assert images[images.index('--pool') + 1] == 'prefork'
+    assert images[images.index('--prefetch-multiplier') + 1] == '1'
+    assert '--max-tasks-per-child' in images
+
+    monkeypatch.setenv('CELERY_NOTIFICATIONS_POOL', 'gevent')
+    notifications = worker_argv('notifications')
+    assert notifications[notifications.index('--pool') + 1] == 'gevent'
+    assert notifications[notifications.index('--queues') + 1] == 'ehs-notifications'
+
+    with pytest.raises(ValueError):
+        worker_argv('gpu')
@@ -0,0 +1,184 @@
+import pytest
+from django.urls import reverse
+from rest_framework import status
+from ehs_backend import db_router
+from ehs_backend.db_router import ReplicaRouter, replica_lag, routing_context, use_primary, use_replica
+from ehs_backend.db_topology import acquire_stats, build_databases, replica_aliases
+from users.models import User
+
+class TestDatabaseTopology:
+    def test_persistent_connections_are_health_checked(self):
+        config = build_databases(env={})['default']
+
+        assert config['CONN_MAX_AGE'] == 60
+        assert config['CONN_HEALTH_CHECKS'] is True
+        assert config['ENGINE'] == 'ehs_backend.postgresql'
+
+    def test_pgbouncer_mode_disables_server_side_cursors(self):
+        config = build_databases('pgbouncer', env={'DB_CONN_MAX_AGE': '300'})['default']
+
+        assert config['DISABLE_SERVER_SIDE_CURSORS'] is True
+        assert config['CONN_MAX_AGE'] == 300
+
+    def test_pool_mode_falls_back_without_driver_support(self, monkeypatch):
+        monkeypatch.setattr('ehs_backend.db_topology._pool_supported', lambda: False)
+
+        config = build_databases('pool', env={})['default']
+
+        assert config['CONNECTION_MODE'] == 'persistent'
+        assert 'pool' not in config['OPTIONS']
+
+    def test_pool_mode_hands_lifetime_to_the_pool(self, monkeypatch):
+        monkeypatch.setattr('ehs_backend.db_topology._pool_supported', lambda: True)
+
+        config = build_databases('pool', env={'DB_POOL_MAX_SIZE': '20'})['default']
+
+        assert config['CONN_MAX_AGE'] == 0
+        assert config['OPTIONS']['pool']['max_size'] == 20
+
+    def test_replicas_mirror_the_primary(self):
+        databases = build_databases(env={'DB_REPLICA_HOSTS': 'r1.internal,r2.internal:6432'})
+
+        assert replica_aliases(databases) == ['replica1', 'replica2']
+        assert databases['replica2']['HOST'] == 'r2.internal'
+        assert databases['replica2']['PORT'] == '6432'
+        assert databases['replica1']['TEST'] == {'MIRROR': 'default'}
+
+    def test_unknown_mode_is_rejected(self):
+        with pytest.raises(ValueError):
+            build_databases('sometimes')
+
+    def test_acquire_latency_histogram(self):
+        acquire_stats.reset()
+        for elapsed in (0.5, 3, 40, 4000):
+            acquire_stats.record('replica', elapsed)
+        acquire_stats.record('replica', None)
+
+        stats = acquire_stats.snapshot('replica')
+
+        assert (stats['connects'], stats['failures']) == (4, 1)
+        assert stats['max_ms'] == 4000
+        assert stats['buckets_ms']['1'] == 1
+        assert stats['buckets_ms']['5'] == 1
+        assert stats['buckets_ms']['50'] == 1
+        assert stats['buckets_ms']['+Inf'] == 1
+
+@pytest.mark.django_db
+class TestDatabaseHealthView:
+    def test_reports_default_alias(self, api_client):
+        admin = User.objects.create_user(username='admin', password='pass', is_staff=True)
+        api_client.force_authenticate(user=admin)
+
+        response = api_client.get('/api/health/database/')
+
+        assert response.status_code == status.HTTP_200_OK
+        assert response.data['databases']['default']['healthy'] is True
+        assert 'acquire' in response.data['databases']['default']
+
+    def test_requires_admin(self, authenticated_client):
+        response = authenticated_client.get('/api/health/database/')
+        assert response.status_code == status.HTTP_403_FORBIDDEN
+
+class TestReplicaRouter:
+    @pytest.fixture(autouse=True)
+    def replicas(self, settings, monkeypatch):
+        settings.DATABASE_REPLICAS = ['replica1', 'replica2']
+        self.lag = {'replica1': 0.5, 'replica2': 0.5}
+        monkeypatch.setattr(replica_lag, 'measure', lambda alias: self.lag[alias])
+        replica_lag.reset()
+        yield
+        replica_lag.reset()
+
+    def test_reads_stay_on_primary_unless_opted_in(self):
+        router = ReplicaRouter()
+        assert router.db_for_read(User) is None
+        with routing_context():
+            assert router.db_for_read(User) is None
+        with use_replica():
+            assert router.db_for_read(User) in ('replica1', 'replica2')
+
+    def test_reads_after_a_write_go_to_primary(self):
+        router = ReplicaRouter()
+        with use_replica():
+            assert router.db_for_write(User) == 'default'
+            assert router.db_for_read(User) is None
+
+    def test_lagging_replicas_are_skipped(self, settings):
+        settings.REPLICA_MAX_LAG_SECONDS = 1
+        self.lag['replica1'] = 30
+        router = ReplicaRouter()
+        with use_replica():
+            assert {router.db_for_read(User) for _ in range(20)} == {'replica2'}
+
+        self.lag['replica2'] = None
+        replica_lag.reset()
+        with use_replica():
+            assert router.db_for_read(User) == 'default'
+
+    def test_use_primary_overrides_replica_reads(self):
+        router = ReplicaRouter()
+        with use_replica(), use_primary():
+            assert router.db_for_read(User) is None
+
+    @pytest.mark.django_db
+    def test_analytics_tasks_read_from_replicas(self, monkeypatch, tmp_path, settings):
+        from django.core.files.storage import FileSystemStorage
+        from analytics import export
+        from analytics.tasks import compute_cohort_analytics, export_warehouse_snapshot, refresh_analytics_rollups
+
+        routed = []
+        choose = ReplicaRouter.db_for_read
+
+        def record(router, model, **hints):
+            routed.append((model._meta.label, choose(router, model, **hints)))
+            # The replicas are not real databases here
+            return None
+
+        monkeypatch.setattr(ReplicaRouter, 'db_for_read', record)
+        monkeypatch.setattr(export, 'default_storage', FileSystemStorage(location=str(tmp_path)))
+        settings.ANALYTICS_EXPORT_SAFETY_LAG = 0
+        refresh_analytics_rollups.apply().get()
+        compute_cohort_analytics.apply().get()
+        export_warehouse_snapshot.apply(kwargs={'tables': ['invoices']}).get()
+
+        sources = {'patients.Patient', 'appointments.Appointment', 'billing.Invoice'}
+        assert sources <= {label for label, _ in routed}
+        assert all(alias in ('replica1', 'replica2') for label, alias in routed if label in sources)
+
+    def test_migrations_only_run_on_primary(self):
+        router = ReplicaRouter()
+        assert router.allow_migrate('default', 'users') is True
+        assert router.allow_migrate('replica1', 'users') is False
+
+@pytest.mark.django_db
+class TestReadYourWrites:
+    @pytest.fixture
+    def routed(self, settings, monkeypatch):
+        # Two aliases where the "replica" is the primary's mirror
+        settings.DATABASE_REPLICAS = ['default']
+        monkeypatch.setattr(replica_lag, 'healthy', lambda aliases: list(aliases))
+        calls = []
+        original = ReplicaRouter.db_for_read
+
+        def record(router, model, **hints):
+            state = db_router._state.get()
+            calls.append(bool(state and state.replica_allowed and not state.wrote))
+            return original(router, model, **hints)
+        monkeypatch.setattr(ReplicaRouter, 'db_for_read', record)
+        return calls
+
+    def test_list_endpoints_read_from_replica(self, authenticated_client, routed):
+        response = authenticated_client.get(reverse('appointment-list'))
+
+        assert response.status_code == status.HTTP_200_OK
+        assert routed and all(routed)
+
+    def test_writer_is_pinned_to_primary(self, authenticated_client, create_user, routed):
+        authenticated_client.patch(
+            reverse('user-detail', kwargs={'pk': create_user.pk}), {'first_name': 'New'}, format='json'
+        )
+        assert db_router.is_pinned(create_user.pk)
+
+        routed.clear()
+        authenticated_client.get(reverse('appointment-list'))
+        assert routed and not any(routed)
@@ -0,0 +1,64 @@
+import io
+import json
+import uuid
+from datetime import date, datetime, time, timedelta, timezone
+from decimal import Decimal
+import pytest
+from django.core.serializers.json import DjangoJSONEncoder
+from django.utils.translation import gettext_lazy
+from rest_framework.exceptions import ParseError
+from rest_framework.parsers import JSONParser
+from ehs_backend import fastjson
+from ehs_backend.fastjson import FastJSONParser, FastJSONRenderer
+
+PAYLOAD = {
+    'amount': Decimal('1180.00'),
+    'date': date(2024, 6, 1),
+    'created_at': datetime(2024, 6, 1, 9, 30, 15, 123456, tzinfo=timezone.utc),
+    'naive': datetime(2024, 6, 1, 9, 30),
+    'time_slot': time(9, 30),
+    'duration': timedelta(minutes=30),
+    'id': uuid.UUID('12345678-1234-5678-1234-567812345678'),
+    'label': gettext_lazy('X-Ray'),
+    'notes': 'Ünïcode line',
+    'by_day': {1: [date(2024, 6, 2), None, True, 1.5]},
+    'big': 2 ** 70,
+}
+
+def test_matches_stdlib_rendering(monkeypatch):
+    fast = FastJSONRenderer().render(PAYLOAD)
+    monkeypatch.setattr(fastjson, 'orjson', None)
+
+    assert fast == FastJSONRenderer().render(PAYLOAD)
+    assert b'"amount":"1180.00"' in fast
+    assert b'"created_at":"2024-06-01T09:30:15.123456Z"' in fast
+    assert b'\\u2028' in fast
+
+def test_decimals_follow_coerce_setting(settings):
+    settings.REST_FRAMEWORK = dict(settings.REST_FRAMEWORK, COERCE_DECIMAL_TO_STRING=False)
+    assert FastJSONRenderer().render({'amount': Decimal('1180.50')}) == b'{"amount":1180.5}'
+
+def test_indented_output_uses_drf():
+    content = FastJSONRenderer().render({'a': 1}, 'application/json; indent=2')
+    assert content == b'{\n  "a": 1\n}'
+
+def test_unserializable_values_still_raise():
+    with pytest.raises(TypeError):
+        FastJSONRenderer().render({'value': object()})
+
+def test_parser():
+    parser = FastJSONParser()
+    body = '{"name": "Ünïcode", "amount": "1180.00", "ids": [1, 2]}'.encode()
+
+    assert parser.parse(io.BytesIO(body)) == JSONParser().parse(io.BytesIO(body))
+    with pytest.raises(ParseError):
+        parser.parse(io.BytesIO(b'{"amount": NaN}'))
+    with pytest.raises(ParseError):
+        parser.parse(io.BytesIO(b'{"amount": '))
+    latin1 = '{"name": "Ünïcode"}'.encode('latin-1')
+    assert parser.parse(io.BytesIO(latin1), parser_context={'encoding': 'latin-1'}) == {'name': 'Ünïcode'}
+
+def test_json_safe_matches_stdlib_round_trip():
+    expected = json.loads(json.dumps(PAYLOAD, cls=DjangoJSONEncoder))
+    assert fastjson.json_safe(PAYLOAD) == expected
+    assert expected['by_day'] == {'1': ['2024-06-02', None, True, 1.5]}
@@ -0,0 +1,20 @@
+from ehs_backend.importtime import parse_importtime, profile_imports
+
+def test_parse_importtime():
+    output = '\n'.join([
+        'import time: self [us] | cumulative | imported package',
+        'import time:       120 |        120 |   fhir.resources.core',
+        'import time:      3000 |       3120 | fhir.resources',
+        'some other stderr line',
+    ])
+    assert parse_importtime(output) == [
+        ('fhir.resources.core', 120, 120, 1),
+        ('fhir.resources', 3000, 3120, 0),
+    ]
+
+def test_manage_py_startup_skips_heavy_packages():
+    report = profile_imports('setup', top=5, repeat=1)
+
+    assert report['eagerly_loaded'] == []
+    assert report['import_ms'] > 0
+    assert report['slowest_modules'][0]['cumulative_ms'] >= report['slowest_modules'][-1]['cumulative_ms']
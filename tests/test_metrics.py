@@ -0,0 +1,68 @@
+from unittest import mock
+import pytest
+from django.urls import reverse
+from django_redis.client import DefaultClient
+from prometheus_client import REGISTRY
+from ehs_backend import metrics
+from ehs_backend.cache_backends import MetricsClient
+
+def sample(name, **labels):
+    return REGISTRY.get_sample_value(name, labels) or 0
+
+@pytest.fixture
+def no_broker(monkeypatch):
+    monkeypatch.setattr(metrics.queue_collector, 'read_depths', lambda: {'ehs-default': 3, 'ehs-images': 0})
+    monkeypatch.setattr(metrics.queue_collector, 'checked', 0.0)
+
+@pytest.mark.django_db
+def test_requests_are_timed_per_view(authenticated_client):
+    url = reverse('patient-list')
+    before = sample('ehs_http_request_duration_seconds_count', method='GET', view='patient-list')
+    queries = sample('ehs_http_request_db_queries_count', view='patient-list')
+
+    authenticated_client.get(url)
+    authenticated_client.get('/no/such/path/')
+
+    assert sample('ehs_http_request_duration_seconds_count', method='GET', view='patient-list') == before + 1
+    assert sample('ehs_http_request_db_queries_count', view='patient-list') == queries + 1
+    assert sample('ehs_http_requests_total', method='GET', view='unmatched', status='4xx') >= 1
+    assert sample('ehs_http_requests_in_progress') == 0
+
+def test_redis_client_counts_hits_and_misses():
+    client = MetricsClient.__new__(MetricsClient)
+    client.metrics_alias = 'sessions'
+    hits = sample('ehs_cache_lookups_total', alias='sessions', result='hit')
+    misses = sample('ehs_cache_lookups_total', alias='sessions', result='miss')
+
+    with mock.patch.object(DefaultClient, 'get', side_effect=lambda key, default, **kw: default):
+        assert client.get('absent', default='fallback') == 'fallback'
+    with mock.patch.object(DefaultClient, 'get_many', return_value={'a': 1}):
+        assert client.get_many(iter(['a', 'b', 'c'])) == {'a': 1}
+
+    assert sample('ehs_cache_lookups_total', alias='sessions', result='hit') == hits + 1
+    assert sample('ehs_cache_lookups_total', alias='sessions', result='miss') == misses + 3
+
+def test_queue_depth_read_failures_are_not_fatal(monkeypatch):
+    monkeypatch.setattr(metrics.queue_collector, 'checked', 0.0)
+    monkeypatch.setattr(
+        metrics.queue_collector, 'read_depths', mock.Mock(side_effect=ConnectionError('broker down'))
+    )
+    assert metrics.queue_collector.current() == {}
+
+@pytest.mark.django_db
+class TestMetricsEndpoint:
+    def test_requires_token(self, api_client, settings, no_broker):
+        settings.METRICS_TOKEN = 'scrape-secret'
+        assert api_client.get(reverse('metrics')).status_code == 403
+
+        response = api_client.get(reverse('metrics'), HTTP_AUTHORIZATION='Bearer scrape-secret')
+        body = response.content.decode()
+        assert response.status_code == 200
+        assert 'ehs_http_request_duration_seconds_bucket' in body
+        assert 'ehs_celery_queue_depth{queue="ehs-default"} 3.0' in body
+        assert '# TYPE ehs_celery_task_runs_total counter' in body
+
+    def test_health_checks_are_installed(self, api_client):
+        response = api_client.get('/api/health/?format=json')
+        assert response.status_code == 200
+        assert 'DatabaseBackend' in response.json()
@@ -1,7 +1,14 @@
+import io
+import json
 import pytest
+from unittest.mock import patch
+import tempfile
 from django.test import TestCase
+from rest_framework import status
+from rest_framework.test import APIClient
 from django.core.files.uploadedfile import SimpleUploadedFile
-from patients.models import Patient, Document, MedicalHistory
+from patients.models import Patient, Document, MedicalHistory, PatientImportJob
+from patients.imports import PatientImporter
 from patients.services import ImageProcessor, FHIRExporter, HL7Processor
 from users.models import User
 
@@ -31,6 +38,8 @@ class PatientModelTests(TestCase):
 
 class DocumentTests(TestCase):
     def setUp(self):
+        media_root = self.enterContext(tempfile.TemporaryDirectory())
+        self.enterContext(self.settings(MEDIA_ROOT=media_root))
         self.user = User.objects.create_user(username='testuser', password='testpass')
         self.patient = Patient.objects.create(
             user=self.user,
@@ -64,4 +73,127 @@ PID|||P12345||Doe^John||19800101|"""
         
         parsed_data = HL7Processor.parse_message(test_message)
         assert parsed_data['message_type'] == 'ADT'
-        assert parsed_data['patient_id'] == 'P12345'
\ No newline at end of file
+        assert parsed_data['patient_id'] == 'P12345'
+
+class PatientImportTests(TestCase):
+    def setUp(self):
+        existing = User.objects.create_user(username='existing', password='pass')
+        Patient.objects.create(
+            user=existing,
+            patient_id='P-TAKEN',
+            date_of_birth='1980-01-01',
+            blood_group='A+',
+            emergency_contact='+911234567890',
+            address='Address'
+        )
+
+    def _record(self, index, **overrides):
+        record = {
+            'username': f'imported{index}',
+            'first_name': 'Imported',
+            'last_name': str(index),
+            'phone_number': '+911234567890',
+            'patient_id': f'P-{index}',
+            'date_of_birth': '1990-05-01',
+            'blood_group': 'O+',
+            'emergency_contact': '+911234567891',
+            'address': 'Imported Address'
+        }
+        record.update(overrides)
+        return record
+
+    def _ndjson(self, records):
+        return io.BytesIO(''.join(json.dumps(record) + '\n' for record in records).encode())
+
+    def test_imports_valid_rows_and_reports_collisions(self):
+        records = [
+            self._record(0, password='Secret-pass-1'),
+            self._record(1),
+            self._record(2, patient_id='P-1'),
+            self._record(3, patient_id='P-TAKEN'),
+            self._record(4, date_of_birth='not-a-date'),
+        ]
+        job = PatientImportJob.objects.create(source='registry.ndjson', file_format='ndjson')
+
+        PatientImporter(job, chunk_size=2, workers=1).run(self._ndjson(records))
+
+        job.refresh_from_db()
+        self.assertEqual(job.status, PatientImportJob.Status.COMPLETED)
+        self.assertEqual((job.created_count, job.error_count, job.next_record), (2, 3, 5))
+        self.assertEqual(
+            sorted(error['record'] for error in job.errors), [2, 3, 4]
+        )
+        first = Patient.objects.select_related('user').get(patient_id='P-0')
+        self.assertEqual(first.user.role, User.Role.PATIENT)
+        self.assertTrue(first.user.check_password('Secret-pass-1'))
+        self.assertFalse(Patient.objects.get(patient_id='P-1').user.has_usable_password())
+
+    def test_resumes_after_last_committed_chunk(self):
+        records = [self._record(index) for index in range(5)]
+        job = PatientImportJob.objects.create(source='registry.ndjson', file_format='ndjson')
+        original = PatientImporter.import_chunk
+
+        def fail_on_second_chunk(importer, offset, chunk, hasher):
+            if offset == 2:
+                raise RuntimeError('worker lost')
+            return original(importer, offset, chunk, hasher)
+
+        with patch.object(PatientImporter, 'import_chunk', fail_on_second_chunk):
+            with self.assertRaises(RuntimeError):
+                PatientImporter(job, chunk_size=2, workers=1).run(self._ndjson(records))
+        job.refresh_from_db()
+        self.assertEqual((job.status, job.next_record), (PatientImportJob.Status.FAILED, 2))
+
+        PatientImporter(job, chunk_size=2, workers=1).run(self._ndjson(records))
+        job.refresh_from_db()
+        self.assertEqual((job.created_count, job.error_count), (5, 0))
+        self.assertEqual(Patient.objects.filter(patient_id__startswith='P-').count(), 6)
+
+    def test_task_deletes_the_uploaded_file(self):
+        from django.core.files.base import ContentFile
+        from django.core.files.storage import default_storage
+        from patients.tasks import import_patient_registry
+
+        with tempfile.TemporaryDirectory() as media_root, self.settings(MEDIA_ROOT=media_root):
+            source = default_storage.save('patient-imports/registry.ndjson', ContentFile(
+                self._ndjson([self._record(0), self._record(1, date_of_birth='not-a-date')]).getvalue()
+            ))
+            job = PatientImportJob.objects.create(source=source, file_format='ndjson')
+
+            result = import_patient_registry(job.id)
+
+            self.assertEqual((result['created'], result['errors']), (1, 1))
+            self.assertFalse(default_storage.exists(source))
+
+class PatientImportUploadTests(TestCase):
+    url = '/api/patients/import_registry/'
+
+    def setUp(self):
+        self.staff = User.objects.create_user(username='registrar', password='pass', is_staff=True)
+        self.client = APIClient()
+        self.client.force_authenticate(user=self.staff)
+
+    def _upload(self, name='registry.ndjson', **data):
+        return self.client.post(
+            self.url, {'file': SimpleUploadedFile(name, b'{"username": "imported0"}\n'), **data},
+            format='multipart'
+        )
+
+    def test_upload_creates_job_and_queues_import(self):
+        with tempfile.TemporaryDirectory() as media_root, self.settings(MEDIA_ROOT=media_root):
+            with patch('patients.tasks.import_patient_registry.delay') as delay, \
+                    self.captureOnCommitCallbacks(execute=True):
+                response = self._upload()
+
+        self.assertEqual(response.status_code, status.HTTP_202_ACCEPTED)
+        job = PatientImportJob.objects.get(id=response.data['job_id'])
+        self.assertEqual((job.file_format, job.created_by), ('ndjson', self.staff))
+        self.assertTrue(job.source.startswith('patient-imports/registry'))
+        delay.assert_called_once_with(job.id)
+
+    def test_rejects_non_staff_and_unknown_formats(self):
+        self.assertEqual(self._upload(name='registry.xlsx').status_code, status.HTTP_400_BAD_REQUEST)
+
+        self.client.force_authenticate(user=User.objects.create_user(username='nurse', password='pass'))
+        self.assertEqual(self._upload().status_code, status.HTTP_403_FORBIDDEN)
+        self.assertFalse(PatientImportJob.objects.exists())
@@ -165,7 +165,7 @@ class TestPatientAPI:
         assert len(response.data) == 1
 
     @patch('patients.tasks.process_medical_image.delay')
-    def test_upload_document(self, mock_task, authenticated_client, create_user, patient_data):
+    def test_upload_document(self, mock_task, authenticated_client, create_user, patient_data, media_root):
         patient = Patient.objects.create(user=create_user, **patient_data)
         
         with open('tests/test_files/test_image.jpg', 'rb') as image_file:
@@ -181,4 +181,63 @@ class TestPatientAPI:
             )
         
         assert response.status_code == status.HTTP_201_CREATED
-        mock_task.assert_called_once()
\ No newline at end of file
+        mock_task.assert_called_once()
+@pytest.mark.django_db
+class TestPatientResponseCache:
+    @pytest.fixture
+    def patient(self, create_user, patient_data):
+        patient = Patient.objects.create(user=create_user, **patient_data)
+        MedicalHistory.objects.create(
+            patient=patient,
+            condition='Hypertension',
+            diagnosis_date='2024-01-01',
+            notes='Initial diagnosis'
+        )
+        return patient
+
+    def test_second_request_is_served_without_queries(
+        self, authenticated_client, patient, django_assert_num_queries
+    ):
+        url = reverse('patient-medical-history', kwargs={'pk': patient.pk})
+        first = authenticated_client.get(url)
+
+        with django_assert_num_queries(0):
+            second = authenticated_client.get(url)
+
+        assert second.status_code == status.HTTP_200_OK
+        assert second.content == first.content
+        assert second['ETag'] == first['ETag']
+        assert 'Last-Modified' in second
+
+    def test_matching_etag_gets_not_modified(self, authenticated_client, patient):
+        url = reverse('patient-medical-history', kwargs={'pk': patient.pk})
+        etag = authenticated_client.get(url)['ETag']
+
+        response = authenticated_client.get(url, HTTP_IF_NONE_MATCH=etag)
+
+        assert response.status_code == status.HTTP_304_NOT_MODIFIED
+        assert response.content == b''
+
+    def test_new_history_invalidates_the_entry(
+        self, authenticated_client, patient, django_capture_on_commit_callbacks
+    ):
+        url = reverse('patient-medical-history', kwargs={'pk': patient.pk})
+        etag = authenticated_client.get(url)['ETag']
+
+        with django_capture_on_commit_callbacks(execute=True):
+            MedicalHistory.objects.create(
+                patient=patient, condition='Asthma', diagnosis_date='2024-02-01', notes=''
+            )
+        response = authenticated_client.get(url, HTTP_IF_NONE_MATCH=etag)
+
+        assert response.status_code == status.HTTP_200_OK
+        assert len(response.data) == 2
+
+    def test_entries_are_not_shared_between_users(self, api_client, patient):
+        url = reverse('patient-medical-history', kwargs={'pk': patient.pk})
+        api_client.force_authenticate(user=patient.user)
+        assert api_client.get(url).status_code == status.HTTP_200_OK
+
+        other = User.objects.create_user(username='other-patient', password='pass')
+        api_client.force_authenticate(user=other)
+        assert api_client.get(url).status_code == status.HTTP_404_NOT_FOUND
@@ -0,0 +1,86 @@
+import logging
+import pytest
+from django.http import HttpResponse
+from django.test import RequestFactory
+from django.urls import reverse
+from appointments.models import Appointment
+from ehs_backend.profiling import QueryProfilingMiddleware, fingerprint, profile_queries
+from patients.models import Patient, MedicalHistory
+from users.models import User
+
+def test_fingerprint_collapses_literals_and_in_lists():
+    first = fingerprint('SELECT * FROM "t" WHERE "id" IN (%s, %s, %s) AND "name" = \'a\'')
+    second = fingerprint('SELECT  * FROM "t" WHERE "id" IN (%s) AND "name" = \'b\'')
+    assert first == second == 'SELECT * FROM "t" WHERE "id" IN (...) AND "name" = ?'
+
+@pytest.mark.django_db
+class TestQueryProfilingMiddleware:
+    def n_plus_one_view(self, request):
+        request.user = User.objects.get(username='admin')
+        for pk in range(6):
+            User.objects.filter(pk=pk).exists()
+        return HttpResponse('ok')
+
+    @pytest.fixture
+    def admin(self):
+        return User.objects.create_user(username='admin', password='pass', is_staff=True)
+
+    def test_header_mode_profiles_on_request(self, settings, admin, caplog):
+        settings.QUERY_PROFILING = 'header'
+        middleware = QueryProfilingMiddleware(self.n_plus_one_view)
+
+        plain = middleware(RequestFactory().get('/'))
+        with caplog.at_level(logging.INFO, logger='ehs_backend.profiling'):
+            profiled = middleware(RequestFactory().get('/', HTTP_X_PROFILE_QUERIES='1'))
+
+        assert 'Server-Timing' not in plain
+        assert profiled['Server-Timing'].startswith('db;dur=')
+        assert 'desc="7 queries"' in profiled['Server-Timing']
+        assert any('Likely N+1' in record.message for record in caplog.records)
+
+    def test_timing_hidden_from_non_staff(self, settings, admin):
+        settings.QUERY_PROFILING = 'on'
+        admin.is_staff = False
+        admin.save()
+
+        response = QueryProfilingMiddleware(self.n_plus_one_view)(RequestFactory().get('/'))
+
+        assert 'Server-Timing' not in response
+
+    def test_serializer_time_is_recorded(self, settings, authenticated_client, create_user):
+        settings.QUERY_PROFILING = 'on'
+        create_user.is_staff = True
+        create_user.save()
+        QueryProfilingMiddleware(lambda request: None)
+
+        response = authenticated_client.get(reverse('user-list'))
+
+        assert 'serializer;dur=' in response['Server-Timing']
+
+@pytest.mark.django_db
+class TestEndpointQueryBudgets:
+    @pytest.fixture
+    def patient(self, create_user):
+        patient = Patient.objects.create(user=create_user, patient_id='P1', date_of_birth='1990-01-01')
+        for index in range(6):
+            MedicalHistory.objects.create(
+                patient=patient, condition=f'Condition {index}', diagnosis_date='2024-01-01', notes=''
+            )
+        return patient
+
+    def test_medical_history(self, authenticated_client, patient, query_budget):
+        # Two of them resolve the cold permission snapshot
+        with query_budget(queries=4):
+            authenticated_client.get(reverse('patient-medical-history', kwargs={'pk': patient.pk}))
+
+    def test_doctor_schedule(self, authenticated_client, patient, doctor_user, query_budget):
+        for hour in range(9, 15):
+            Appointment.objects.create(
+                patient=patient, doctor=doctor_user, date='2024-01-01',
+                time_slot=f'{hour}:00', reason='Checkup'
+            )
+        with query_budget(queries=2):
+            authenticated_client.get(
+                reverse('appointment-doctor-schedule'),
+                {'doctor_id': doctor_user.pk, 'start_date': '2024-01-01', 'end_date': '2024-01-07'}
+            )
@@ -0,0 +1,78 @@
+import time
+from datetime import datetime, timedelta, timezone
+from types import SimpleNamespace
+import pytest
+from django.urls import reverse
+from ehs_backend import task_metrics
+from ehs_backend.celery import app
+from users.models import User
+
+@app.task(name='tests.add')
+def add(x, y):
+    return x + y
+
+@app.task(name='tests.fail')
+def fail():
+    raise KeyError('missing')
+
+@pytest.fixture(autouse=True)
+def clean_store():
+    task_metrics.store.reset()
+    yield
+    task_metrics.store.reset()
+
+def test_runs_are_recorded_per_task():
+    for _ in range(3):
+        add.apply(args=(1, 2))
+    fail.apply()
+
+    report = task_metrics.task_metrics()
+    assert report['tests.add']['outcomes'] == {'SUCCESS': 3}
+    assert report['tests.add']['runtime']['count'] == 3
+    assert report['tests.add']['rss_mb']['mean'] > 0
+    assert report['tests.fail']['outcomes'] == {'FAILURE': 1}
+    assert report['tests.fail']['exceptions'] == {'KeyError': 1}
+    # Eager runs were never published, so they have no queue latency
+    assert report['tests.add']['latency']['count'] == 0
+
+def test_queue_latency_counts_from_eta():
+    now = time.time()
+    assert task_metrics._queue_latency(SimpleNamespace(enqueued_at=now - 2, eta=None), now) == pytest.approx(2)
+    eta = datetime.fromtimestamp(now - 0.5, tz=timezone.utc).isoformat()
+    assert task_metrics._queue_latency(SimpleNamespace(enqueued_at=now - 60, eta=eta), now) == pytest.approx(0.5)
+    assert task_metrics._queue_latency(SimpleNamespace(eta=None), now) is None
+
+def test_prometheus_histograms_are_cumulative():
+    add.apply(args=(1, 2))
+    text = task_metrics.prometheus_text()
+
+    assert 'ehs_celery_task_runs_total{task="tests.add",state="SUCCESS"} 1' in text
+    assert 'ehs_celery_task_runtime_seconds_bucket{task="tests.add",le="+Inf"} 1' in text
+    assert 'ehs_celery_task_runtime_seconds_count{task="tests.add"} 1' in text
+    buckets = [
+        int(line.rsplit(' ', 1)[1]) for line in text.splitlines()
+        if line.startswith('ehs_celery_task_runtime_seconds_bucket{task="tests.add"')
+    ]
+    assert buckets == sorted(buckets)
+
+@pytest.mark.django_db
+class TestTaskMetricsAPI:
+    def test_admin_only(self, api_client, authenticated_client):
+        add.apply(args=(1, 2))
+        assert authenticated_client.get(reverse('task_metrics')).status_code == 403
+
+        admin = User.objects.create_user(username='ops', password='pass', is_staff=True)
+        api_client.force_authenticate(admin)
+        response = api_client.get(reverse('task_metrics'))
+        assert response.status_code == 200
+        assert response.data['tests.add']['outcomes'] == {'SUCCESS': 1}
+
+    def test_prometheus_requires_token(self, api_client, settings):
+        settings.METRICS_TOKEN = 'scrape-secret'
+        url = reverse('task_metrics_prometheus')
+
+        assert api_client.get(url).status_code == 403
+        assert api_client.get(url, HTTP_AUTHORIZATION='Bearer wrong').status_code == 403
+        response = api_client.get(url, HTTP_AUTHORIZATION='Bearer scrape-secret')
+        assert response.status_code == 200
+        assert response['Content-Type'].startswith('text/plain; version=0.0.4')
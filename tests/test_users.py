@@ -1,8 +1,29 @@
-from django.test import TestCase
+import gzip
+from unittest.mock import MagicMock, patch
+import json
+import tempfile
+import threading
+from datetime import date, datetime, timedelta, timezone as dt_timezone
+from django.test import TestCase, TransactionTestCase, override_settings
 from django.contrib.auth import get_user_model
+from django.utils import timezone
 from rest_framework.test import APITestCase
 from rest_framework import status
 from users.models import User, AuditLog
+from users.audit import AuditLogBuffer, record_audit_event
+from users.partitions import _archive_partition, archive_before
+from users.permissions import PermissionCache
+from users.views import CustomTokenObtainPairSerializer
+from django.contrib.auth.models import Group, Permission
+from django.conf import settings
+from django.core.cache import cache, caches
+from rest_framework.test import APIRequestFactory
+from rest_framework_simplejwt.exceptions import InvalidToken
+from rest_framework_simplejwt.tokens import AccessToken, RefreshToken
+from users.authentication import StatelessJWTAuthentication, TokenRevocation
+from users.mfa import MFADeviceCache
+from users.ratelimit import SlidingWindowRateLimiter
+from django_otp.plugins.otp_totp.models import TOTPDevice
 
 class UserModelTests(TestCase):
     def setUp(self):
@@ -42,4 +63,371 @@ class AuditLogTests(TestCase):
     def test_audit_log_creation(self):
         self.assertEqual(self.audit_log.action, 'LOGIN')
         self.assertEqual(self.audit_log.resource_type, 'USER')
-        self.assertEqual(self.audit_log.ip_address, '127.0.0.1')
\ No newline at end of file
+        self.assertEqual(self.audit_log.ip_address, '127.0.0.1')
+class AuditLogBufferTests(TransactionTestCase):
+    def setUp(self):
+        self.user = User.objects.create_user(username='testuser', password='testpass')
+
+    def _record(self, buffer, count):
+        for index in range(count):
+            record_audit_event(
+                user=self.user,
+                action='UPDATE',
+                resource_type='PATIENT',
+                resource_id=index,
+                ip_address='127.0.0.1',
+                details={},
+                buffer=buffer
+            )
+
+    @override_settings(AUDIT_LOG_MODE='async')
+    def test_no_events_lost_on_shutdown(self):
+        buffer = AuditLogBuffer(batch_size=3, flush_interval=60)
+        self._record(buffer, 10)
+
+        buffer.shutdown()
+
+        self.assertEqual(AuditLog.objects.count(), 10)
+
+    @override_settings(AUDIT_LOG_MODE='async')
+    def test_falls_back_to_sync_write_when_buffer_unavailable(self):
+        buffer = AuditLogBuffer()
+        buffer.shutdown()
+
+        self._record(buffer, 2)
+
+        self.assertEqual(AuditLog.objects.count(), 2)
+
+    @override_settings(AUDIT_LOG_MODE='async')
+    def test_timestamp_is_event_time(self):
+        buffer = AuditLogBuffer(flush_interval=60)
+        before = timezone.now()
+        self._record(buffer, 1)
+        buffer.shutdown()
+
+        self.assertLess(AuditLog.objects.get().timestamp - before, timedelta(seconds=1))
+
+    def test_flush_interval_counts_from_first_event(self):
+        buffer = AuditLogBuffer(batch_size=10, flush_interval=0.5)
+        timers = [threading.Timer(delay, buffer.queue.put, [entry]) for delay, entry in ((0.3, 'a'), (0.6, 'b'))]
+        for timer in timers:
+            timer.start()
+
+        self.assertEqual(buffer._collect(), ['a', 'b'])
+
+class AuditLogQueryTests(APITestCase):
+    def setUp(self):
+        self.admin = User.objects.create_user(username='admin', password='pass', is_staff=True)
+        self.doctor = User.objects.create_user(username='doctor', password='pass')
+        now = timezone.now()
+        for index in range(5):
+            AuditLog.objects.create(
+                user=self.doctor,
+                action='UPDATE',
+                resource_type='PATIENT',
+                resource_id=str(index % 2),
+                ip_address='127.0.0.1',
+                details={},
+                timestamp=now - timedelta(hours=index)
+            )
+        AuditLog.objects.create(
+            user=self.admin,
+            action='LOGIN',
+            resource_type='USER',
+            resource_id=str(self.admin.pk),
+            ip_address='127.0.0.1',
+            details={}
+        )
+        self.client.force_authenticate(user=self.admin)
+
+    def test_requires_staff(self):
+        self.client.force_authenticate(user=self.doctor)
+        response = self.client.get('/api/users/audit_logs/')
+        self.assertEqual(response.status_code, status.HTTP_403_FORBIDDEN)
+
+    def test_defaults_to_own_logs(self):
+        response = self.client.get('/api/users/audit_logs/')
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual([row['action'] for row in response.data['results']], ['LOGIN'])
+
+    def test_filters_and_cursor_pagination(self):
+        response = self.client.get('/api/users/audit_logs/', {
+            'resource_type': 'PATIENT', 'resource_id': '0', 'page_size': 2
+        })
+        self.assertEqual(len(response.data['results']), 2)
+        self.assertIsNotNone(response.data['next'])
+
+        second = self.client.get(response.data['next'])
+        self.assertEqual(len(second.data['results']), 1)
+        self.assertIsNone(second.data['next'])
+        timestamps = [row['timestamp'] for row in response.data['results'] + second.data['results']]
+        self.assertEqual(timestamps, sorted(timestamps, reverse=True))
+
+    def test_invalid_since_rejected(self):
+        response = self.client.get('/api/users/audit_logs/', {'since': 'yesterday'})
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+
+    def test_non_numeric_user_id_rejected(self):
+        response = self.client.get('/api/users/audit_logs/', {'user_id': 'abc'})
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+        self.assertIn('user_id', response.data)
+
+class AuditLogRetentionTests(TestCase):
+    def setUp(self):
+        self.user = User.objects.create_user(username='testuser', password='testpass')
+        for month in (1, 2, 3):
+            AuditLog.objects.create(
+                user=self.user,
+                action='LOGIN',
+                resource_type='USER',
+                resource_id='1',
+                ip_address='127.0.0.1',
+                details={'month': month},
+                timestamp=datetime(2024, month, 15, tzinfo=dt_timezone.utc)
+            )
+
+    def test_archive_before_exports_and_removes_old_months(self):
+        with tempfile.TemporaryDirectory() as media_root, self.settings(MEDIA_ROOT=media_root):
+            from django.core.files.storage import default_storage
+
+            archived = archive_before(date(2024, 3, 10))
+
+            self.assertEqual([entry['rows'] for entry in archived], [1, 1])
+            with default_storage.open(archived[0]['path']) as handle:
+                rows = [json.loads(line) for line in gzip.decompress(handle.read()).splitlines()]
+        self.assertEqual(rows[0]['details'], {'month': 1})
+        self.assertEqual(
+            list(AuditLog.objects.values_list('details__month', flat=True)), [3]
+        )
+
+    def test_partition_is_exported_before_it_is_detached(self):
+        steps = []
+        cursor = MagicMock()
+        cursor.execute.side_effect = lambda sql, params=None: steps.append(' '.join(sql.split()[:2]))
+        cursor.fetchone.return_value = None
+
+        def export(records, label):
+            steps.append('export')
+            return 'audit-archive/y2024m01.ndjson.gz', 3, 42
+
+        with patch('users.partitions.connection') as connection, \
+                patch('users.partitions._partition_rows'), \
+                patch('users.partitions._write_archive', side_effect=export):
+            connection.cursor.return_value.__enter__.return_value = cursor
+            entry = _archive_partition('users_auditlog_y2024m01')
+
+        self.assertEqual(steps, ['export', 'ALTER TABLE', 'SELECT 1', 'DROP TABLE'])
+        self.assertEqual(entry['rows'], 3)
+
+class PermissionCacheTests(TestCase):
+    def setUp(self):
+        cache.clear()
+        self.user = User.objects.create_user(username='nurse', password='pass')
+        self.group = Group.objects.create(name='records')
+        self.permission = Permission.objects.get(codename='can_view_patient_records')
+
+    def _request(self, auth=None):
+        request = APIRequestFactory().get('/')
+        request.user = self.user
+        request.auth = auth
+        return request
+
+    def test_snapshot_is_cached(self):
+        PermissionCache.get(self.user)
+        with self.assertNumQueries(0):
+            snapshot = PermissionCache.get(self.user)
+        self.assertFalse(snapshot.has_perm('users.can_view_patient_records'))
+
+    def test_group_changes_invalidate_snapshot(self):
+        PermissionCache.get(self.user)
+        self.user.groups.add(self.group)
+        self.group.permissions.add(self.permission)
+
+        user = User.objects.get(pk=self.user.pk)
+        self.assertTrue(PermissionCache.get(user).has_perm('users.can_view_patient_records'))
+
+        self.group.permissions.remove(self.permission)
+        user = User.objects.get(pk=self.user.pk)
+        self.assertFalse(PermissionCache.get(user).has_perm('users.can_view_patient_records'))
+
+    def test_token_claims_answer_checks_without_queries(self):
+        self.user.user_permissions.add(self.permission)
+        user = User.objects.get(pk=self.user.pk)
+        token = AccessToken(str(CustomTokenObtainPairSerializer.get_token(user).access_token))
+
+        with self.assertNumQueries(0):
+            snapshot = PermissionCache.for_request(self._request(token))
+        self.assertTrue(snapshot.has_perm('users.can_view_patient_records'))
+
+    def test_stale_token_claims_are_ignored(self):
+        token = AccessToken(str(CustomTokenObtainPairSerializer.get_token(self.user).access_token))
+        self.user.user_permissions.add(self.permission)
+
+        user = User.objects.get(pk=self.user.pk)
+        request = self._request(token)
+        request.user = user
+        self.assertTrue(
+            PermissionCache.for_request(request).has_perm('users.can_view_patient_records')
+        )
+
+    def test_evicted_versions_do_not_revive_token_claims(self):
+        versions = caches[settings.LAYERED_CACHE_ALIAS]
+        self.user.user_permissions.add(self.permission)
+        versions.clear()
+        user = User.objects.get(pk=self.user.pk)
+        token = AccessToken(str(CustomTokenObtainPairSerializer.get_token(user).access_token))
+        self.user.user_permissions.remove(self.permission)
+
+        versions.clear()
+        user = User.objects.get(pk=self.user.pk)
+        request = self._request(token)
+        request.user = user
+        self.assertFalse(
+            PermissionCache.for_request(request).has_perm('users.can_view_patient_records')
+        )
+
+class StatelessJWTAuthenticationTests(APITestCase):
+    def setUp(self):
+        cache.clear()
+        self.user = User.objects.create_user(
+            username='doctor', password='pass', email='doctor@test.com',
+            role=User.Role.DOCTOR, is_staff=True
+        )
+        self.refresh = CustomTokenObtainPairSerializer.get_token(self.user)
+        self.access = str(self.refresh.access_token)
+
+    def _authenticate(self, token):
+        request = APIRequestFactory().get('/', HTTP_AUTHORIZATION=f'Bearer {token}')
+        return StatelessJWTAuthentication().authenticate(request)
+
+    def test_user_built_from_claims_without_query(self):
+        with self.assertNumQueries(0):
+            user, _ = self._authenticate(self.access)
+            self.assertEqual(user.pk, self.user.pk)
+            self.assertEqual(user.role, User.Role.DOCTOR)
+            self.assertTrue(user.is_staff)
+            self.assertEqual(user, self.user)
+
+        with self.assertNumQueries(1):
+            self.assertEqual(user.email, 'doctor@test.com')
+            self.assertEqual(user.first_name, '')
+
+    def test_logout_revokes_access_and_refresh_tokens(self):
+        self.client.credentials(HTTP_AUTHORIZATION=f'Bearer {self.access}')
+        response = self.client.post('/api/users/logout/', {'refresh': str(self.refresh)})
+        self.assertEqual(response.status_code, status.HTTP_204_NO_CONTENT)
+
+        response = self.client.get('/api/users/audit_logs/')
+        self.assertEqual(response.status_code, status.HTTP_401_UNAUTHORIZED)
+        self.client.credentials()
+        response = self.client.post('/api/token/refresh/', {'refresh': str(self.refresh)})
+        self.assertEqual(response.status_code, status.HTTP_401_UNAUTHORIZED)
+
+    def test_deactivation_revokes_outstanding_tokens(self):
+        self.user.is_active = False
+        self.user.save()
+
+        self.client.credentials(HTTP_AUTHORIZATION=f'Bearer {self.access}')
+        response = self.client.get('/api/users/audit_logs/')
+        self.assertEqual(response.status_code, status.HTTP_401_UNAUTHORIZED)
+
+    def test_deleting_user_revokes_outstanding_tokens(self):
+        self.user.delete()
+        with self.assertRaises(InvalidToken):
+            self._authenticate(self.access)
+
+    def test_login_in_the_revocation_second_is_accepted(self):
+        # Revoked within the second the outstanding token was issued in
+        issued = AccessToken(self.access)['iat']
+        with patch('users.authentication.time.time', return_value=issued + 0.0001):
+            TokenRevocation.revoke_user(self.user.pk)
+        fresh = str(CustomTokenObtainPairSerializer.get_token(self.user).access_token)
+
+        user, _ = self._authenticate(fresh)
+        self.assertEqual(user.pk, self.user.pk)
+        with self.assertRaises(InvalidToken):
+            self._authenticate(self.access)
+
+    @override_settings(JWT_REVOCATION_ENABLED=False)
+    def test_deactivation_revokes_tokens_with_revocation_disabled(self):
+        TokenRevocation.revoke_token(AccessToken(self.access))
+        user, _ = self._authenticate(self.access)
+        self.assertEqual(user.pk, self.user.pk)
+
+        self.user.is_active = False
+        self.user.save()
+        with self.assertRaises(InvalidToken):
+            self._authenticate(self.access)
+
+    def test_profile_update_keeps_tokens_valid(self):
+        self.user.first_name = 'Updated'
+        self.user.save()
+
+        self.client.credentials(HTTP_AUTHORIZATION=f'Bearer {self.access}')
+        response = self.client.get('/api/users/audit_logs/')
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+
+class SlidingWindowRateLimiterTests(TestCase):
+    def setUp(self):
+        cache.clear()
+        self.limiter = SlidingWindowRateLimiter('test', '3/60', backend=cache)
+
+    def test_blocks_after_limit_within_window(self):
+        now = 6000.0
+        for _ in range(3):
+            self.assertTrue(self.limiter.hit('alice', now)[0])
+        allowed, retry_after = self.limiter.hit('alice', now + 10)
+        self.assertFalse(allowed)
+        self.assertGreater(retry_after, 0)
+        self.assertTrue(self.limiter.hit('bob', now)[0])
+
+    def test_previous_window_is_weighted_by_overlap(self):
+        for _ in range(3):
+            self.limiter.hit('alice', 6000.0)
+        # 10s into the next window 5/6 of the previous one still counts
+        self.assertTrue(self.limiter.hit('alice', 6070.0)[0])
+        self.assertFalse(self.limiter.hit('alice', 6070.0)[0])
+        # 45s in only a quarter does
+        self.assertTrue(self.limiter.hit('alice', 6105.0)[0])
+        self.assertTrue(self.limiter.hit('alice', 6105.0)[0])
+        self.assertFalse(self.limiter.hit('alice', 6105.0)[0])
+
+class LoginFastPathTests(APITestCase):
+    def setUp(self):
+        cache.clear()
+        self.user = User.objects.create_user(username='nurse', password='secret-pass-1')
+
+    @override_settings(LOGIN_RATE_LIMIT_USER='2/60')
+    @patch('users.ratelimit.time.time', return_value=6000.0)
+    def test_login_attempts_are_rate_limited_per_user(self, _):
+        for _ in range(2):
+            response = self.client.post('/api/token/', {'username': 'nurse', 'password': 'wrong'})
+            self.assertNotEqual(response.status_code, status.HTTP_429_TOO_MANY_REQUESTS)
+
+        response = self.client.post('/api/token/', {'username': 'nurse', 'password': 'secret-pass-1'})
+        self.assertEqual(response.status_code, status.HTTP_429_TOO_MANY_REQUESTS)
+        self.assertIn('Retry-After', response)
+
+    def test_confirmed_device_lookup_is_cached(self):
+        device = TOTPDevice.objects.create(user=self.user, confirmed=True)
+        self.assertEqual(MFADeviceCache.confirmed_device(self.user), device)
+
+        with self.assertNumQueries(1):
+            self.assertEqual(MFADeviceCache.confirmed_device(self.user), device)
+
+        device.delete()
+        self.assertIsNone(MFADeviceCache.confirmed_device(self.user))
+
+    def test_mfa_login_verifies_cached_device(self):
+        device = TOTPDevice.objects.create(user=self.user, confirmed=True)
+        self.user.is_mfa_enabled = True
+        self.user.save()
+        MFADeviceCache.confirmed_device(self.user)
+
+        from django_otp.oath import totp
+        token = totp(device.bin_key, device.step, device.t0, device.digits, device.drift)
+        response = self.client.post('/api/token/', {
+            'username': 'nurse', 'password': 'secret-pass-1', 'mfa_token': str(token).zfill(6)
+        })
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertIn('access', response.data)
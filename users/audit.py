@@ -0,0 +1,157 @@
+import atexit
+import logging
+import os
+import queue
+import threading
+import time
+from django.conf import settings
+from django.db import close_old_connections
+from .models import AuditLog
+
+logger = logging.getLogger(__name__)
+
+_STOP = object()
+
+class AuditLogBuffer:
+    """Bounded in-process queue of AuditLog rows flushed by a background thread.
+
+    Rows are written with ``bulk_create`` once ``batch_size`` events are
+    queued or ``flush_interval`` seconds have passed since the first one.
+    ``put`` never blocks: when the queue is full or the writer has been
+    shut down it returns False and the caller writes synchronously.
+    """
+    def __init__(self, max_size=10000, batch_size=500, flush_interval=1.0):
+        self.queue = queue.Queue(maxsize=max_size)
+        self.batch_size = batch_size
+        self.flush_interval = flush_interval
+        self._lock = threading.Lock()
+        self._stopped = threading.Event()
+        self._thread = None
+        self._pid = None
+
+    def _ensure_started(self):
+        # Threads do not survive fork(); gunicorn and Celery prefork workers
+        # each start their own writer on first use
+        if self._thread is not None and self._pid == os.getpid() and self._thread.is_alive():
+            return
+        with self._lock:
+            if self._thread is None or self._pid != os.getpid() or not self._thread.is_alive():
+                self._pid = os.getpid()
+                self._thread = threading.Thread(
+                    target=self._run,
+                    name='audit-log-writer',
+                    daemon=True
+                )
+                self._thread.start()
+
+    def put(self, entry):
+        if self._stopped.is_set():
+            return False
+        try:
+            self.queue.put_nowait(entry)
+        except queue.Full:
+            return False
+        if self._stopped.is_set():
+            # Raced with shutdown(); make sure the entry is not stranded
+            self.drain()
+            return True
+        self._ensure_started()
+        return True
+
+    def _collect(self):
+        try:
+            # Wait for the first event; the timeout only lets _run notice
+            # a shutdown that could not queue its wake-up
+            entry = self.queue.get(timeout=self.flush_interval)
+        except queue.Empty:
+            return []
+        if entry is _STOP:
+            self._stopped.set()
+            return []
+        batch = [entry]
+        # The flush interval counts from the first event of the batch
+        deadline = time.monotonic() + self.flush_interval
+        while len(batch) < self.batch_size:
+            remaining = deadline - time.monotonic()
+            if remaining <= 0:
+                break
+            try:
+                entry = self.queue.get(timeout=remaining)
+            except queue.Empty:
+                break
+            if entry is _STOP:
+                self._stopped.set()
+                break
+            batch.append(entry)
+        return batch
+
+    def _run(self):
+        while not self._stopped.is_set():
+            batch = self._collect()
+            if batch:
+                self.flush(batch)
+
+    def flush(self, batch):
+        try:
+            AuditLog.objects.bulk_create(batch, batch_size=self.batch_size)
+        except Exception:
+            logger.exception("Bulk audit log write failed, retrying %d rows one by one", len(batch))
+            for entry in batch:
+                try:
+                    entry.save()
+                except Exception:
+                    logger.exception("Dropping audit log entry %s", entry.__dict__)
+        finally:
+            close_old_connections()
+
+    def drain(self):
+        """Write everything still queued from the calling thread"""
+        batch = []
+        while True:
+            try:
+                entry = self.queue.get_nowait()
+            except queue.Empty:
+                break
+            if entry is _STOP:
+                continue
+            batch.append(entry)
+            if len(batch) >= self.batch_size:
+                self.flush(batch)
+                batch = []
+        if batch:
+            self.flush(batch)
+
+    def shutdown(self, timeout=10):
+        """Stop the writer and flush every queued event before returning"""
+        self._stopped.set()
+        if self._thread is not None and self._pid == os.getpid():
+            try:
+                # Wake the writer if it is waiting on an empty queue
+                self.queue.put_nowait(_STOP)
+            except queue.Full:
+                pass
+            self._thread.join(timeout)
+        self.drain()
+
+audit_buffer = AuditLogBuffer(
+    max_size=settings.AUDIT_LOG_BUFFER_SIZE,
+    batch_size=settings.AUDIT_LOG_BATCH_SIZE,
+    flush_interval=settings.AUDIT_LOG_FLUSH_INTERVAL
+)
+atexit.register(audit_buffer.shutdown)
+
+def record_audit_event(user, action, resource_type, resource_id, ip_address, details, buffer=None):
+    """Queue an audit event, writing it synchronously when buffering is off or full"""
+    entry = AuditLog(
+        user_id=getattr(user, 'pk', None),
+        action=action,
+        resource_type=resource_type,
+        resource_id=str(resource_id),
+        ip_address=ip_address,
+        details=details
+    )
+    buffer = buffer or audit_buffer
+    if settings.AUDIT_LOG_MODE == 'async' and buffer.put(entry):
+        return entry
+    entry.save()
+    return entry
@@ -0,0 +1,93 @@
+import time
+from django.conf import settings
+from django.core.cache import caches
+from django.utils.translation import gettext_lazy as _
+from rest_framework_simplejwt.authentication import JWTAuthentication
+from rest_framework_simplejwt.exceptions import InvalidToken
+from rest_framework_simplejwt.settings import api_settings
+from .models import ClaimsUser
+
+# Token claim -> User field carried in the access token
+USER_CLAIMS = {
+    'username': 'username',
+    'role': 'role',
+    'is_staff': 'is_staff',
+    'is_superuser': 'is_superuser',
+    'is_mfa_enabled': 'is_mfa_enabled',
+}
+
+def _revocation_cache():
+    return caches[settings.TOKEN_CACHE_ALIAS]
+
+def _jti_key(jti):
+    return f'jwt-revoked:jti:{jti}'
+
+def _user_key(user_id):
+    return f'jwt-revoked:user:{user_id}'
+
+class TokenRevocation:
+    """Revocation list for stateless JWTs kept in the token cache alias.
+
+    Single tokens are revoked by jti until they expire; revoking a user
+    rejects every token issued to them up to that moment. Entries expire
+    with the longest-lived token, so the list never grows unbounded.
+    """
+    @staticmethod
+    def _max_lifetime():
+        return int(max(
+            api_settings.ACCESS_TOKEN_LIFETIME,
+            api_settings.REFRESH_TOKEN_LIFETIME
+        ).total_seconds())
+
+    @staticmethod
+    def revoke_token(token):
+        remaining = int(token['exp'] - time.time())
+        if remaining > 0:
+            _revocation_cache().set(_jti_key(token[api_settings.JTI_CLAIM]), 1, remaining)
+
+    @staticmethod
+    def revoke_user(user_id):
+        # Sub-second, like the iat CustomTokenObtainPairSerializer issues, so a
+        # login right after the revocation is not caught by it
+        _revocation_cache().set(
+            _user_key(user_id), time.time(), TokenRevocation._max_lifetime()
+        )
+
+    @staticmethod
+    def is_revoked(token, single_tokens=True):
+        """Whether `token` or its user was revoked; `single_tokens=False` skips the jti check"""
+        jti_key = _jti_key(token.get(api_settings.JTI_CLAIM))
+        user_key = _user_key(token.get(api_settings.USER_ID_CLAIM))
+        entries = _revocation_cache().get_many([jti_key, user_key] if single_tokens else [user_key])
+        if jti_key in entries:
+            return True
+        cutoff = entries.get(user_key)
+        return cutoff is not None and token.get('iat', 0) <= cutoff
+
+class StatelessJWTAuthentication(JWTAuthentication):
+    """JWT authentication that trusts the token's user claims.
+
+    The user is rebuilt from claims as a ClaimsUser, so authenticating a
+    request costs one cache read (the revocation check) instead of a user
+    query. Tokens issued before the custom claims existed fall back to the
+    regular database lookup.
+
+    The claims carry no active flag, so the user revocation written on
+    deactivation (users.signals) is always checked; JWT_REVOCATION_ENABLED
+    only turns off the per-token check behind logout.
+    """
+    def get_user(self, validated_token):
+        if TokenRevocation.is_revoked(validated_token, single_tokens=settings.JWT_REVOCATION_ENABLED):
+            raise InvalidToken(_("Token has been revoked"))
+        if any(claim not in validated_token for claim in USER_CLAIMS):
+            return super().get_user(validated_token)
+
+        loaded = {'id': validated_token[api_settings.USER_ID_CLAIM], 'is_active': True}
+        for claim, field in USER_CLAIMS.items():
+            loaded[field] = validated_token[claim]
+        # from_db expects values in concrete field order
+        field_names = [
+            field.attname for field in ClaimsUser._meta.concrete_fields
+            if field.attname in loaded
+        ]
+        return ClaimsUser.from_db('default', field_names, [loaded[name] for name in field_names])
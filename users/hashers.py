@@ -0,0 +1,16 @@
+from django.conf import settings
+from django.contrib.auth.hashers import Argon2PasswordHasher, PBKDF2PasswordHasher
+
+class ConfiguredPBKDF2PasswordHasher(PBKDF2PasswordHasher):
+    """PBKDF2-SHA256 with the work factor from PASSWORD_PBKDF2_ITERATIONS.
+
+    Shares the stock algorithm name, so existing hashes keep verifying and
+    are re-encoded with the configured iterations on the next login.
+    """
+    iterations = settings.PASSWORD_PBKDF2_ITERATIONS
+
+class ConfiguredArgon2PasswordHasher(Argon2PasswordHasher):
+    """Argon2id with cost parameters from settings (needs argon2-cffi)"""
+    time_cost = settings.PASSWORD_ARGON2_TIME_COST
+    memory_cost = settings.PASSWORD_ARGON2_MEMORY_COST
+    parallelism = settings.PASSWORD_ARGON2_PARALLELISM
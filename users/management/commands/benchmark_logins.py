@@ -0,0 +1,151 @@
+import json
+import multiprocessing
+import os
+import statistics
+import time
+from concurrent.futures import ProcessPoolExecutor
+from django.contrib.auth.hashers import get_hasher, make_password
+from django.core.management.base import BaseCommand
+from django.db import connections
+from django.test import RequestFactory
+from users.audit import audit_buffer
+from users.models import User, AuditLog
+
+BENCH_PREFIX = 'bench-login-'
+BENCH_PASSWORD = 'bench-Password-123'
+
+def percentile(values, q):
+    ordered = sorted(values)
+    if not ordered:
+        return None
+    index = min(len(ordered) - 1, max(0, round(q * (len(ordered) - 1))))
+    return ordered[index]
+
+def _login_worker(usernames, iterations):
+    """Run full logins through the token serializer; returns latencies in ms"""
+    from users.views import CustomTokenObtainPairSerializer
+
+    request = RequestFactory().post('/api/token/', REMOTE_ADDR='127.0.0.1')
+    latencies = []
+    for index in range(iterations):
+        username = usernames[index % len(usernames)]
+        started = time.perf_counter()
+        serializer = CustomTokenObtainPairSerializer(
+            data={'username': username, 'password': BENCH_PASSWORD},
+            context={'request': request}
+        )
+        serializer.is_valid(raise_exception=True)
+        latencies.append((time.perf_counter() - started) * 1000)
+    # Pool workers exit without running atexit hooks
+    audit_buffer.shutdown()
+    connections.close_all()
+    return latencies
+
+class Command(BaseCommand):
+    help = 'Measure login throughput (logins/sec/core) and password hashing cost'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--processes', type=int, default=os.cpu_count() or 1)
+        parser.add_argument('--iterations', type=int, default=50,
+                            help='Logins per process')
+        parser.add_argument('--users', type=int, default=20)
+        parser.add_argument('--budget-ms', type=float, default=250.0,
+                            help='p95 login latency budget')
+        parser.add_argument('--hash-only', action='store_true',
+                            help='Benchmark the password hasher alone')
+        parser.add_argument('--pbkdf2-iterations', default='',
+                            help='Comma-separated PBKDF2 iteration counts to compare')
+        parser.add_argument('--json', action='store_true', help='Machine-readable output')
+        parser.add_argument('--keep', action='store_true', help='Keep benchmark users')
+
+    def handle(self, *args, **options):
+        if options['hash_only']:
+            results = self.benchmark_hashers(options)
+        else:
+            results = self.benchmark_logins(options)
+
+        if options['json']:
+            self.stdout.write(json.dumps(results, indent=2))
+            return
+        for result in results:
+            line = ', '.join(f'{key}={value}' for key, value in result.items())
+            within = result.get('within_budget', True)
+            self.stdout.write(self.style.SUCCESS(line) if within else self.style.WARNING(line))
+
+    def benchmark_hashers(self, options):
+        hasher = get_hasher()
+        rounds = max(options['iterations'] // 5, 3)
+        candidates = [int(value) for value in options['pbkdf2_iterations'].split(',') if value]
+        configurations = [(hasher.algorithm, None)] + [('pbkdf2_sha256', value) for value in candidates]
+
+        results = []
+        for algorithm, iterations in configurations:
+            timings = []
+            for _ in range(rounds):
+                salt = hasher.salt()
+                started = time.perf_counter()
+                if iterations is None:
+                    hasher.encode(BENCH_PASSWORD, salt)
+                else:
+                    get_hasher('pbkdf2_sha256').encode(BENCH_PASSWORD, salt, iterations)
+                timings.append((time.perf_counter() - started) * 1000)
+            median = statistics.median(timings)
+            results.append({
+                'algorithm': algorithm,
+                'iterations': iterations or getattr(hasher, 'iterations', None),
+                'hash_ms_p50': round(median, 2),
+                'hashes_per_sec_per_core': round(1000 / median, 1),
+                'within_budget': median <= options['budget_ms']
+            })
+        return results
+
+    def benchmark_logins(self, options):
+        usernames = self.create_users(options['users'])
+        processes = max(1, options['processes'])
+        try:
+            # Children must open their own connections
+            connections.close_all()
+            context = multiprocessing.get_context('fork')
+            started = time.perf_counter()
+            with ProcessPoolExecutor(max_workers=processes, mp_context=context) as pool:
+                futures = [
+                    pool.submit(_login_worker, usernames, options['iterations'])
+                    for _ in range(processes)
+                ]
+                latencies = [value for future in futures for value in future.result()]
+            elapsed = time.perf_counter() - started
+        finally:
+            if not options['keep']:
+                self.delete_users()
+
+        throughput = len(latencies) / elapsed
+        p95 = percentile(latencies, 0.95)
+        return [{
+            'hasher': get_hasher().algorithm,
+            'processes': processes,
+            'logins': len(latencies),
+            'logins_per_sec': round(throughput, 1),
+            'logins_per_sec_per_core': round(throughput / processes, 1),
+            'p50_ms': round(percentile(latencies, 0.5), 2),
+            'p95_ms': round(p95, 2),
+            'p99_ms': round(percentile(latencies, 0.99), 2),
+            'within_budget': p95 <= options['budget_ms']
+        }]
+
+    def create_users(self, count):
+        self.delete_users()
+        password = make_password(BENCH_PASSWORD)
+        User.objects.bulk_create([
+            User(
+                username=f'{BENCH_PREFIX}{index}',
+                password=password,
+                phone_number='+910000000000'
+            )
+            for index in range(count)
+        ])
+        return [f'{BENCH_PREFIX}{index}' for index in range(count)]
+
+    def delete_users(self):
+        users = User.objects.filter(username__startswith=BENCH_PREFIX)
+        AuditLog.objects.filter(user__in=users).delete()
+        users.delete()
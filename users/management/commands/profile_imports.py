@@ -0,0 +1,53 @@
+import json
+from django.core.management.base import BaseCommand, CommandError
+from ehs_backend import importtime
+
+class Command(BaseCommand):
+    help = 'Profile start-up imports of a fresh web, worker or manage.py process and report the slowest modules'
+
+    def add_arguments(self, parser):
+        parser.add_argument('targets', nargs='*',
+                            help=f"Processes to profile: {', '.join(importtime.TARGETS)} (default: all)")
+        parser.add_argument('--top', type=int, default=15, help='Modules and packages to list')
+        parser.add_argument('--repeat', type=int, default=3, help='Runs per target; the fastest is reported')
+        parser.add_argument('--json', action='store_true', help='Print the JSON report')
+        parser.add_argument('--check', action='store_true',
+                            help='Fail if a target imports a heavy package it should load lazily')
+
+    def handle(self, *args, **options):
+        unknown = set(options['targets']).difference(importtime.TARGETS)
+        if unknown:
+            raise CommandError(f"Unknown target(s): {', '.join(sorted(unknown))}")
+        reports = []
+        for target in options['targets'] or importtime.TARGETS:
+            try:
+                reports.append(importtime.profile_imports(target, options['top'], options['repeat']))
+            except RuntimeError as e:
+                raise CommandError(f'{target}: {e}')
+        if options['json']:
+            self.stdout.write(json.dumps(reports, indent=2))
+        else:
+            for report in reports:
+                self.write_report(report)
+
+        eager = [f"{report['target']}: {', '.join(report['eagerly_loaded'])}"
+                 for report in reports if report['eagerly_loaded']]
+        if eager and options['check']:
+            raise CommandError('Heavy packages imported at start-up: ' + '; '.join(eager))
+
+    def write_report(self, report):
+        self.stdout.write(f"{report['target']}: {report['description']}", self.style.MIGRATE_HEADING)
+        self.stdout.write(
+            f"  startup={report['startup_ms']}ms imports={report['import_ms']}ms "
+            f"max_rss={report['max_rss_mb']}MB modules={report['modules']}"
+        )
+        self.stdout.write('  Slowest packages (own import time):')
+        for row in report['slowest_packages']:
+            self.stdout.write(f"    {row['self_ms']:>8.1f}ms  {row['package']}")
+        self.stdout.write('  Slowest modules (including what they import):')
+        for row in report['slowest_modules']:
+            self.stdout.write(f"    {row['cumulative_ms']:>8.1f}ms  {row['module']} (self {row['self_ms']}ms)")
+        if report['eagerly_loaded']:
+            self.stdout.write(self.style.WARNING(
+                f"  Loaded eagerly, expected lazy: {', '.join(report['eagerly_loaded'])}"
+            ))
@@ -0,0 +1,61 @@
+import json
+from django.core.management.base import BaseCommand, CommandError
+from ehs_backend import benchmarks, synthetic
+
+class Command(BaseCommand):
+    help = 'Benchmark API actions, serializers and Celery tasks against the synthetic dataset'
+
+    def add_arguments(self, parser):
+        parser.add_argument('patterns', nargs='*', help='Benchmark name globs, e.g. "api.patients.*"')
+        parser.add_argument('--kind', action='append', choices=benchmarks.KINDS)
+        parser.add_argument('--exclude', action='append', help='Name globs to skip')
+        parser.add_argument('--iterations', type=int, default=20)
+        parser.add_argument('--warmup', type=int, default=2)
+        parser.add_argument('--cold', action='store_true', help='Clear every cache before each run')
+        parser.add_argument('--list', action='store_true', help='List benchmarks and exit')
+        parser.add_argument('--output', help='Write the JSON report to this file')
+        parser.add_argument('--json', action='store_true', help='Print the JSON report')
+        parser.add_argument('--compare', help='Baseline JSON report to compare against')
+        parser.add_argument('--tolerance', type=float, default=0.1,
+                            help='Allowed p95 growth before a case counts as regressed')
+        parser.add_argument('--fail-on-regression', action='store_true')
+
+    def handle(self, *args, **options):
+        selected = benchmarks.select(options['patterns'], options['kind'], options['exclude'])
+        if options['list']:
+            for bench in selected:
+                self.stdout.write(f'{bench.kind:6} {bench.name}')
+            return
+        if not selected:
+            raise CommandError('No benchmarks match')
+        if not synthetic.exists():
+            raise CommandError('No synthetic dataset; run seed_hospital_data first')
+
+        def progress(result):
+            if options['json']:
+                return
+            line = ', '.join(f'{key}={value}' for key, value in result.items() if key != 'kind')
+            self.stdout.write(self.style.WARNING(line) if result['errors'] else line)
+
+        report = benchmarks.run_suite(
+            selected, options['iterations'], options['warmup'], options['cold'], progress
+        )
+        if options['output']:
+            with open(options['output'], 'w') as f:
+                json.dump(report, f, indent=2)
+        if options['json']:
+            self.stdout.write(json.dumps(report, indent=2))
+        if options['compare']:
+            self.compare(report, options)
+
+    def compare(self, report, options):
+        with open(options['compare']) as f:
+            baseline = json.load(f)
+        rows = benchmarks.compare(baseline, report, options['tolerance'])
+        self.stdout.write(f"Compared with {baseline['environment'].get('commit')}:", self.style.MIGRATE_HEADING)
+        for row in rows:
+            line = ', '.join(f'{key}={value}' for key, value in row.items())
+            self.stdout.write(self.style.ERROR(line) if row['regressed'] else self.style.SUCCESS(line))
+        regressed = [row['name'] for row in rows if row['regressed']]
+        if regressed and options['fail_on_regression']:
+            raise CommandError(f"Regressed: {', '.join(regressed)}")
@@ -0,0 +1,44 @@
+import time
+from django.core.management.base import BaseCommand, CommandError
+from ehs_backend import synthetic
+
+class Command(BaseCommand):
+    help = 'Generate a seeded synthetic hospital dataset for benchmarks (bulk_create, chunked)'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--patients', type=int, default=10000)
+        parser.add_argument('--seed', type=int, default=0)
+        parser.add_argument('--doctors', type=int, help='Default: one per 500 patients, at least 5')
+        parser.add_argument('--appointments-per-patient', type=int, default=4, help='Average')
+        parser.add_argument('--history-per-patient', type=int, default=2, help='Average')
+        parser.add_argument('--hl7-per-patient', type=int, default=2, help='Average')
+        parser.add_argument('--batch-size', type=int, default=2000, help='Patients per transaction')
+        parser.add_argument('--clear', action='store_true', help='Delete an existing synthetic dataset first')
+
+    def handle(self, *args, **options):
+        if synthetic.exists():
+            if not options['clear']:
+                raise CommandError('A synthetic dataset already exists; pass --clear to replace it')
+            self.stdout.write('Deleting the existing synthetic dataset...')
+            synthetic.clear()
+
+        generator = synthetic.SyntheticHospital(
+            patients=options['patients'],
+            seed=options['seed'],
+            doctors=options['doctors'],
+            appointments_per_patient=options['appointments_per_patient'],
+            history_per_patient=options['history_per_patient'],
+            hl7_per_patient=options['hl7_per_patient'],
+            batch_size=options['batch_size'],
+        )
+        started = time.perf_counter()
+
+        def progress(done, counts):
+            rate = done / (time.perf_counter() - started)
+            self.stdout.write(f"{done}/{generator.patients} patients ({rate:.0f}/s)")
+
+        counts = generator.generate(progress)
+        elapsed = time.perf_counter() - started
+        self.stdout.write(self.style.SUCCESS(
+            f"Generated in {elapsed:.1f}s: " + ', '.join(f'{key}={value}' for key, value in counts.items())
+        ))
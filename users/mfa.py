@@ -0,0 +1,48 @@
+from django.conf import settings
+from django.core.cache import cache
+from django_otp import devices_for_user
+from django_otp.models import Device
+
+def _device_key(user_id):
+    return f'mfa-device:{user_id}'
+
+class MFADeviceCache:
+    """Caches which confirmed OTP device a user verifies against.
+
+    Only the device's persistent id is cached; the device itself is always
+    loaded fresh (one primary-key query) because verification updates its
+    replay and throttling state.
+    """
+    @staticmethod
+    def confirmed_device(user):
+        key = _device_key(user.pk)
+        persistent_id = cache.get(key)
+        if persistent_id is None:
+            # Scans every installed device model; cache the answer
+            device = next(iter(devices_for_user(user, confirmed=True)), None)
+            cache.set(
+                key,
+                device.persistent_id if device is not None else '',
+                settings.MFA_DEVICE_CACHE_TIMEOUT
+            )
+            return device
+        if not persistent_id:
+            return None
+        device = Device.from_persistent_id(persistent_id)
+        if device is None or device.user_id != user.pk or not device.confirmed:
+            cache.delete(key)
+            return None
+        return device
+
+    @staticmethod
+    def invalidate(user_id):
+        cache.delete(_device_key(user_id))
+
+    @staticmethod
+    def device_saved(device):
+        # Every verification saves the device (replay/throttle state); keep
+        # the entry when it already points at this confirmed device
+        key = _device_key(device.user_id)
+        if device.confirmed and cache.get(key) == device.persistent_id:
+            return
+        cache.delete(key)
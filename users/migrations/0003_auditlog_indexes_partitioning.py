@@ -0,0 +1,125 @@
+from datetime import date
+from django.db import migrations, models
+from users.partitions import AUDIT_TABLE, add_months, create_partition, month_start
+
+
+def partition_audit_log(apps, schema_editor):
+    """Convert users_auditlog into a table range-partitioned by month"""
+    if schema_editor.connection.vendor != "postgresql":
+        return
+    with schema_editor.connection.cursor() as cursor:
+        legacy = f"{AUDIT_TABLE}_legacy"
+        cursor.execute(f"ALTER TABLE {AUDIT_TABLE} RENAME TO {legacy}")
+        cursor.execute(
+            "SELECT indexdef FROM pg_indexes WHERE tablename = %s AND indexname NOT LIKE %s",
+            [legacy, "%_pkey"],
+        )
+        index_definitions = [row[0] for row in cursor.fetchall()]
+
+        cursor.execute(f"CREATE SEQUENCE {AUDIT_TABLE}_part_id_seq")
+        cursor.execute(
+            f"""
+            CREATE TABLE {AUDIT_TABLE} (
+                id bigint NOT NULL DEFAULT nextval('{AUDIT_TABLE}_part_id_seq'),
+                action varchar(50) NOT NULL,
+                resource_type varchar(50) NOT NULL,
+                resource_id varchar(50) NOT NULL,
+                "timestamp" timestamp with time zone NOT NULL,
+                ip_address inet NOT NULL,
+                details jsonb NOT NULL,
+                user_id bigint NULL REFERENCES users_user (id) DEFERRABLE INITIALLY DEFERRED,
+                PRIMARY KEY (id, "timestamp")
+            ) PARTITION BY RANGE ("timestamp")
+            """
+        )
+        cursor.execute(f"ALTER SEQUENCE {AUDIT_TABLE}_part_id_seq OWNED BY {AUDIT_TABLE}.id")
+        cursor.execute(f"CREATE TABLE {AUDIT_TABLE}_default PARTITION OF {AUDIT_TABLE} DEFAULT")
+
+        cursor.execute(f'SELECT MIN("timestamp") FROM {legacy}')
+        oldest = cursor.fetchone()[0]
+        month = month_start(oldest.date() if oldest else date.today())
+        last = add_months(month_start(date.today()), 2)
+        while month <= last:
+            create_partition(cursor, month)
+            month = add_months(month, 1)
+
+        cursor.execute(
+            f"INSERT INTO {AUDIT_TABLE} (id, action, resource_type, resource_id, "
+            f'"timestamp", ip_address, details, user_id) '
+            f'SELECT id, action, resource_type, resource_id, "timestamp", ip_address, '
+            f"details, user_id FROM {legacy}"
+        )
+        cursor.execute(
+            f"SELECT setval('{AUDIT_TABLE}_part_id_seq', COALESCE(MAX(id), 0) + 1, false) "
+            f"FROM {AUDIT_TABLE}"
+        )
+        cursor.execute(f"DROP TABLE {legacy}")
+        for definition in index_definitions:
+            cursor.execute(definition.replace(f" ON {legacy} ", f" ON {AUDIT_TABLE} ").replace(
+                f" ON public.{legacy} ", f" ON public.{AUDIT_TABLE} "
+            ))
+
+
+def unpartition_audit_log(apps, schema_editor):
+    """Copy the partitioned table back into a plain table"""
+    if schema_editor.connection.vendor != "postgresql":
+        return
+    with schema_editor.connection.cursor() as cursor:
+        partitioned = f"{AUDIT_TABLE}_partitioned"
+        cursor.execute(f"ALTER TABLE {AUDIT_TABLE} RENAME TO {partitioned}")
+        cursor.execute(
+            "SELECT indexdef FROM pg_indexes WHERE tablename = %s AND indexname NOT LIKE %s",
+            [partitioned, "%_pkey"],
+        )
+        index_definitions = [row[0] for row in cursor.fetchall()]
+        cursor.execute(
+            f"""
+            CREATE TABLE {AUDIT_TABLE} (
+                id bigint GENERATED BY DEFAULT AS IDENTITY PRIMARY KEY,
+                action varchar(50) NOT NULL,
+                resource_type varchar(50) NOT NULL,
+                resource_id varchar(50) NOT NULL,
+                "timestamp" timestamp with time zone NOT NULL,
+                ip_address inet NOT NULL,
+                details jsonb NOT NULL,
+                user_id bigint NULL REFERENCES users_user (id) DEFERRABLE INITIALLY DEFERRED
+            )
+            """
+        )
+        cursor.execute(f"INSERT INTO {AUDIT_TABLE} SELECT id, action, resource_type, resource_id, "
+                       f'"timestamp", ip_address, details, user_id FROM {partitioned}')
+        cursor.execute(
+            f"SELECT setval(pg_get_serial_sequence('{AUDIT_TABLE}', 'id'), "
+            f"COALESCE(MAX(id), 0) + 1, false) FROM {AUDIT_TABLE}"
+        )
+        cursor.execute(f"DROP TABLE {partitioned} CASCADE")
+        for definition in index_definitions:
+            cursor.execute(definition.replace(f" ON ONLY {partitioned} ", f" ON {AUDIT_TABLE} ").replace(
+                f" ON ONLY public.{partitioned} ", f" ON public.{AUDIT_TABLE} "
+            ))
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("users", "0002_alter_auditlog_timestamp"),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name="auditlog",
+            index=models.Index(fields=["timestamp"], name="users_audit_ts_idx"),
+        ),
+        migrations.AddIndex(
+            model_name="auditlog",
+            index=models.Index(fields=["user", "timestamp"], name="users_audit_user_ts_idx"),
+        ),
+        migrations.AddIndex(
+            model_name="auditlog",
+            index=models.Index(
+                fields=["resource_type", "resource_id", "timestamp"],
+                name="users_audit_resource_ts_idx",
+            ),
+        ),
+        migrations.RunPython(partition_audit_log, unpartition_audit_log),
+    ]
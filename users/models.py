@@ -1,6 +1,7 @@
 from django.contrib.auth.models import AbstractUser
 from django.db import models
 from django.conf import settings
+from django.utils import timezone
 from django.utils.translation import gettext_lazy as _
 
 class Role(models.TextChoices):
@@ -44,6 +45,21 @@ class User(AbstractUser):
             ("can_manage_appointments", "Can manage appointments"),
         ]
 
+class ClaimsUser(User):
+    """User rebuilt from access token claims without a query.
+
+    Fields not carried in the token are deferred; touching any of them
+    loads the rest of the row once.
+    """
+    class Meta:
+        proxy = True
+
+    def refresh_from_db(self, using=None, fields=None, **kwargs):
+        deferred = self.get_deferred_fields()
+        if fields is not None and deferred and set(fields) <= deferred:
+            fields = deferred
+        super().refresh_from_db(using=using, fields=fields, **kwargs)
+
 class AuditLog(models.Model):
     user = models.ForeignKey(
         settings.AUTH_USER_MODEL,
@@ -53,9 +69,20 @@ class AuditLog(models.Model):
     action = models.CharField(max_length=50)
     resource_type = models.CharField(max_length=50)
     resource_id = models.CharField(max_length=50)
-    timestamp = models.DateTimeField(auto_now_add=True)
+    # Set when the event happens, not when a buffered batch is written
+    timestamp = models.DateTimeField(default=timezone.now)
     ip_address = models.GenericIPAddressField()
     details = models.JSONField()
 
     class Meta:
         ordering = ['-timestamp']
+        # On PostgreSQL the table is also range-partitioned by month on
+        # timestamp (see migration 0003 and users/partitions.py)
+        indexes = [
+            models.Index(fields=['timestamp'], name='users_audit_ts_idx'),
+            models.Index(fields=['user', 'timestamp'], name='users_audit_user_ts_idx'),
+            models.Index(
+                fields=['resource_type', 'resource_id', 'timestamp'],
+                name='users_audit_resource_ts_idx'
+            ),
+        ]
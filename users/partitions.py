@@ -0,0 +1,205 @@
+import gzip
+import json
+import tempfile
+from datetime import date, datetime, time, timezone as dt_timezone
+from django.conf import settings
+from django.core.files import File
+from django.core.files.storage import default_storage
+from django.core.serializers.json import DjangoJSONEncoder
+from django.db import connection, transaction
+
+AUDIT_TABLE = 'users_auditlog'
+DEFAULT_PARTITION = f'{AUDIT_TABLE}_default'
+
+def month_start(day):
+    return date(day.year, day.month, 1)
+
+def add_months(day, months):
+    month = day.month - 1 + months
+    return date(day.year + month // 12, month % 12 + 1, 1)
+
+def partition_name(month):
+    return f'{AUDIT_TABLE}_y{month.year}m{month.month:02d}'
+
+def _bound(month):
+    return datetime.combine(month, time.min, tzinfo=dt_timezone.utc).isoformat()
+
+def is_partitioned():
+    """Whether the audit table is a PostgreSQL range-partitioned table"""
+    if connection.vendor != 'postgresql':
+        return False
+    with connection.cursor() as cursor:
+        cursor.execute(
+            "SELECT 1 FROM pg_partitioned_table p "
+            "JOIN pg_class c ON c.oid = p.partrelid WHERE c.relname = %s",
+            [AUDIT_TABLE]
+        )
+        return cursor.fetchone() is not None
+
+def create_partition(cursor, month):
+    """Attach the partition for `month`, moving in its rows from the DEFAULT partition.
+
+    PostgreSQL refuses to create a partition whose range already has rows in
+    the DEFAULT partition, so the table is built detached, filled from the
+    DEFAULT partition and then attached. Run it inside a transaction.
+    """
+    name = partition_name(month)
+    cursor.execute('SELECT to_regclass(%s)', [name])
+    if cursor.fetchone()[0] is not None:
+        return False
+    lower, upper = _bound(month), _bound(add_months(month, 1))
+    cursor.execute(f'CREATE TABLE {name} (LIKE {AUDIT_TABLE})')
+    cursor.execute(
+        f'WITH moved AS (DELETE FROM {DEFAULT_PARTITION} '
+        f'WHERE "timestamp" >= %s AND "timestamp" < %s RETURNING *) '
+        f'INSERT INTO {name} SELECT * FROM moved',
+        [lower, upper]
+    )
+    cursor.execute(
+        f'ALTER TABLE {AUDIT_TABLE} ATTACH PARTITION {name} '
+        f"FOR VALUES FROM ('{lower}') TO ('{upper}')"
+    )
+    return True
+
+def default_partition_months():
+    """Months with rows that landed in the DEFAULT partition"""
+    with connection.cursor() as cursor:
+        cursor.execute(
+            f"SELECT DISTINCT date_trunc('month', \"timestamp\" AT TIME ZONE 'UTC')::date "
+            f'FROM {DEFAULT_PARTITION}'
+        )
+        return [row[0] for row in cursor.fetchall()]
+
+def ensure_partitions(months_ahead=2, today=None):
+    """Create monthly partitions up to `months_ahead` months from now.
+
+    Months whose rows ended up in the DEFAULT partition (written before
+    their partition existed) get a partition too, so they can be archived.
+    Returns the partitions created.
+    """
+    if not is_partitioned():
+        return []
+    current = month_start(today or date.today())
+    months = {add_months(current, offset) for offset in range(months_ahead + 1)}
+    months.update(default_partition_months())
+    created = []
+    for month in sorted(months):
+        with transaction.atomic(), connection.cursor() as cursor:
+            if create_partition(cursor, month):
+                created.append(partition_name(month))
+    return created
+
+def attached_partitions():
+    """(name, month) for every monthly partition currently attached"""
+    with connection.cursor() as cursor:
+        cursor.execute(
+            "SELECT c.relname FROM pg_inherits i "
+            "JOIN pg_class c ON c.oid = i.inhrelid "
+            "JOIN pg_class p ON p.oid = i.inhparent WHERE p.relname = %s",
+            [AUDIT_TABLE]
+        )
+        names = [row[0] for row in cursor.fetchall()]
+    partitions = []
+    for name in names:
+        suffix = name[len(AUDIT_TABLE) + 1:]
+        if len(suffix) == 8 and suffix[0] == 'y' and suffix[5] == 'm':
+            partitions.append((name, date(int(suffix[1:5]), int(suffix[6:8]), 1)))
+    return sorted(partitions, key=lambda partition: partition[1])
+
+ARCHIVE_COLUMNS = [
+    'id', 'user_id', 'action', 'resource_type', 'resource_id', 'timestamp', 'ip_address', 'details'
+]
+
+def _partition_rows(cursor, name):
+    """Rows of a partition, fetched in chunks from a raw cursor"""
+    columns = ', '.join(f'"{column}"' for column in ARCHIVE_COLUMNS)
+    cursor.execute(f'SELECT {columns} FROM {name} ORDER BY "timestamp", id')
+    while True:
+        rows = cursor.fetchmany(settings.AUDIT_LOG_ARCHIVE_CHUNK_SIZE)
+        if not rows:
+            break
+        for row in rows:
+            record = dict(zip(ARCHIVE_COLUMNS, row))
+            if isinstance(record['details'], str):
+                record['details'] = json.loads(record['details'])
+            yield record
+
+def _write_archive(records, label):
+    """Stream records into a gzip NDJSON file saved through the storage backend.
+
+    Returns the saved path, the number of records and the highest id written.
+    """
+    count, last_id = 0, 0
+    with tempfile.TemporaryFile() as spool:
+        with gzip.GzipFile(fileobj=spool, mode='wb') as archive:
+            for record in records:
+                archive.write(json.dumps(record, cls=DjangoJSONEncoder).encode() + b'\n')
+                count += 1
+                last_id = max(last_id, record['id'])
+        spool.seek(0)
+        path = f'{settings.AUDIT_LOG_ARCHIVE_PREFIX}/{label}.ndjson.gz'
+        saved = default_storage.save(path, File(spool, name=path))
+    return saved, count, last_id
+
+def _archive_partition(name):
+    """Export an attached partition, then detach and drop it.
+
+    The export runs outside any transaction and only locks the partition
+    being read; the parent table is locked (ACCESS EXCLUSIVE) just for the
+    detach and drop. DETACH CONCURRENTLY is not an option while the table
+    has a DEFAULT partition. Returns None, removing the export, when rows
+    were written to the partition after it was read.
+    """
+    with connection.cursor() as cursor:
+        path, count, last_id = _write_archive(_partition_rows(cursor, name), name)
+    with transaction.atomic(), connection.cursor() as cursor:
+        cursor.execute(f'ALTER TABLE {AUDIT_TABLE} DETACH PARTITION {name}')
+        cursor.execute(f'SELECT 1 FROM {name} WHERE id > %s LIMIT 1', [last_id])
+        if cursor.fetchone() is not None:
+            # A late backdated write; keep the partition for the next run
+            transaction.set_rollback(True)
+            default_storage.delete(path)
+            return None
+        cursor.execute(f'DROP TABLE {name}')
+    return {'partition': name, 'path': path, 'rows': count}
+
+def archive_before(cutoff):
+    """Export and remove audit rows older than the month containing `cutoff`.
+
+    On a partitioned table whole monthly partitions are exported, then
+    detached and dropped, which costs no row-level deletes or vacuum.
+    Elsewhere the rows are exported and deleted month by month. Exports run
+    outside transactions so no lock is held while writing to storage.
+    """
+    from .models import AuditLog
+
+    cutoff = month_start(cutoff)
+    archived = []
+    if is_partitioned():
+        for name, month in attached_partitions():
+            if month >= cutoff:
+                continue
+            entry = _archive_partition(name)
+            if entry is not None:
+                archived.append(entry)
+        return archived
+
+    while True:
+        oldest = AuditLog.objects.order_by('timestamp').values_list('timestamp', flat=True).first()
+        if oldest is None or month_start(oldest) >= cutoff:
+            break
+        month = month_start(oldest)
+        rows = AuditLog.objects.filter(
+            timestamp__gte=datetime.combine(month, time.min, tzinfo=dt_timezone.utc),
+            timestamp__lt=datetime.combine(add_months(month, 1), time.min, tzinfo=dt_timezone.utc)
+        )
+        path, count, last_id = _write_archive(
+            rows.order_by('timestamp', 'id').values(*ARCHIVE_COLUMNS).iterator(
+                chunk_size=settings.AUDIT_LOG_ARCHIVE_CHUNK_SIZE
+            ),
+            partition_name(month)
+        )
+        # Rows written after the export stay for the next pass
+        rows.filter(id__lte=last_id).delete()
+        archived.append({'partition': partition_name(month), 'path': path, 'rows': count})
+    return archived
@@ -0,0 +1,166 @@
+from django.conf import settings
+from django.core.cache import caches
+from rest_framework import permissions
+from ehs_backend.cache import _new_generation
+
+GLOBAL_VERSION_KEY = 'perm-version:global'
+
+def _cache():
+    # Checked on every request; served from the per-process tier
+    return caches[settings.LAYERED_CACHE_ALIAS]
+
+def _user_version_key(user_id):
+    return f'perm-version:user:{user_id}'
+
+def _snapshot_key(user_id, version):
+    return f'perm-snapshot:{user_id}:{version}'
+
+class PermissionSnapshot:
+    """Role and effective permission codes of a user at a given version stamp"""
+    def __init__(self, role, is_active, is_superuser, perms, version):
+        self.role = role
+        self.is_active = is_active
+        self.is_superuser = is_superuser
+        self.perms = frozenset(perms)
+        self.version = version
+
+    def has_perm(self, perm):
+        # Same semantics as ModelBackend: inactive users have no permissions
+        return self.is_active and (self.is_superuser or perm in self.perms)
+
+    def as_dict(self):
+        return {
+            'role': self.role,
+            'is_active': self.is_active,
+            'is_superuser': self.is_superuser,
+            'perms': sorted(self.perms),
+            'version': self.version
+        }
+
+    def as_claims(self):
+        return {
+            'perms': sorted(self.perms),
+            'perm_version': self.version,
+            'is_superuser': self.is_superuser
+        }
+
+class PermissionCache:
+    """Per-user permission snapshots keyed by a version stamp.
+
+    The stamp combines a global generation (renewed when a group's
+    permissions change) with a per-user generation (renewed when the user's
+    groups, direct permissions or role change), so invalidation never has
+    to find and delete old entries: a bump makes every stale snapshot
+    unreachable. Generations are clock readings rather than counters, so an
+    evicted one is restarted at a value no token or snapshot carries.
+    """
+    @staticmethod
+    def version(user_id):
+        keys = [GLOBAL_VERSION_KEY, _user_version_key(user_id)]
+        cache = _cache()
+        stamps = cache.get_many(keys)
+        for key in keys:
+            if key not in stamps:
+                cache.add(key, _new_generation(), None)
+                stamps[key] = cache.get(key)
+        return '.'.join(str(stamps[key]) for key in keys)
+
+    @staticmethod
+    def bump(user_id=None):
+        """Invalidate one user's snapshots, or everyone's when user_id is None"""
+        key = GLOBAL_VERSION_KEY if user_id is None else _user_version_key(user_id)
+        _cache().set(key, _new_generation(), None)
+
+    @staticmethod
+    def build(user, version):
+        """Resolve the snapshot from the database"""
+        return PermissionSnapshot(
+            role=user.role,
+            is_active=user.is_active,
+            is_superuser=user.is_superuser,
+            perms=() if user.is_superuser else user.get_all_permissions(),
+            version=version
+        )
+
+    @staticmethod
+    def get(user, version=None):
+        version = version or PermissionCache.version(user.pk)
+        key = _snapshot_key(user.pk, version)
+        data = _cache().get(key)
+        if data is not None:
+            return PermissionSnapshot(**data)
+        snapshot = PermissionCache.build(user, version)
+        _cache().set(key, snapshot.as_dict(), settings.PERMISSION_CACHE_TIMEOUT)
+        return snapshot
+
+    @staticmethod
+    def for_request(request):
+        """Snapshot for the authenticated user, resolved once per request.
+
+        Access tokens issued by CustomTokenObtainPairSerializer embed the
+        snapshot; it is used as long as its stamp is still current, so the
+        usual check costs one cache read and no queries.
+        """
+        snapshot = getattr(request, '_permission_snapshot', None)
+        if snapshot is not None:
+            return snapshot
+
+        user = request.user
+        version = PermissionCache.version(user.pk)
+        token = getattr(request, 'auth', None)
+        if token is not None and hasattr(token, 'get') and token.get('perm_version') == version:
+            snapshot = PermissionSnapshot(
+                role=token.get('role', user.role),
+                is_active=True,
+                is_superuser=token.get('is_superuser', False),
+                perms=token.get('perms', ()),
+                version=version
+            )
+        else:
+            snapshot = PermissionCache.get(user, version)
+        request._permission_snapshot = snapshot
+        return snapshot
+
+class PermissionRule:
+    """Access rule for one view action.
+
+    Access is granted if the user holds `perm`, has one of `roles`, or, for
+    object checks, owns the object through `owner_field`.
+    """
+    def __init__(self, perm=None, roles=(), owner_field=None):
+        self.perm = perm
+        self.roles = frozenset(roles)
+        self.owner_field = owner_field
+
+    def allows(self, snapshot, user, obj=None):
+        if self.perm and snapshot.has_perm(self.perm):
+            return True
+        if snapshot.role in self.roles:
+            return True
+        if obj is not None and self.owner_field:
+            return getattr(obj, self.owner_field) == user.pk
+        return False
+
+class SnapshotPermission(permissions.BasePermission):
+    """DRF permission answering per-action rules from the cached snapshot.
+
+    Actions without a rule are allowed. Rules with an owner field are
+    evaluated in has_object_permission, i.e. when the view calls
+    get_object().
+    """
+    message = "Permission denied"
+    rules = {}
+
+    def has_permission(self, request, view):
+        rule = self.rules.get(getattr(view, 'action', None))
+        if rule is None or rule.owner_field:
+            return True
+        if not (request.user and request.user.is_authenticated):
+            return False
+        return rule.allows(PermissionCache.for_request(request), request.user)
+
+    def has_object_permission(self, request, view, obj):
+        rule = self.rules.get(getattr(view, 'action', None))
+        if rule is None or not rule.owner_field:
+            return True
+        return rule.allows(PermissionCache.for_request(request), request.user, obj)
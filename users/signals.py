@@ -0,0 +1,73 @@
+from django.contrib.auth.models import Group
+from django.db.models.signals import m2m_changed, pre_save, post_save, post_delete
+from django.dispatch import receiver
+from django_otp.plugins.otp_static.models import StaticDevice
+from django_otp.plugins.otp_totp.models import TOTPDevice
+from .authentication import TokenRevocation
+from .models import User, ClaimsUser
+from .mfa import MFADeviceCache
+from .permissions import PermissionCache
+
+# Fields whose change makes outstanding token claims and snapshots stale
+CLAIM_FIELDS = ('role', 'is_active', 'is_staff', 'is_superuser')
+
+@receiver(m2m_changed, sender=User.groups.through)
+@receiver(m2m_changed, sender=User.user_permissions.through)
+def user_memberships_changed(sender, instance, action, reverse, pk_set, **kwargs):
+    """Invalidate snapshots when a user's groups or direct permissions change"""
+    if not action.startswith('post_'):
+        return
+    if not reverse:
+        PermissionCache.bump(instance.pk)
+    elif pk_set:
+        for user_id in pk_set:
+            PermissionCache.bump(user_id)
+    else:
+        # Cleared from the group/permission side; the affected users are gone
+        PermissionCache.bump()
+
+@receiver(m2m_changed, sender=Group.permissions.through)
+def group_permissions_changed(sender, action, **kwargs):
+    if action.startswith('post_'):
+        PermissionCache.bump()
+
+@receiver(post_delete, sender=Group)
+def group_deleted(sender, **kwargs):
+    PermissionCache.bump()
+
+@receiver(pre_save, sender=User)
+@receiver(pre_save, sender=ClaimsUser)
+def user_claims_changing(sender, instance, update_fields=None, **kwargs):
+    instance._claims_changed = False
+    if instance._state.adding or instance.pk is None:
+        return
+    if update_fields is not None and not set(update_fields) & set(CLAIM_FIELDS):
+        return
+    stored = User.objects.filter(pk=instance.pk).values(*CLAIM_FIELDS).first()
+    instance._claims_changed = stored is not None and any(
+        stored[field] != getattr(instance, field) for field in CLAIM_FIELDS
+    )
+
+@receiver(post_save, sender=User)
+@receiver(post_save, sender=ClaimsUser)
+def user_saved(sender, instance, created, **kwargs):
+    if getattr(instance, '_claims_changed', False):
+        PermissionCache.bump(instance.pk)
+        # Role, staff status or deactivation: tokens carrying old claims must go
+        TokenRevocation.revoke_user(instance.pk)
+
+@receiver(post_delete, sender=User)
+@receiver(post_delete, sender=ClaimsUser)
+def user_deleted(sender, instance, **kwargs):
+    # Tokens rebuild a ClaimsUser from claims and would outlive the row
+    TokenRevocation.revoke_user(instance.pk)
+
+@receiver(post_save, sender=TOTPDevice)
+@receiver(post_save, sender=StaticDevice)
+def otp_device_saved(sender, instance, **kwargs):
+    MFADeviceCache.device_saved(instance)
+
+@receiver(post_delete, sender=TOTPDevice)
+@receiver(post_delete, sender=StaticDevice)
+def otp_device_deleted(sender, instance, **kwargs):
+    MFADeviceCache.invalidate(instance.user_id)
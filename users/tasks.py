@@ -0,0 +1,14 @@
+from ehs_backend.celery import app
+from django.conf import settings
+from django.utils import timezone
+from .partitions import add_months, archive_before, ensure_partitions, month_start
+
+@app.task
+def rollover_audit_log_partitions(online_months=None):
+    """Create upcoming audit partitions and archive the ones past retention"""
+    online_months = online_months or settings.AUDIT_LOG_ONLINE_MONTHS
+    today = timezone.now().date()
+    created = ensure_partitions(settings.AUDIT_LOG_PARTITIONS_AHEAD, today)
+    cutoff = add_months(month_start(today), -online_months)
+    archived = archive_before(cutoff)
+    return {'created': created, 'archived': archived, 'cutoff': cutoff.isoformat()}
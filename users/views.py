@@ -1,11 +1,20 @@
 from rest_framework import viewsets, status, permissions, serializers
 from rest_framework.decorators import action
 from rest_framework.response import Response
-from rest_framework_simplejwt.views import TokenObtainPairView
-from rest_framework_simplejwt.serializers import TokenObtainPairSerializer
+from rest_framework.pagination import CursorPagination
+from rest_framework.exceptions import Throttled
+from rest_framework_simplejwt.views import TokenObtainPairView, TokenRefreshView
+from rest_framework_simplejwt.serializers import TokenObtainPairSerializer, TokenRefreshSerializer
+from rest_framework_simplejwt.exceptions import InvalidToken, TokenError
+from rest_framework_simplejwt.tokens import RefreshToken
 from django_otp import devices_for_user, user_has_device
 from django_otp.plugins.otp_totp.models import TOTPDevice
 from .models import User, AuditLog
+from .audit import record_audit_event
+from .authentication import TokenRevocation
+from .mfa import MFADeviceCache
+from .permissions import PermissionCache
+from .ratelimit import SlidingWindowRateLimiter
 from .serializers import (
     UserSerializer, 
     RegisterSerializer,
@@ -13,6 +22,10 @@ from .serializers import (
     MFAVerifySerializer,
     AuditLogSerializer
 )
+from django.conf import settings
+from django.utils.dateparse import parse_date, parse_datetime
+from django.utils.timezone import make_aware
+from datetime import datetime, time
 import logging
 
 logger = logging.getLogger(__name__)
@@ -26,7 +39,7 @@ class CustomTokenObtainPairSerializer(TokenObtainPairSerializer):
             logger.debug("Base validation successful")
 
             user = self.user
-            logger.debug(f"Processing user: {user.username}")
+            logger.debug("Processing user: %s", user.username)
 
             # Check if user has MFA enabled
             if user.is_mfa_enabled:
@@ -41,7 +54,7 @@ class CustomTokenObtainPairSerializer(TokenObtainPairSerializer):
                 
                 logger.debug("Verifying MFA token")
                 # Verify MFA token
-                device = devices_for_user(user, confirmed=True).first()
+                device = MFADeviceCache.confirmed_device(user)
                 if not device or not device.verify_token(self.initial_data['mfa_token']):
                     logger.debug("Invalid MFA token")
                     raise serializers.ValidationError({
@@ -51,26 +64,26 @@ class CustomTokenObtainPairSerializer(TokenObtainPairSerializer):
 
             try:
                 # Log successful login
-                AuditLog.objects.create(
+                record_audit_event(
                     user=user,
                     action='LOGIN',
                     resource_type='USER',
-                    resource_id=str(user.id),
+                    resource_id=user.id,
                     ip_address=self.context['request'].META.get('REMOTE_ADDR', ''),
                     details={'method': 'jwt', 'mfa_used': user.is_mfa_enabled}
                 )
-                logger.debug("Audit log created successfully")
+                logger.debug("Audit log recorded")
             except Exception as e:
-                logger.error(f"Error creating audit log: {str(e)}")
+                logger.error("Error creating audit log: %s", e)
 
             logger.debug("Returning validated data")
             return data
 
         except serializers.ValidationError as e:
-            logger.error(f"Validation error: {str(e)}")
+            logger.error("Validation error: %s", e)
             raise
         except Exception as e:
-            logger.error(f"Unexpected error in validate: {str(e)}", exc_info=True)
+            logger.error("Unexpected error in validate: %s", e, exc_info=True)
             raise serializers.ValidationError({
                 'detail': 'An unexpected error occurred during authentication.'
             })
@@ -79,39 +92,98 @@ class CustomTokenObtainPairSerializer(TokenObtainPairSerializer):
     def get_token(cls, user):
         try:
             token = super().get_token(user)
+            # Issue time to the microsecond (SimpleJWT rounds to the second) so
+            # tokens from a login just after a user revocation outlive it
+            token['iat'] = token.current_time.timestamp()
             # Add custom claims
             token['username'] = user.username
             token['role'] = user.role
+            token['is_staff'] = user.is_staff
+            token['is_mfa_enabled'] = user.is_mfa_enabled
+            # Permission snapshot, trusted while its version stamp is current
+            for claim, value in PermissionCache.get(user).as_claims().items():
+                token[claim] = value
             return token
         except Exception as e:
-            logger.error(f"Error in get_token: {str(e)}", exc_info=True)
+            logger.error("Error in get_token: %s", e, exc_info=True)
             raise
 
 class CustomTokenObtainPairView(TokenObtainPairView):
     serializer_class = CustomTokenObtainPairSerializer
 
     def post(self, request, *args, **kwargs):
+        # Rejected before any password hashing; raised outside the try so
+        # DRF turns it into a 429 with Retry-After
+        self.check_login_rate(request)
         try:
             logger.debug("Starting CustomTokenObtainPairView.post")
             response = super().post(request, *args, **kwargs)
-            logger.debug(f"Response status code: {response.status_code}")
+            logger.debug("Response status code: %s", response.status_code)
             return response
         except Exception as e:
-            logger.error(f"Error in CustomTokenObtainPairView.post: {str(e)}", exc_info=True)
+            logger.error("Error in CustomTokenObtainPairView.post: %s", e, exc_info=True)
             return Response(
                 {'detail': 'An error occurred during authentication.'},
                 status=status.HTTP_500_INTERNAL_SERVER_ERROR
             )
 
+    def check_login_rate(self, request):
+        if not settings.LOGIN_RATE_LIMIT_ENABLED:
+            return
+        username = str(request.data.get('username', '')).lower()
+        checks = [
+            ('login-ip', settings.LOGIN_RATE_LIMIT_IP, request.META.get('REMOTE_ADDR', '')),
+            ('login-user', settings.LOGIN_RATE_LIMIT_USER, username),
+        ]
+        for scope, rate, identifier in checks:
+            if not identifier:
+                continue
+            allowed, retry_after = SlidingWindowRateLimiter(scope, rate).hit(identifier)
+            if not allowed:
+                logger.warning("Login rate limit hit for %s %s", scope, identifier)
+                raise Throttled(wait=retry_after)
+
     def get_serializer_context(self):
         try:
             context = super().get_serializer_context()
             context.update({"request": self.request})
             return context
         except Exception as e:
-            logger.error(f"Error in get_serializer_context: {str(e)}", exc_info=True)
+            logger.error("Error in get_serializer_context: %s", e, exc_info=True)
             raise
 
+class RevocationAwareTokenRefreshSerializer(TokenRefreshSerializer):
+    def validate(self, attrs):
+        refresh = RefreshToken(attrs['refresh'])
+        if TokenRevocation.is_revoked(refresh):
+            raise InvalidToken("Token has been revoked")
+        return super().validate(attrs)
+
+class CustomTokenRefreshView(TokenRefreshView):
+    serializer_class = RevocationAwareTokenRefreshSerializer
+
+AUDIT_LOG_FILTERS = {
+    'user_id': 'user_id',
+    'action': 'action',
+    'resource_type': 'resource_type',
+    'resource_id': 'resource_id',
+}
+# Filters on integer columns; anything else is a 400, not a database error
+AUDIT_LOG_INTEGER_FILTERS = {'user_id'}
+
+def _day_start(value):
+    day = parse_date(value)
+    return make_aware(datetime.combine(day, time.min)) if day else None
+
+class AuditLogPagination(CursorPagination):
+    ordering = ('-timestamp', '-id')
+    page_size_query_param = 'page_size'
+    max_page_size = 1000
+
+    def get_page_size(self, request):
+        self.page_size = settings.AUDIT_LOG_PAGE_SIZE
+        return super().get_page_size(request)
+
 class UserViewSet(viewsets.ModelViewSet):
     queryset = User.objects.all()
     serializer_class = UserSerializer
@@ -129,7 +201,7 @@ class UserViewSet(viewsets.ModelViewSet):
     def mfa_enable(self, request):
         serializer = MFAEnableSerializer(data=request.data, context={'request': request})
         if serializer.is_valid():
-            device = TOTPDevice.objects.create(user=request.user, confirmed=False)
+            device = TOTPDevice.objects.create(user_id=request.user.pk, confirmed=False)
             config_url = device.config_url
             return Response({'config_url': config_url})
         return Response(serializer.errors, status=status.HTTP_400_BAD_REQUEST)
@@ -138,15 +210,31 @@ class UserViewSet(viewsets.ModelViewSet):
     def mfa_verify(self, request):
         serializer = MFAVerifySerializer(data=request.data, context={'request': request})
         if serializer.is_valid():
-            device = devices_for_user(request.user, confirmed=False).first()
+            device = next(iter(devices_for_user(request.user, confirmed=False)), None)
             if device is not None:
                 device.confirmed = True
                 device.save()
                 request.user.is_mfa_enabled = True
-                request.user.save()
+                request.user.save(update_fields=['is_mfa_enabled'])
                 return Response({'status': 'MFA enabled successfully'})
         return Response(serializer.errors, status=status.HTTP_400_BAD_REQUEST)
 
+    @action(detail=False, methods=['post'])
+    def logout(self, request):
+        """Revoke the current access token and, if given, its refresh token"""
+        if request.auth is not None:
+            TokenRevocation.revoke_token(request.auth)
+        refresh = request.data.get('refresh')
+        if refresh:
+            try:
+                TokenRevocation.revoke_token(RefreshToken(refresh))
+            except TokenError:
+                return Response(
+                    {"refresh": "Invalid or expired token"},
+                    status=status.HTTP_400_BAD_REQUEST
+                )
+        return Response(status=status.HTTP_204_NO_CONTENT)
+
     @action(detail=False, methods=['get'])
     def audit_logs(self, request):
         if not request.user.is_staff:
@@ -154,6 +242,35 @@ class UserViewSet(viewsets.ModelViewSet):
                 {"detail": "Permission denied"},
                 status=status.HTTP_403_FORBIDDEN
             )
-        logs = AuditLog.objects.filter(user=request.user)
-        serializer = AuditLogSerializer(logs, many=True)
-        return Response(serializer.data)
\ No newline at end of file
+        filters = {}
+        for param, lookup in AUDIT_LOG_FILTERS.items():
+            value = request.query_params.get(param)
+            if value:
+                if param in AUDIT_LOG_INTEGER_FILTERS and not value.isdigit():
+                    return Response(
+                        {param: "Expected an integer"},
+                        status=status.HTTP_400_BAD_REQUEST
+                    )
+                filters[lookup] = value
+        for param, lookup in (('since', 'timestamp__gte'), ('until', 'timestamp__lt')):
+            value = request.query_params.get(param)
+            if value:
+                parsed = parse_datetime(value) or _day_start(value)
+                if parsed is None:
+                    return Response(
+                        {param: "Expected an ISO 8601 date or datetime"},
+                        status=status.HTTP_400_BAD_REQUEST
+                    )
+                filters[lookup] = parsed
+        if not filters:
+            filters['user'] = request.user
+
+        # CursorPagination seeks on timestamp alone (rows sharing the cursor's
+        # timestamp are skipped by offset, rare at microsecond precision), so
+        # deep pages stay index-backed and PostgreSQL can prune partitions
+        # outside the since/until window
+        logs = AuditLog.objects.filter(**filters)
+        paginator = AuditLogPagination()
+        page = paginator.paginate_queryset(logs, request, view=self)
+        serializer = AuditLogSerializer(page, many=True)
+        return paginator.get_paginated_response(serializer.data)
\ No newline at end of file